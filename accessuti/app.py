@@ -1,21 +1,94 @@
+import os, threading, time
+
 from flask import Flask
 from .config import Config
 from .storage.csv_store import CSVStore
+from .storage.sqlite_store import SQLiteStore
+from .storage.audit_log import AuditLog
+from .storage.app_user_store import AppUserStore
 from .services.user_service import UserService
+from .services.auth_service import AuthService
+from .services.charts import ChartCache
+from .services.expiry_sweeper import ExpirySweeper
+from .ds.lru_cache import LRUCache
 from .routes.auth_routes import auth_bp
 from .routes.user_routes import users_bp
+from .routes.api_routes import api_bp
+from .routes.metrics_routes import metrics_bp, register_metrics
+from .cli import register_cli
 
-def create_app():
+def create_app(config_object=Config):
     app = Flask(__name__, static_folder="static", template_folder="templates")
-    app.config.from_object(Config)
+    app.config.from_object(config_object)
 
-    store = CSVStore(app.config["USERS_CSV"])
-    svc = UserService(store)
+    if app.config["STORAGE_BACKEND"] == "sqlite":
+        store = SQLiteStore(app.config["USERS_DB"])
+    else:
+        store = CSVStore(app.config["USERS_CSV"])
+    audit = AuditLog(app.config["AUDIT_CSV"], flush_interval=app.config["AUDIT_FLUSH_INTERVAL"])
+    svc = UserService(store, audit=audit, snapshot_path=app.config["SNAPSHOT_PATH"] or None)
 
     app.extensions["user_service"] = svc
+    app.extensions["auth_service"] = AuthService(
+        AppUserStore(app.config["SYSTEM_USERS_CSV"]),
+        hash_method=app.config["PASSWORD_HASH_METHOD"],
+        cache_ttl=app.config["LOGIN_CACHE_TTL"],
+        max_failures=app.config["LOGIN_MAX_FAILURES"],
+        lockout=app.config["LOGIN_LOCKOUT"],
+    )
+    app.extensions["chart_cache"] = ChartCache(svc)
+
+    if app.config["RESPONSE_CACHE_ENTRIES"] > 0:
+        app.extensions["response_cache"] = LRUCache(
+            max_entries=app.config["RESPONSE_CACHE_ENTRIES"],
+            max_bytes=app.config["RESPONSE_CACHE_BYTES"],
+            ttl=app.config["RESPONSE_CACHE_TTL"],
+        )
+
+    sweeper = ExpirySweeper(svc, app.config["EXPIRY_LOCK"])
+    app.extensions["expiry_sweeper"] = sweeper
+
+    # hilos de fondo (escritura de auditoría, índice de nombres, barrido de
+    # vencimientos): se arrancan con la primera petición de cada proceso y no
+    # aquí. Con `gunicorn --preload` create_app corre en el master y los hilos
+    # no sobreviven al fork; un lock tomado por uno de ellos quedaría además
+    # tomado para siempre en el worker
+    started_pid = [None]
+    start_lock = threading.Lock()
+
+    @app.before_request
+    def start_background():
+        if started_pid[0] == os.getpid():
+            return
+        with start_lock:
+            if started_pid[0] == os.getpid():
+                return
+            started_pid[0] = os.getpid()
+            audit.start()
+            # índice de nombres en segundo plano: la primera búsqueda no lo espera
+            svc.warm_up()
+            if app.config["EXPIRY_SWEEPER"] == "thread":
+                sweeper.start()
+
+    # con varios workers cada uno tiene su propio índice en memoria: antes de
+    # atender se revisa (como mucho cada STORE_REFRESH_INTERVAL s) si el store
+    # cambió en disco y solo entonces se aplican los cambios
+    last_check = [0.0]
+
+    @app.before_request
+    def refresh_store():
+        now = time.monotonic()
+        if now - last_check[0] >= app.config["STORE_REFRESH_INTERVAL"]:
+            last_check[0] = now
+            svc.refresh()
 
     app.register_blueprint(auth_bp, url_prefix="/app")
     app.register_blueprint(users_bp, url_prefix="/app")
+    app.register_blueprint(api_bp, url_prefix="/api/v1")
+    app.register_blueprint(metrics_bp)
+    register_metrics(app)
+
+    register_cli(app)
 
     return app
 
@@ -1,3 +1,5 @@
+# BST sin balancear que usaba el índice antes del AVL; queda solo como
+# referencia para bench.index_build.
 class Node:
     def __init__(self, key, data):
         self.key = key
@@ -44,4 +46,4 @@ class BST:
                 cur = cur.right
             else:
                 return cur.data
-        return None
\ No newline at end of file
+        return None
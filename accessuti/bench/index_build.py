@@ -0,0 +1,65 @@
+# Compara la construcción del índice por inserción fila a fila contra la
+# carga masiva (sort + AVLTree.from_sorted).
+#
+#   python -m accessuti.bench.index_build --sizes 10000 100000 1000000
+import argparse, os, tempfile, time
+
+from .bst import BST
+from ..ds.avl import AVLTree
+from ..storage.csv_store import CSVStore
+from ..services.user_service import UserService
+from .synthetic import generate_directory
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def _insert_all(tree, pairs):
+    for k, v in pairs:
+        tree.insert(k, v)
+    return tree
+
+
+def run(n, max_bst, tmpdir):
+    # ordenadas por usuario_red como los exports: el peor caso del BST sin balancear
+    rows = sorted(generate_directory(n), key=lambda r: r["usuario_red"])
+    pairs = [(r["usuario_red"], r) for r in rows]
+
+    res = {"rows": n}
+    if n <= max_bst:
+        res["bst_insert"], _ = _timed(lambda: _insert_all(BST(), pairs))
+    res["avl_insert"], _ = _timed(lambda: _insert_all(AVLTree(), pairs))
+    res["avl_bulk"], _ = _timed(lambda: AVLTree.from_sorted(sorted(pairs, key=lambda p: p[0])))
+
+    # arranque completo del servicio (parseo CSV + índice) y recarga
+    store = CSVStore(os.path.join(tmpdir, f"users_{n}.csv"))
+    store.write_all(rows)
+    res["startup"], svc = _timed(lambda: UserService(store))
+    res["reload"], _ = _timed(svc._load_network_users)
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    # el BST sin balancear es O(n²) con entrada ordenada
+    ap.add_argument("--max-bst", type=int, default=20_000)
+    args = ap.parse_args()
+
+    cols = ["rows", "bst_insert", "avl_insert", "avl_bulk", "startup", "reload"]
+    print("".join(f"{c:>12}" for c in cols))
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            res = run(n, args.max_bst, tmp)
+            print("".join(
+                f"{res[c]:>12}" if c == "rows" else
+                (f"{res[c]:>11.3f}s" if c in res else f"{'-':>12}")
+                for c in cols
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Logins por segundo en un núcleo (un solo hilo) para cada camino de
+# AuthService: hash completo con distintos costos, login repetido (HMAC en
+# caché) y cuenta bloqueada por intentos fallidos.
+#
+#   python -m accessuti.bench.login --seconds 2
+import argparse, os, tempfile, time
+
+from ..services.auth_service import AuthService
+from ..storage.app_user_store import AppUserStore
+
+METHODS = ["scrypt:32768:8:1", "scrypt:16384:8:1", "pbkdf2:sha256:600000"]
+
+
+def _rate(fn, seconds):
+    n, t0 = 0, time.perf_counter()
+    while True:
+        fn()
+        n += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= seconds:
+            return n / elapsed
+
+
+def run(method, seconds, tmpdir):
+    path = os.path.join(tmpdir, method.replace(":", "_") + ".csv")
+    auth = AuthService(AppUserStore(path), hash_method=method, cache_ttl=0)
+    res = {"method": method}
+    res["full_hash"] = _rate(lambda: auth.validate_login("admin", "admin123"), seconds)
+
+    auth.cache_ttl = 900
+    auth.validate_login("admin", "admin123")
+    res["cached"] = _rate(lambda: auth.validate_login("admin", "admin123"), seconds)
+
+    for _ in range(auth.max_failures):
+        auth.validate_login("consulta", "mala")
+    res["locked_out"] = _rate(lambda: auth.validate_login("consulta", "mala"), seconds)
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=2.0)
+    ap.add_argument("--methods", nargs="+", default=METHODS)
+    args = ap.parse_args()
+
+    cols = ["full_hash", "cached", "locked_out"]
+    print(f"{'method':>24}" + "".join(f"{c:>14}" for c in cols) + "   (logins/s, 1 núcleo)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for m in args.methods:
+            res = run(m, args.seconds, tmp)
+            print(f"{m:>24}" + "".join(f"{res[c]:>14,.0f}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Bytes por usuario de NetworkUser (slots + internado + fechas ordinales)
+# frente a la dataclass anterior, con filas parseadas desde CSV como en la
+# carga real (cada celda es un str nuevo).
+#
+#   python -m accessuti.bench.record_memory --rows 1000000
+import argparse, csv, io, tracemalloc
+from dataclasses import dataclass
+
+from ..services.user_service import NetworkUser
+from ..storage.base import FIELDS
+from .synthetic import generate_directory
+
+
+@dataclass
+class LegacyNetworkUser:
+    usuario_red: str = ""
+    nombres: str = ""
+    apellidos: str = ""
+    dni: str = ""
+    tipo_contrato: str = ""
+    contrato_inicio: str = ""
+    contrato_fin: str = ""
+    sede: str = ""
+    dependencia: str = ""
+    subdependencia: str = ""
+    acceso_nivel: str = "NORMAL"
+    acceso_redes_sociales: str = "NO"
+    permiso_inicio: str = ""
+    permiso_fin: str = ""
+    vpn_activo: str = "NO"
+    vpn_inicio: str = ""
+    vpn_fin: str = ""
+    permisos_activos: str = "SI"
+    status: str = "ACTIVE"
+
+
+def _csv_text(n):
+    buf = io.StringIO()
+    w = csv.DictWriter(buf, fieldnames=FIELDS)
+    w.writeheader()
+    w.writerows(generate_directory(n))
+    return buf.getvalue()
+
+
+def measure(cls, text):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    users = [cls(**row) for row in csv.DictReader(io.StringIO(text))]
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return used / len(users)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    text = _csv_text(args.rows)
+    before = measure(LegacyNetworkUser, text)
+    after = measure(NetworkUser, text)
+    print(f"rows={args.rows}")
+    print(f"dataclass      {before:8.0f} bytes/usuario")
+    print(f"NetworkUser    {after:8.0f} bytes/usuario ({after / before:.0%})")
+
+
+if __name__ == "__main__":
+    main()
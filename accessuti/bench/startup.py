@@ -0,0 +1,110 @@
+# Arranque en frío: cada medición corre en un proceso nuevo (import de la app
+# incluido) y separa el costo de los imports del de create_app(). Con --profile
+# muestra además los módulos más caros según `python -X importtime`.
+#
+#   python -m accessuti.bench.startup --sizes 0 100000 --runs 5 --profile
+#   python -m accessuti.bench.startup --sizes 0 --target 0.5   # sale con 1 si se pasa
+#
+# Tamaño 0 = los datos que vienen con el repo (accessuti/data).
+import argparse, json, os, re, shutil, subprocess, sys, tempfile
+
+from ..config import Config
+from ..storage.csv_store import CSVStore
+from .synthetic import generate_directory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from accessuti.app import create_app
+from accessuti.config import Config
+t1 = time.perf_counter()
+app = create_app(type("BenchConfig", (Config,), json.loads(sys.argv[1])))
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "total": t2 - t0}))
+"""
+
+
+def _python(*args):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env, check=True)
+
+
+def _child(config):
+    return _python("-c", _CHILD, json.dumps(config))
+
+
+def _data_dir(tmp, n):
+    data = os.path.join(tmp, "data")
+    if n:
+        os.makedirs(data)
+        CSVStore(os.path.join(data, "users.csv")).write_all(generate_directory(n))
+    else:
+        shutil.copytree(os.path.join(Config.BASE_DIR, "data"), data)
+    return data
+
+
+def run(n, snapshot, runs):
+    with tempfile.TemporaryDirectory() as tmp:
+        data = _data_dir(tmp, n)
+        config = {
+            "USERS_CSV": os.path.join(data, "users.csv"),
+            "AUDIT_CSV": os.path.join(data, "auditoria.csv"),
+            "SYSTEM_USERS_CSV": os.path.join(data, "usuarios_sistema.csv"),
+            "EXPIRY_LOCK": os.path.join(data, "expiry.lock"),
+            "SNAPSHOT_PATH": os.path.join(data, "users.snapshot") if snapshot else "",
+            "STORAGE_BACKEND": "csv",
+            "EXPIRY_SWEEPER": "off",
+        }
+        # primera corrida aparte: escribe el snapshot
+        _child(config)
+        samples = [json.loads(_child(config).stdout) for _ in range(runs)]
+
+    return {k: sorted(s[k] for s in samples)[len(samples) // 2] for k in samples[0]}
+
+
+def import_profile(top):
+    # (cumulativo µs, propio µs, módulo) de los imports más caros de la app
+    err = _python("-X", "importtime", "-c", "import accessuti.app").stderr
+    rows = []
+    for line in err.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if m:
+            rows.append((int(m.group(2)), int(m.group(1)), len(m.group(3)) // 2, m.group(4)))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[0, 100_000])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--profile", action="store_true", help="perfil de -X importtime")
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--target", type=float, default=None,
+                    help="segundos: sale con código 1 si algún arranque (mediana) lo supera")
+    args = ap.parse_args()
+
+    if args.profile:
+        print(f"{'acumulado ms':>13}{'propio ms':>11}  módulo")
+        for cum, own, depth, name in import_profile(args.top):
+            print(f"{cum / 1000:>13.1f}{own / 1000:>11.1f}  {'  ' * depth}{name}")
+        print()
+
+    cols = ["import", "create_app", "total"]
+    print(f"{'filas':>10}{'snapshot':>10}" + "".join(f"{c:>12}" for c in cols) + "   (s, mediana)")
+    over = False
+    for n in args.sizes:
+        for snapshot in (False, True):
+            res = run(n, snapshot, args.runs)
+            mark = ""
+            if args.target is not None and res["total"] > args.target:
+                over, mark = True, f"  > {args.target}s"
+            print(f"{n:>10,}{'sí' if snapshot else 'no':>10}" + "".join(f"{res[c]:>12.3f}" for c in cols) + mark)
+
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
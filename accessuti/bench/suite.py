@@ -0,0 +1,284 @@
+# Suite de benchmarks reproducible: genera un directorio sintético con
+# generate_directory (misma semilla -> mismos datos), lo carga en cada backend
+# y mide carga, consultas, contadores, cada camino de escritura y las rutas
+# HTTP (gráficos, fragmentos, API) a través del test client de Flask.
+#
+# El resultado es un JSON (mediana / p95 / mínimo por operación) que se puede
+# comparar con el de otro commit:
+#
+#   python -m accessuti.bench.suite --sizes 10000 100000 --out bench.json
+#   python -m accessuti.bench.suite --sizes 10000 --compare bench.json --threshold 1.25
+import argparse, json, os, platform, random, subprocess, sys, tempfile, time
+from datetime import date, datetime
+
+from ..app import create_app
+from ..config import Config
+from ..services.charts import chart_data, render_chart
+from ..services.user_service import UserService
+from ..storage.csv_store import CSVStore
+from ..storage.sqlite_store import SQLiteStore
+from .synthetic import generate_directory
+
+# las fechas se generan relativas a hoy, igual que las usan las rutas
+# (alertas a 15 días, revocaciones): misma semilla -> misma forma cualquier día
+TODAY = date.today()
+
+ROUTES = [
+    ("GET /app/", "/app/"),
+    ("GET /app/fragment/kpis", "/app/fragment/kpis"),
+    ("GET /app/fragment/alerts", "/app/fragment/alerts"),
+    ("GET /app/fragment/audit", "/app/fragment/audit"),
+    ("GET /app/fragment/filtered", "/app/fragment/filtered"),
+    ("GET /app/fragment/filtered?sede", "/app/fragment/filtered?sede={sede}"),
+    ("GET /app/fragment/filtered?nombre", "/app/fragment/filtered?nombre={nombre}"),
+    ("GET /app/fragment/search", "/app/fragment/search?q={key}"),
+    ("GET /app/chart/sede", "/app/chart/sede"),
+    ("GET /app/chart/contrato", "/app/chart/contrato"),
+    ("GET /app/chart/sede.json", "/app/chart/sede.json"),
+    ("GET /api/v1/users", "/api/v1/users?limit=100"),
+    ("GET /api/v1/users?sede", "/api/v1/users?limit=100&sede={sede}"),
+    ("GET /api/v1/users/<u>", "/api/v1/users/{key}"),
+    ("GET /api/v1/alerts", "/api/v1/alerts"),
+    ("GET /api/v1/counts", "/api/v1/counts"),
+]
+
+
+def _summary(samples):
+    s = sorted(samples)
+    return {
+        "median": s[len(s) // 2],
+        "p95": s[min(len(s) - 1, int(len(s) * 0.95))],
+        "min": s[0],
+        "n": len(s),
+    }
+
+
+class Timer:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = {}
+
+    def measure(self, name, fn, repeat=None):
+        # fn(i) recibe el número de iteración (para rotar claves o alternar acciones)
+        samples = []
+        for i in range(repeat or self.repeat):
+            t0 = time.perf_counter()
+            fn(i)
+            samples.append(time.perf_counter() - t0)
+        self.results[name] = _summary(samples)
+
+
+def _bench_config(tmpdir, backend, response_cache):
+    data = os.path.join(tmpdir, "data")
+
+    class BenchConfig(Config):
+        TESTING = True
+        STORAGE_BACKEND = backend
+        USERS_CSV = os.path.join(data, "users.csv")
+        USERS_DB = os.path.join(data, "users.db")
+        AUDIT_CSV = os.path.join(data, "auditoria.csv")
+        SYSTEM_USERS_CSV = os.path.join(data, "usuarios_sistema.csv")
+        EXPIRY_LOCK = os.path.join(data, "expiry.lock")
+        SNAPSHOT_PATH = os.path.join(data, "users.snapshot")
+        EXPIRY_SWEEPER = "off"
+        # por defecto se mide el trabajo de cada ruta, no la caché de respuestas
+        RESPONSE_CACHE_ENTRIES = 512 if response_cache else 0
+
+    return BenchConfig
+
+
+def _make_store(cfg):
+    if cfg.STORAGE_BACKEND == "sqlite":
+        return SQLiteStore(cfg.USERS_DB)
+    return CSVStore(cfg.USERS_CSV)
+
+
+def run(n, backend, args):
+    rows = generate_directory(n, seed=args.seed, today=TODAY)
+    rnd = random.Random(args.seed)
+    keys = [r["usuario_red"] for r in rnd.sample(rows, min(1000, n))]
+    sede = next(r["sede"] for r in rows if r["sede"] != "Sede Central")
+    nombre = rows[0]["apellidos"].split()[0][:4]
+    t = Timer(args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cfg = _bench_config(tmp, backend, args.response_cache)
+        store = _make_store(cfg)
+        store.write_all(rows)
+
+        # ---------------- carga ----------------
+        t.measure("load", lambda i: UserService(_make_store(cfg)), repeat=args.load_repeat)
+        UserService(_make_store(cfg), snapshot_path=cfg.SNAPSHOT_PATH)
+        t.measure("load(snapshot)", lambda i: UserService(_make_store(cfg), snapshot_path=cfg.SNAPSHOT_PATH),
+                  repeat=args.load_repeat)
+
+        app = create_app(cfg)
+        svc = app.extensions["user_service"]
+        key = lambda i: keys[i % len(keys)]
+
+        # ---------------- consultas ----------------
+        t.measure("get_network_user", lambda i: svc.get_network_user(key(i)))
+        t.measure("filter_users", lambda i: svc.filter_users())
+        t.measure("filter_users(sede)", lambda i: svc.filter_users(sede=sede))
+        t.measure("filter_users(nombre)", lambda i: svc.filter_users(nombre=nombre))
+        t.measure("page_users", lambda i: svc.page_users(limit=100))
+        t.measure("page_users(sede)", lambda i: svc.page_users(limit=100, sede=sede))
+        t.measure("count_users(sede)", lambda i: svc.count_users(sede=sede))
+        t.measure("suggest_users", lambda i: svc.suggest_users(nombre))
+        t.measure("expiring_alerts", lambda i: svc.expiring_alerts(15))
+        t.measure("total_network_users", lambda i: svc.total_network_users())
+        t.measure("count_by_sede", lambda i: svc.count_by_sede())
+        t.measure("count_by_contrato", lambda i: svc.count_by_contrato())
+        t.measure("count_by_status", lambda i: svc.count_by_status())
+        t.measure("count_by_acceso_nivel", lambda i: svc.count_by_acceso_nivel())
+        t.measure("chart_render(sede)", lambda i: render_chart("sede", chart_data(svc, "sede")),
+                  repeat=min(args.repeat, 5))
+
+        # ---------------- rutas HTTP ----------------
+        client = app.test_client()
+        client.post("/app/login", data={"username": "admin", "password": "admin123"})
+        for name, url in ROUTES:
+            url = url.format(sede=sede, nombre=nombre, key=keys[0])
+            t.measure(name, lambda i, url=url: _get(client, url))
+
+        # ---------------- escrituras ----------------
+        by_key = {r["usuario_red"]: r for r in rows}
+
+        def register(i):
+            row = dict(by_key[key(i)], acceso_nivel="COMUN" if i % 2 else "NORMAL")
+            svc.register_network_user(row, actor="bench")
+
+        def toggle(i):
+            if i % 2:
+                svc.activate_user(key(i // 2), actor="bench")
+            else:
+                svc.deactivate_user(key(i // 2), actor="bench")
+
+        def bulk(i):
+            action = svc.activate_users if i % 2 else svc.deactivate_users
+            action(sede=sede, actor="bench")
+
+        batch = [by_key[k] for k in keys]
+
+        def import_rows(i):
+            nivel = "COMUN" if i % 2 else "NORMAL"
+            svc.import_rows(((j, dict(r, acceso_nivel=nivel)) for j, r in enumerate(batch, 2)), actor="bench")
+
+        t.measure("register_network_user", register)
+        t.measure("deactivate/activate_user", toggle)
+        t.measure("deactivate_special_permissions", lambda i: svc.deactivate_special_permissions(key(i), actor="bench"))
+        t.measure("bulk deactivate/activate(sede)", bulk)
+        t.measure(f"import_rows({len(batch)})", import_rows)
+        t.measure("POST /app/user/deactivate",
+                  lambda i: client.post("/app/user/deactivate", data={"usuario_red": key(i)}))
+        # la primera pasada revoca todo lo vencido; las siguientes no encuentran nada
+        t.measure("revoke_expired", lambda i: svc.revoke_expired(today=TODAY, actor="bench"), repeat=1)
+        t.measure("revoke_expired(idle)", lambda i: svc.revoke_expired(today=TODAY, actor="bench"))
+        t.measure("refresh(idle)", lambda i: svc.refresh())
+
+        svc.audit.flush()
+
+    return t.results
+
+
+def _get(client, url):
+    resp = client.get(url)
+    if resp.status_code != 200:
+        raise RuntimeError(f"{url}: HTTP {resp.status_code}")
+    return resp
+
+
+def _meta(args):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "response_cache": args.response_cache,
+    }
+
+
+def _ms(sec):
+    return f"{sec * 1000:>10.3f}"
+
+
+def print_results(results):
+    for run_ in results:
+        print(f"\n== {run_['backend']} · {run_['rows']:,} filas ==")
+        print(f"{'operación':<40}{'mediana ms':>11}{'p95 ms':>11}{'min ms':>11}")
+        for op, r in run_["ops"].items():
+            print(f"{op:<40}{_ms(r['median']):>11}{_ms(r['p95']):>11}{_ms(r['min']):>11}")
+
+
+# compara medianas contra un JSON anterior; devuelve las operaciones que
+# empeoraron más que `threshold` (actual / anterior). Las que tardan menos de
+# `min_seconds` se muestran pero no cuentan: a esa escala domina el ruido
+def compare(results, previous, threshold, min_seconds=0.0):
+    prev = {(r["backend"], r["rows"]): r["ops"] for r in previous["results"]}
+    regressions = []
+    print(f"\n== comparación con {previous['meta'].get('commit') or '?'} "
+          f"({previous['meta'].get('date', '')}) ==")
+    print(f"{'backend':<8}{'filas':>10}  {'operación':<40}{'antes ms':>11}{'ahora ms':>11}{'ratio':>8}")
+    for run_ in results:
+        old_ops = prev.get((run_["backend"], run_["rows"]))
+        if not old_ops:
+            continue
+        for op, r in run_["ops"].items():
+            if op not in old_ops:
+                continue
+            before, now = old_ops[op]["median"], r["median"]
+            ratio = now / before if before else float("inf")
+            worse = ratio > threshold and max(before, now) >= min_seconds
+            mark = "  <-" if worse else ""
+            print(f"{run_['backend']:<8}{run_['rows']:>10,}  {op:<40}{_ms(before):>11}{_ms(now):>11}{ratio:>8.2f}{mark}")
+            if worse:
+                regressions.append((run_["backend"], run_["rows"], op, ratio))
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--backends", nargs="+", choices=["csv", "sqlite"], default=["csv", "sqlite"])
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--load-repeat", type=int, default=3)
+    ap.add_argument("--response-cache", action="store_true",
+                    help="medir las rutas con la caché de respuestas encendida")
+    ap.add_argument("--out", help="escribir los resultados en este JSON")
+    ap.add_argument("--compare", help="JSON de una corrida anterior")
+    ap.add_argument("--threshold", type=float, default=1.25,
+                    help="con --compare: sale con código 1 si alguna mediana empeora más que esto")
+    ap.add_argument("--min-ms", type=float, default=0.1,
+                    help="con --compare: ignorar operaciones más rápidas que esto")
+    args = ap.parse_args()
+
+    results = []
+    for backend in args.backends:
+        for n in args.sizes:
+            results.append({"backend": backend, "rows": n, "ops": run(n, backend, args)})
+
+    print_results(results)
+    doc = {"meta": _meta(args), "results": results}
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=1)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        if compare(results, previous, args.threshold, args.min_ms / 1000):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import json, os, random
+from datetime import date, timedelta
+
+from ..ds.name_index import normalize
+from ..storage.csv_store import FIELDS
+
+CONTRATOS = ["CAS", "CAP", "TERCERO"]
+NOMBRES = ["Juan", "María", "José", "Rosa", "Luis", "Ana", "Carlos", "Lucía", "Manuel", "Sofía"]
+APELLIDOS = ["Rojas", "Pérez", "Gonzales", "Quispe", "Mamani", "Flores", "Vivanco", "Núñez"]
+
+
+ORG_JSON = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static", "data", "org.json")
+
+NOMBRES_MAS = NOMBRES + [
+    "Pedro", "Carmen", "Jorge", "Elena", "Miguel", "Patricia", "Víctor", "Julia",
+    "Raúl", "Gladys", "César", "Teresa", "Hugo", "Liliana", "Walter", "Yesenia",
+]
+APELLIDOS_MAS = APELLIDOS + [
+    "Huamán", "Chávez", "Ramírez", "Torres", "Vargas", "Castillo", "Mendoza", "Díaz",
+    "Cárdenas", "Zaravia", "Ccama", "Ticona", "Huanca", "Espinoza", "Salazar", "Aguilar",
+]
+
+
+def _org():
+    # sede -> [(dependencia, subdependencia)] según static/data/org.json
+    with open(ORG_JSON, encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        sede: [(dep, "" if sub == "—" else sub) for dep, subs in deps.items() for sub in subs]
+        for sede, deps in data.items()
+    }
+
+
+# Directorio sintético con forma realista para los benchmarks: sedes y
+# dependencias de org.json (Sede Central concentra ~40%), nombres compuestos
+# con tildes, usuario_red tipo "jrojasq", contratos con inicio y fin, ~20% con
+# ventana de VPN y ~15% con permisos especiales, ~8% inactivos.
+# Mismo (n, seed, today) -> mismas filas.
+def generate_directory(n, seed=0, today=None):
+    rnd = random.Random(seed)
+    today = today or date.today()
+    org = _org()
+    sedes = sorted(org)
+    weights = [40 if s == "Sede Central" else 60 / (len(sedes) - 1) for s in sedes]
+
+    used = {}
+    rows = []
+    for _ in range(n):
+        nombres = " ".join(rnd.sample(NOMBRES_MAS, rnd.choice((1, 2))))
+        ap1, ap2 = rnd.choice(APELLIDOS_MAS), rnd.choice(APELLIDOS_MAS)
+        base = normalize(f"{nombres[0]}{ap1}{ap2[0]}").replace(" ", "")
+        used[base] = used.get(base, 0) + 1
+        usuario_red = base if used[base] == 1 else f"{base}{used[base]}"
+
+        sede = rnd.choices(sedes, weights)[0]
+        dep, sub = rnd.choice(org[sede])
+        inicio = today - timedelta(days=rnd.randint(0, 3 * 365))
+        fin = today + timedelta(days=rnd.randint(-60, 365))
+
+        row = {k: "" for k in FIELDS}
+        row.update({
+            "usuario_red": usuario_red,
+            "nombres": nombres,
+            "apellidos": f"{ap1} {ap2}",
+            "dni": f"{rnd.randint(10000000, 99999999)}",
+            "tipo_contrato": rnd.choices(CONTRATOS, (60, 25, 15))[0],
+            "contrato_inicio": inicio.isoformat(),
+            "contrato_fin": fin.isoformat(),
+            "sede": sede,
+            "dependencia": dep,
+            "subdependencia": sub,
+            "acceso_nivel": rnd.choices(("NORMAL", "COMUN", "LIBRE"), (80, 15, 5))[0],
+            "acceso_redes_sociales": "NO",
+            "vpn_activo": "NO",
+            "permisos_activos": "NO",
+            "status": "INACTIVE" if rnd.random() < 0.08 else "ACTIVE",
+        })
+        if rnd.random() < 0.20:
+            v_ini = today - timedelta(days=rnd.randint(0, 180))
+            row.update(vpn_activo="SI", vpn_inicio=v_ini.isoformat(),
+                       vpn_fin=(v_ini + timedelta(days=rnd.randint(7, 240))).isoformat())
+        if rnd.random() < 0.15:
+            p_ini = today - timedelta(days=rnd.randint(0, 120))
+            row.update(permisos_activos="SI", acceso_redes_sociales=rnd.choice(("SI", "NO")),
+                       permiso_inicio=p_ini.isoformat(),
+                       permiso_fin=(p_ini + timedelta(days=rnd.randint(7, 180))).isoformat())
+        rows.append(row)
+    return rows
@@ -0,0 +1,124 @@
+import os, time
+from datetime import date
+
+import click
+
+from .services.bulk_import import iter_import_file
+from .services.user_service import BULK_ACTIONS
+from .storage.migrate import migrate
+from .storage.sqlite_store import SQLiteStore
+
+
+def register_cli(app):
+
+    @app.cli.command("migrate-sqlite")
+    @click.option("--db", default=None, help="Ruta del archivo SQLite (por defecto USERS_DB).")
+    def migrate_sqlite(db):
+        """Importa data/users.csv y data/usuarios_red.csv a SQLite."""
+        db = db or app.config["USERS_DB"]
+        data_dir = os.path.dirname(app.config["USERS_CSV"])
+
+        n = migrate(
+            SQLiteStore(db),
+            app.config["USERS_CSV"],
+            os.path.join(data_dir, "usuarios_red.csv"),
+        )
+        click.echo(f"{n} usuarios importados en {db}")
+
+    @app.cli.command("check-aggregates")
+    def check_aggregates():
+        """Compara los contadores del dashboard con un recálculo completo."""
+        diffs = app.extensions["user_service"].check_aggregates()
+        if not diffs:
+            click.echo("Contadores consistentes.")
+            return
+        for dim, bad in diffs.items():
+            for key, (kept, real) in sorted(bad.items()):
+                click.echo(f"{dim}[{key}]: mantenido={kept} real={real}")
+        raise SystemExit(1)
+
+    @app.cli.command("import-users")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--actor", default="cli", help="Usuario que queda en la auditoría.")
+    @click.option("--max-errors", default=20, help="Errores a mostrar.")
+    def import_users(path, actor, max_errors):
+        """Importa usuarios de red desde un .csv o .xlsx en un solo lote."""
+        svc = app.extensions["user_service"]
+
+        t0 = time.perf_counter()
+        try:
+            res = svc.import_rows(iter_import_file(path), actor=actor)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        elapsed = time.perf_counter() - t0
+        svc.audit.flush()
+
+        click.echo(
+            f"{res['importados']}/{res['total']} filas importadas en {elapsed:.2f}s "
+            f"({res['total'] / elapsed if elapsed else 0:,.0f} filas/s), "
+            f"{len(res['errores'])} con errores"
+        )
+        for e in res["errores"][:max_errors]:
+            click.echo(f"  línea {e['linea']} [{e['usuario_red'] or '-'}]: {e['error']}")
+
+    @app.cli.command("bulk-action")
+    @click.argument("accion", type=click.Choice(sorted(BULK_ACTIONS)))
+    @click.argument("usuarios", nargs=-1)
+    @click.option("--filtro", "-f", multiple=True, help="campo=valor, p. ej. sede=... o contrato_fin_lt=2026-01-01.")
+    @click.option("--vencidos", is_flag=True, help="Solo usuarios con contrato_fin anterior a hoy.")
+    @click.option("--dry-run", is_flag=True, help="Solo muestra a quiénes afectaría.")
+    @click.option("--actor", default="cli", help="Usuario que queda en la auditoría.")
+    def bulk_action(accion, usuarios, filtro, vencidos, dry_run, actor):
+        """Desactiva / reactiva / apaga permisos de varios usuarios en un solo lote."""
+        svc = app.extensions["user_service"]
+
+        filters = {}
+        for f in filtro:
+            k, sep, v = f.partition("=")
+            if not sep:
+                raise click.BadParameter(f"Se esperaba campo=valor: {f}", param_hint="--filtro")
+            filters[k.strip()] = v.strip()
+        if vencidos:
+            filters["contrato_fin_lt"] = date.today().isoformat()
+
+        try:
+            if dry_run:
+                keys = svc.select_users(list(usuarios) or None, **filters)
+                click.echo(f"{len(keys)} usuarios seleccionados: {', '.join(keys[:50])}")
+                return
+            res = getattr(svc, BULK_ACTIONS[accion])(list(usuarios) or None, actor=actor, **filters)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        svc.audit.flush()
+
+        click.echo(f"{len(res['actualizados'])} actualizados de {res['seleccionados']} seleccionados.")
+        if res["no_existen"]:
+            click.echo(f"No existen: {', '.join(res['no_existen'])}")
+
+    @app.cli.command("expiry-sweeper")
+    @click.option("--once", is_flag=True, help="Un solo barrido y termina.")
+    def expiry_sweeper(once):
+        """Revoca VPN / permisos vencidos (worker en primer plano)."""
+        sweeper = app.extensions["expiry_sweeper"]
+        if once:
+            res = sweeper.sweep()
+            sweeper.svc.audit.flush()
+            for tipo, (n, _) in res.items():
+                click.echo(f"{tipo}: {n} revocados")
+            return
+        click.echo("Worker de vencimientos en ejecución (Ctrl+C para salir).")
+        sweeper.serve()
+
+    @app.cli.command("snapshot")
+    def snapshot():
+        """Regenera el snapshot binario del directorio (p. ej. antes de un deploy)."""
+        svc = app.extensions["user_service"]
+        if not svc.snapshot_path:
+            raise click.ClickException("SNAPSHOT_PATH está vacío: snapshot desactivado.")
+
+        t0 = time.perf_counter()
+        svc.refresh()
+        svc.save_snapshot(force=True)
+        elapsed = time.perf_counter() - t0
+        size = os.path.getsize(svc.snapshot_path)
+        click.echo(f"{svc.total_network_users()} usuarios -> {svc.snapshot_path} ({size / 1e6:.1f} MB) en {elapsed:.2f}s")
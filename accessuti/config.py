@@ -3,4 +3,42 @@ import os
 class Config:
     SECRET_KEY = "supersecretkey"
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    USERS_CSV = os.path.join(BASE_DIR, "data", "users.csv")
\ No newline at end of file
+    USERS_CSV = os.path.join(BASE_DIR, "data", "users.csv")
+
+    # "csv" | "sqlite"
+    STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "csv")
+    USERS_DB = os.path.join(BASE_DIR, "data", "users.db")
+
+    # cada cuántos segundos un worker revisa si otro proceso cambió el store
+    STORE_REFRESH_INTERVAL = float(os.environ.get("STORE_REFRESH_INTERVAL", "1.0"))
+
+    # snapshot binario del directorio ya indexado: arranque sin reparsear el
+    # CSV; se regenera solo cuando el store cambia. Vacío lo desactiva
+    SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", os.path.join(BASE_DIR, "data", "users.snapshot"))
+
+    AUDIT_CSV = os.path.join(BASE_DIR, "data", "auditoria.csv")
+    # segundos entre escrituras (con fsync) del buffer de auditoría
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", "1.0"))
+
+    # revocación automática de VPN / permisos vencidos:
+    # "thread" = hilo dentro de la app, "off" = no (usar `flask expiry-sweeper`)
+    EXPIRY_SWEEPER = os.environ.get("EXPIRY_SWEEPER", "thread")
+    EXPIRY_LOCK = os.path.join(BASE_DIR, "data", "expiry.lock")
+
+    # token opcional para /api/v1 (Authorization: Bearer ...); sin él solo sesión
+    API_TOKEN = os.environ.get("API_TOKEN", "")
+
+    # caché de respuestas GET (entradas, bytes, segundos); 0 entradas la apaga
+    RESPONSE_CACHE_ENTRIES = int(os.environ.get("RESPONSE_CACHE_ENTRIES", "512"))
+    RESPONSE_CACHE_BYTES = int(os.environ.get("RESPONSE_CACHE_BYTES", str(32 * 1024 * 1024)))
+    RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "300"))
+
+    # cuentas del sistema (hash precalculado) y costo para hashes nuevos;
+    # p. ej. "scrypt:16384:8:1" o "pbkdf2:sha256:600000"
+    SYSTEM_USERS_CSV = os.path.join(BASE_DIR, "data", "usuarios_sistema.csv")
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    # segundos que un login correcto se verifica sin recalcular el hash
+    LOGIN_CACHE_TTL = float(os.environ.get("LOGIN_CACHE_TTL", "900"))
+    # fallos seguidos por cuenta antes de bloquearla LOGIN_LOCKOUT segundos
+    LOGIN_MAX_FAILURES = int(os.environ.get("LOGIN_MAX_FAILURES", "5"))
+    LOGIN_LOCKOUT = float(os.environ.get("LOGIN_LOCKOUT", "60"))
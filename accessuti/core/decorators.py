@@ -1,5 +1,6 @@
+import hmac
 from functools import wraps
-from flask import redirect, url_for, flash
+from flask import redirect, url_for, flash, request, jsonify, current_app
 from .auth import current_user
 
 def login_required(fn):
@@ -21,4 +22,16 @@ def role_required(role):
                 return redirect(url_for("users.dashboard"))
             return fn(*args, **kwargs)
         return wrapper
-    return deco
\ No newline at end of file
+    return deco
+def api_auth_required(fn):
+    # API JSON: sesión del dashboard o "Authorization: Bearer <API_TOKEN>"
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get("API_TOKEN")
+        header = request.headers.get("Authorization", "")
+        if token and header.startswith("Bearer ") and hmac.compare_digest(header[7:].strip(), token):
+            return fn(*args, **kwargs)
+        if current_user():
+            return fn(*args, **kwargs)
+        return jsonify({"error": "No autenticado."}), 401
+    return wrapper
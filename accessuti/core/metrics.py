@@ -0,0 +1,174 @@
+import threading, time
+from bisect import bisect_left
+from functools import wraps
+
+# Registro de métricas en memoria con salida en formato de texto de Prometheus.
+# Contadores e histogramas se actualizan en el camino caliente (un lock y unas
+# sumas); los valores que ya existen en otros objetos (cachés, login, tamaño
+# de índices) se leen con callbacks solo cuando se pide /metrics.
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _fmt_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def _fmt_value(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, n=1, **labels):
+        key = tuple(labels.get(l, "") for l in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + n
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, v in items:
+            yield self.name, _fmt_labels(self.labels, key), v
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}        # labels -> [conteo por bucket..., +Inf, suma]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(l, "") for l in self.labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            v = self._values.get(key)
+            if v is None:
+                v = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            v[i] += 1
+            v[-1] += value
+
+    def time(self, **labels):
+        # decorador: mide la duración de cada llamada
+        def deco(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - t0, **labels)
+            return wrapper
+        return deco
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for key, v in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), v[:-1]):
+                cumulative += n
+                yield self.name + "_bucket", _fmt_labels(self.labels, key, [("le", _fmt_value(bound))]), cumulative
+            yield self.name + "_sum", _fmt_labels(self.labels, key), v[-1]
+            yield self.name + "_count", _fmt_labels(self.labels, key), cumulative
+
+
+class Gauge:
+    # valor calculado al momento de exportar: fn() -> número o [(labels, valor)]
+    kind = "gauge"
+
+    def __init__(self, name, help, fn, labels=()):
+        self.name, self.help, self.labels, self.fn = name, help, tuple(labels), fn
+
+    def samples(self):
+        value = self.fn()
+        if not isinstance(value, (list, tuple)):
+            value = [((), value)]
+        for key, v in value:
+            yield self.name, _fmt_labels(self.labels, key), v
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            # registrar dos veces el mismo nombre (p. ej. varias create_app en
+            # tests) reemplaza al anterior
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, fn, labels=()):
+        return self._add(Gauge(name, help, fn, labels))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            try:
+                samples = list(m.samples())
+            except Exception:
+                continue
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ---------------- MÉTRICAS DEL CAMINO CALIENTE ----------------
+
+HTTP_SECONDS = REGISTRY.histogram(
+    "accessuti_http_request_duration_seconds",
+    "Duración de las peticiones HTTP por ruta.",
+    labels=("endpoint", "method", "status"),
+)
+STORE_SECONDS = REGISTRY.histogram(
+    "accessuti_store_operation_seconds",
+    "Duración de las operaciones del store de usuarios de red.",
+    labels=("backend", "op"),
+)
+STORE_ROWS = REGISTRY.counter(
+    "accessuti_store_rows_total",
+    "Filas leídas o escritas por el store.",
+    labels=("backend", "op"),
+)
+SERVICE_SECONDS = REGISTRY.histogram(
+    "accessuti_service_operation_seconds",
+    "Duración de operaciones de UserService (consultas y reconstrucción de índices).",
+    labels=("op",),
+)
+SERVICE_ROWS = REGISTRY.counter(
+    "accessuti_service_rows_scanned_total",
+    "Usuarios candidatos examinados por operación de UserService.",
+    labels=("op",),
+)
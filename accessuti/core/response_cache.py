@@ -0,0 +1,47 @@
+from functools import wraps
+from flask import current_app, request, session, Response
+from .auth import current_user
+
+
+# Caché de respuestas GET por ruta + argumentos + versión de datos.
+#
+# La versión sale de UserService.version (sube con cada mutación), así que
+# no hace falta invalidar a mano: tras una escritura las claves viejas dejan
+# de pedirse y el LRU las expulsa. `extra` agrega lo que no cubre la versión
+# (p. ej. la fecha para "faltan N días"). per_user=True para páginas que
+# muestran el nombre del usuario (base.html); si no, basta con el rol.
+def cached_response(extra=None, per_user=False):
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get("response_cache")
+            # los mensajes flash se consumen al renderizar: con flashes
+            # pendientes no se lee ni se guarda en caché
+            if cache is None or request.method != "GET" or session.get("_flashes"):
+                return fn(*args, **kwargs)
+
+            svc = current_app.extensions["user_service"]
+            u = current_user() or {}
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                svc.version,
+                u.get("username") if per_user else None,
+                u.get("role"),
+                extra() if extra else None,
+            )
+
+            hit = cache.get(key)
+            if hit is not None:
+                body, status, headers = hit
+                resp = Response(body, status=status, headers=headers)
+                return resp.make_conditional(request)
+
+            resp = current_app.make_response(fn(*args, **kwargs))
+            if resp.status_code == 200 and not resp.is_streamed:
+                body = resp.get_data()
+                cache.set(key, (body, resp.status_code, list(resp.headers.items())), size=len(body))
+            return resp
+        return wrapper
+    return deco
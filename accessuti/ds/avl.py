@@ -0,0 +1,197 @@
+class AVLNode:
+    __slots__ = ("key", "data", "left", "right", "height")
+
+    def __init__(self, key, data):
+        self.key = key
+        self.data = data
+        self.left = None
+        self.right = None
+        self.height = 1
+
+
+def _h(n):
+    return n.height if n else 0
+
+
+def _update(n):
+    n.height = 1 + max(_h(n.left), _h(n.right))
+
+
+def _rotate_right(y):
+    x = y.left
+    y.left = x.right
+    x.right = y
+    _update(y)
+    _update(x)
+    return x
+
+
+def _rotate_left(x):
+    y = x.right
+    x.right = y.left
+    y.left = x
+    _update(x)
+    _update(y)
+    return y
+
+
+def _rebalance(n):
+    _update(n)
+    balance = _h(n.left) - _h(n.right)
+
+    if balance > 1:
+        if _h(n.left.left) < _h(n.left.right):
+            n.left = _rotate_left(n.left)
+        return _rotate_right(n)
+
+    if balance < -1:
+        if _h(n.right.right) < _h(n.right.left):
+            n.right = _rotate_right(n.right)
+        return _rotate_left(n)
+
+    return n
+
+
+def _build(pairs, lo, hi):
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    n = AVLNode(*pairs[mid])
+    n.left = _build(pairs, lo, mid)
+    n.right = _build(pairs, mid + 1, hi)
+    _update(n)
+    return n
+
+
+# Árbol AVL: misma API que bench.bst.BST (insert/search + last_comparisons)
+# con altura garantizada O(log n), delete, recorridos por rango y por prefijo.
+class AVLTree:
+    def __init__(self):
+        self.root = None
+        self.size = 0
+        self.last_comparisons = 0
+
+    def __len__(self):
+        return self.size
+
+    # ================= CARGA MASIVA =================
+
+    @classmethod
+    def from_sorted(cls, pairs):
+        # construye un árbol perfectamente balanceado en O(n) a partir de
+        # pares (key, data) ya ordenados y sin claves repetidas
+        tree = cls()
+        pairs = list(pairs)
+        tree.root = _build(pairs, 0, len(pairs))
+        tree.size = len(pairs)
+        return tree
+
+    def height(self):
+        return _h(self.root)
+
+    # ================= INSERT =================
+
+    def insert(self, key, data):
+        self.last_comparisons = 0
+        self.root = self._insert(self.root, key, data)
+
+    def _insert(self, n, key, data):
+        if not n:
+            self.size += 1
+            return AVLNode(key, data)
+
+        self.last_comparisons += 1
+        if key < n.key:
+            n.left = self._insert(n.left, key, data)
+        elif key > n.key:
+            n.right = self._insert(n.right, key, data)
+        else:
+            n.data = data
+            return n
+        return _rebalance(n)
+
+    # ================= SEARCH =================
+
+    def search(self, key):
+        self.last_comparisons = 0
+        cur = self.root
+        while cur:
+            self.last_comparisons += 1
+            if key < cur.key:
+                cur = cur.left
+            elif key > cur.key:
+                cur = cur.right
+            else:
+                return cur.data
+        return None
+
+    # ================= DELETE =================
+
+    def delete(self, key):
+        self.last_comparisons = 0
+        before = self.size
+        self.root = self._delete(self.root, key)
+        return self.size < before
+
+    def _delete(self, n, key):
+        if not n:
+            return None
+
+        self.last_comparisons += 1
+        if key < n.key:
+            n.left = self._delete(n.left, key)
+        elif key > n.key:
+            n.right = self._delete(n.right, key)
+        else:
+            if not n.left or not n.right:
+                self.size -= 1
+                return n.left or n.right
+
+            # reemplazar por el sucesor en orden
+            succ = n.right
+            while succ.left:
+                succ = succ.left
+            n.key, n.data = succ.key, succ.data
+            n.right = self._delete_min(n.right)
+            self.size -= 1
+        return _rebalance(n)
+
+    def _delete_min(self, n):
+        if not n.left:
+            return n.right
+        n.left = self._delete_min(n.left)
+        return _rebalance(n)
+
+    # ================= RECORRIDOS =================
+
+    def items(self, lo=None, hi=None):
+        # pares (key, data) en orden con lo <= key < hi. No toca
+        # last_comparisons: es la métrica de la última búsqueda puntual
+        stack = []
+        cur = self.root
+        while stack or cur:
+            while cur:
+                if lo is not None and cur.key < lo:
+                    cur = cur.right
+                else:
+                    stack.append(cur)
+                    cur = cur.left
+            if not stack:
+                return
+            n = stack.pop()
+            if hi is not None and n.key >= hi:
+                return
+            yield n.key, n.data
+            cur = n.right
+
+    def range(self, lo=None, hi=None):
+        return [data for _, data in self.items(lo, hi)]
+
+    def prefix(self, prefix):
+        if not prefix:
+            return self.range()
+        # todas las claves con el prefijo caen en [prefix, prefix + U+10FFFF)
+        return self.range(prefix, prefix + "\U0010ffff")
+
+    def values(self):
+        return [data for _, data in self.items()]
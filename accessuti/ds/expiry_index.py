@@ -0,0 +1,39 @@
+from bisect import bisect_right, insort
+
+
+# Índice de vencimientos: pares (ordinal de fecha, key) en un arreglo ordenado.
+# "Todo lo que vence hasta X" es un corte por bisect que ya sale ordenado.
+class ExpiryIndex:
+    def __init__(self):
+        self._entries = []
+        self._at = {}            # key -> ordinal
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def build(cls, pairs):
+        # pairs: iterable de (key, ordinal); ordena una sola vez
+        idx = cls()
+        idx._at = dict(pairs)
+        idx._entries = sorted((d, k) for k, d in idx._at.items())
+        return idx
+
+    def add(self, key, ordinal):
+        self.remove(key)
+        self._at[key] = ordinal
+        insort(self._entries, (ordinal, key))
+
+    def remove(self, key):
+        ordinal = self._at.pop(key, None)
+        if ordinal is None:
+            return
+        pos = bisect_right(self._entries, (ordinal, key)) - 1
+        del self._entries[pos]
+
+    def upto(self, ordinal):
+        # entradas con fecha <= ordinal, de la más próxima a la más lejana
+        return self._entries[:bisect_right(self._entries, (ordinal, "\U0010ffff"))]
+
+    def first(self):
+        return self._entries[0] if self._entries else None
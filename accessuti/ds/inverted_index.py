@@ -0,0 +1,43 @@
+_EMPTY = frozenset()
+
+
+# Índice invertido: valor de una columna -> conjunto de claves (posting set).
+class InvertedIndex:
+    def __init__(self):
+        self._postings = {}
+
+    def add(self, value, key):
+        s = self._postings.get(value)
+        if s is None:
+            s = self._postings[value] = set()
+        s.add(key)
+
+    def remove(self, value, key):
+        s = self._postings.get(value)
+        if s is None:
+            return
+        s.discard(key)
+        if not s:
+            del self._postings[value]
+
+    def get(self, value):
+        return self._postings.get(value, _EMPTY)
+
+    def values(self):
+        return list(self._postings.keys())
+
+    def __len__(self):
+        return len(self._postings)
+
+
+# intersección de posting sets empezando por el más pequeño
+def intersect(sets):
+    if not sets:
+        return set()
+    sets = sorted(sets, key=len)
+    out = set(sets[0])
+    for s in sets[1:]:
+        if not out:
+            break
+        out &= s
+    return out
@@ -1,9 +0,0 @@
-class LinkedList:
-    def __init__(self):
-        self._data = []
-
-    def append(self, value):
-        self._data.append(value)
-
-    def to_list(self):
-        return list(self._data)
\ No newline at end of file
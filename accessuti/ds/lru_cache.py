@@ -0,0 +1,72 @@
+import threading, time
+from collections import OrderedDict
+
+
+# LRU con límite de entradas, de bytes y TTL. Cada entrada guarda su tamaño
+# (lo indica quien la agrega); al pasar algún límite se expulsan las menos
+# usadas recientemente. Seguro entre hilos.
+class LRUCache:
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024, ttl=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()     # key -> (expira, tamaño, valor)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expired = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] <= self._clock():
+                self._drop(key)
+                self.expired += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, size=1):
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (self._clock() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _drop(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+        }
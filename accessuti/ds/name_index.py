@@ -0,0 +1,157 @@
+import heapq
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+_MAX_WORD = 255
+
+
+def normalize(s):
+    # minúsculas, sin tildes y con espacios colapsados: "José  Núñez" -> "jose nunez"
+    s = s or ""
+    if not s.isascii():
+        s = unicodedata.normalize("NFKD", s)
+        s = "".join(c for c in s if not unicodedata.combining(c))
+    return " ".join(s.lower().split())
+
+
+# Índice de búsqueda por subcadena sobre nombres y usuario_red.
+#
+# Los nombres se repiten mucho, así que se indexan palabras distintas y no
+# usuarios: cada palabra normalizada tiene su conjunto de claves, y un arreglo
+# de sufijos ordenado (array de enteros palabra<<8 | offset) permite encontrar
+# con bisect todas las palabras que contienen un texto, sin recorrer usuarios.
+class NameIndex:
+    def __init__(self):
+        self._docs = {}          # key -> (nombre normalizado, usuario normalizado)
+        self._word_ids = {}      # palabra -> id
+        self._words = []         # id -> palabra (None si quedó libre)
+        self._free = []
+        self._postings = []      # id -> set(keys)
+        self._suffixes = array("q")
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _suffix(self, e):
+        return self._words[e >> 8][e & 0xFF:]
+
+    # ================= CARGA =================
+
+    @classmethod
+    def build(cls, docs):
+        # docs: iterable de (key, nombre, usuario); ordena los sufijos una sola vez
+        idx = cls()
+        for key, name, username in docs:
+            idx._add_doc(key, name, username, sort_suffixes=False)
+        entries = [
+            (wid << 8) | off
+            for wid, w in enumerate(idx._words)
+            for off in range(min(len(w), _MAX_WORD))
+        ]
+        entries.sort(key=idx._suffix)
+        idx._suffixes = array("q", entries)
+        return idx
+
+    # ================= MANTENIMIENTO =================
+
+    def add(self, key, name, username):
+        self.remove(key)
+        self._add_doc(key, name, username, sort_suffixes=True)
+
+    def remove(self, key):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for w in set(doc[0].split()) | {doc[1]}:
+            wid = self._word_ids.get(w)
+            if wid is None:
+                continue
+            keys = self._postings[wid]
+            keys.discard(key)
+            if not keys:
+                self._drop_word(wid)
+
+    def _add_doc(self, key, name, username, sort_suffixes):
+        name, username = normalize(name), normalize(username)
+        self._docs[key] = (name, username)
+        for w in set(name.split()) | {username}:
+            if not w:
+                continue
+            wid = self._word_ids.get(w)
+            if wid is None:
+                wid = self._new_word(w, sort_suffixes)
+            self._postings[wid].add(key)
+
+    def _new_word(self, w, sort_suffixes):
+        if self._free:
+            wid = self._free.pop()
+            self._words[wid] = w
+            self._postings[wid] = set()
+        else:
+            wid = len(self._words)
+            self._words.append(w)
+            self._postings.append(set())
+        self._word_ids[w] = wid
+
+        if sort_suffixes:
+            for off in range(min(len(w), _MAX_WORD)):
+                e = (wid << 8) | off
+                pos = bisect_left(self._suffixes, w[off:], key=self._suffix)
+                self._suffixes.insert(pos, e)
+        return wid
+
+    def _drop_word(self, wid):
+        w = self._words[wid]
+        for off in range(min(len(w), _MAX_WORD)):
+            e = (wid << 8) | off
+            pos = bisect_left(self._suffixes, w[off:], key=self._suffix)
+            while self._suffixes[pos] != e:
+                pos += 1
+            del self._suffixes[pos]
+        del self._word_ids[w]
+        self._words[wid] = None
+        self._postings[wid] = None
+        self._free.append(wid)
+
+    # ================= CONSULTAS =================
+
+    def _keys_containing(self, token):
+        lo = bisect_left(self._suffixes, token, key=self._suffix)
+        hi = bisect_left(self._suffixes, token + "\U0010ffff", key=self._suffix)
+        out = set()
+        for wid in {e >> 8 for e in self._suffixes[lo:hi]}:
+            out |= self._postings[wid]
+        return out
+
+    def _rank(self, key, q):
+        name, username = self._docs[key]
+        if username == q:
+            return 0
+        if username.startswith(q):
+            return 1
+        if name.startswith(q) or f" {q}" in f" {name}":
+            return 2
+        return 3
+
+    def search(self, query, limit=None):
+        # claves cuyo nombre o usuario contiene `query`, de mejor a peor:
+        # usuario exacto, prefijo de usuario, prefijo de palabra, subcadena
+        q = normalize(query)
+        if not q:
+            return []
+
+        candidates = None
+        for token in sorted(set(q.split()), key=len, reverse=True):
+            keys = self._keys_containing(token)
+            candidates = keys if candidates is None else candidates & keys
+            if not candidates:
+                return []
+
+        ranked = (
+            (self._rank(k, q), k) for k in candidates
+            if q in self._docs[k][0] or q in self._docs[k][1]
+        )
+        if limit:
+            return [k for _, k in heapq.nsmallest(limit, ranked)]
+        return [k for _, k in sorted(ranked)]
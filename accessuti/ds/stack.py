@@ -6,6 +6,7 @@ class AuditEvent:
     ts: str
     actor: str
     action: str
+    target: str = ""
 
 class Stack:
     def __init__(self):
@@ -17,9 +18,13 @@ class Stack:
     def to_list(self):
         return list(reversed(self._data))
 
-def audit_event(action, actor="system"):
+    def latest(self, n=10):
+        return self._data[:-n - 1:-1] if n > 0 else []
+
+def audit_event(action, actor="system", target=""):
     return AuditEvent(
         ts=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         actor=actor,
-        action=action
+        action=action,
+        target=target
     )
\ No newline at end of file
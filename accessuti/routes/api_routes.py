@@ -0,0 +1,146 @@
+from flask import Blueprint, request, jsonify, current_app
+from ..core.decorators import api_auth_required
+from ..services.user_service import EXPIRY_FIELDS
+from ..storage.base import DATE_FIELDS, FIELDS, RANGE_OPS
+
+api_bp = Blueprint("api", __name__)
+
+MAX_LIMIT = 1000
+
+
+class ApiError(ValueError):
+    pass
+
+
+@api_bp.errorhandler(ApiError)
+def api_error(e):
+    return jsonify({"error": str(e)}), 400
+
+
+def _svc():
+    return current_app.extensions["user_service"]
+
+
+def _int_arg(name, default, lo, hi):
+    raw = request.args.get(name, "")
+    try:
+        value = int(raw) if raw else default
+    except ValueError:
+        raise ApiError(f"{name} debe ser un entero.")
+    if not lo <= value <= hi:
+        raise ApiError(f"{name} debe estar entre {lo} y {hi}.")
+    return value
+
+
+def _fields():
+    # ?fields=usuario_red,nombres,sede -> proyección; vacío = todas las columnas
+    raw = request.args.get("fields", "").strip()
+    if not raw:
+        return FIELDS
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in FIELDS]
+    if unknown:
+        raise ApiError(f"Campos desconocidos: {', '.join(unknown)}")
+    return fields
+
+
+def _date_ranges():
+    # ?contrato_fin_lte=2026-12-31&vpn_fin_gte=... (mismos filtros que select_users)
+    out = {}
+    for name, value in request.args.items():
+        field, _, op = name.rpartition("_")
+        if field in DATE_FIELDS and op in RANGE_OPS:
+            out[name] = value
+    return out
+
+
+def _project(u, fields):
+    return {f: getattr(u, f) for f in fields}
+
+
+# ---------------- USUARIOS ----------------
+@api_bp.get("/users")
+@api_auth_required
+def list_users():
+    # mismos filtros que el dashboard; ?cursor= es el next_cursor de la página anterior
+    fields = _fields()
+    limit = _int_arg("limit", 100, 1, MAX_LIMIT)
+    status = request.args.get("status", "ACTIVE").strip().upper()
+    if status not in ("ACTIVE", "INACTIVE", "ALL"):
+        raise ApiError("status debe ser ACTIVE, INACTIVE o ALL.")
+
+    keys = None
+    ranges = _date_ranges()
+    if ranges:
+        # con el backend SQLite los rangos se resuelven con los índices de la tabla
+        try:
+            keys = set(_svc().select_users(**ranges))
+        except ValueError as e:
+            raise ApiError(str(e))
+
+    users, next_cursor = _svc().page_users(
+        after=request.args.get("cursor", ""),
+        limit=limit,
+        status=None if status == "ALL" else status,
+        nombre=request.args.get("nombre", ""),
+        sede=request.args.get("sede", ""),
+        dependencia=request.args.get("dependencia", ""),
+        subdependencia=request.args.get("subdependencia", ""),
+        keys=keys,
+    )
+    return jsonify({
+        "items": [_project(u, fields) for u in users],
+        "next_cursor": next_cursor,
+        "limit": limit,
+    })
+
+
+@api_bp.get("/users/<usuario_red>")
+@api_auth_required
+def get_user(usuario_red):
+    u = _svc().get_network_user(usuario_red)
+    if not u:
+        return jsonify({"error": "Usuario no existe."}), 404
+    return jsonify(_project(u, _fields()))
+
+
+# ---------------- ALERTAS ----------------
+@api_bp.get("/alerts")
+@api_auth_required
+def alerts():
+    days = _int_arg("days", 15, 0, 3650)
+    limit = _int_arg("limit", 500, 1, MAX_LIMIT)
+    tipo = request.args.get("tipo", "").strip().upper()
+    if tipo and tipo not in EXPIRY_FIELDS:
+        raise ApiError(f"tipo debe ser uno de: {', '.join(EXPIRY_FIELDS)}")
+
+    items = []
+    for a in _svc().expiring_alerts(days):
+        if tipo and a["tipo"] != tipo:
+            continue
+        items.append({
+            "tipo": a["tipo"],
+            "usuario_red": a["u"].usuario_red,
+            "nombres": a["u"].nombres,
+            "apellidos": a["u"].apellidos,
+            "sede": a["u"].sede,
+            "vence": a["vence"],
+            "dias": a["dias"],
+        })
+        if len(items) >= limit:
+            break
+    return jsonify({"items": items, "days": days})
+
+
+# ---------------- CONTADORES ----------------
+@api_bp.get("/counts")
+@api_auth_required
+def counts():
+    svc = _svc()
+    return jsonify({
+        "total_activos": svc.total_network_users(),
+        "status": svc.count_by_status(),
+        "sede": svc.count_by_sede(),
+        "contrato": svc.count_by_contrato(),
+        "acceso_nivel": svc.count_by_acceso_nivel(),
+    })
@@ -9,15 +9,19 @@ def login():
 @auth_bp.post("/login")
 def login_post():
     from flask import current_app
-    svc = current_app.extensions["user_service"]
+    auth = current_app.extensions["auth_service"]
 
     username = request.form.get("username","").strip().lower()
     password = request.form.get("password","")
 
-    u = svc.validate_login(username, password)
+    u = auth.validate_login(username, password)
 
     if not u:
-        flash("Credenciales inválidas","danger")
+        wait = auth.blocked_for(username)
+        if wait:
+            flash(f"Demasiados intentos fallidos. Intenta de nuevo en {int(wait) + 1} s.", "danger")
+        else:
+            flash("Credenciales inválidas","danger")
         return redirect(url_for("auth.login"))
 
     session["user"] = {
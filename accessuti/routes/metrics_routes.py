@@ -0,0 +1,64 @@
+import time
+
+from flask import Blueprint, Response, g, request
+from ..core.decorators import api_auth_required
+from ..core.metrics import REGISTRY, HTTP_SECONDS
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.get("/metrics")
+@api_auth_required
+def metrics():
+    # formato de texto de Prometheus; con API_TOKEN se puede scrapear sin sesión
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+def register_metrics(app):
+    # latencia por ruta: un perf_counter al entrar y una observación al salir
+    @app.before_request
+    def _start_timer():
+        g._t0 = time.perf_counter()
+
+    @app.after_request
+    def _observe(resp):
+        t0 = g.pop("_t0", None)
+        if t0 is not None:
+            HTTP_SECONDS.observe(
+                time.perf_counter() - t0,
+                endpoint=request.endpoint or "404",
+                method=request.method,
+                status=resp.status_code,
+            )
+        return resp
+
+    # valores que ya llevan otros objetos: se leen solo al exportar
+    ext = app.extensions
+    svc = ext["user_service"]
+
+    REGISTRY.gauge("accessuti_network_users", "Usuarios de red por estado.",
+                   lambda: [((k,), v) for k, v in svc.count_by_status().items()], labels=("status",))
+    REGISTRY.gauge("accessuti_data_version", "Versión de los datos en memoria.", lambda: svc.version)
+
+    def cache_stats():
+        cache = ext.get("response_cache")
+        if cache is None:
+            return []
+        st = cache.stats()
+        return [((k,), st[k]) for k in ("hits", "misses", "evictions", "expired", "entries", "bytes")]
+    REGISTRY.gauge("accessuti_response_cache", "Caché de respuestas (acumulado desde el arranque).",
+                   cache_stats, labels=("stat",))
+
+    charts = ext["chart_cache"]
+    REGISTRY.gauge("accessuti_chart_cache", "Caché de gráficos (acumulado desde el arranque).",
+                   lambda: [(("hits",), charts.hits), (("misses",), charts.misses)], labels=("stat",))
+
+    auth = ext["auth_service"]
+    REGISTRY.gauge("accessuti_logins", "Resultados de login (acumulado desde el arranque).",
+                   lambda: [((k,), v) for k, v in auth.stats.items()], labels=("result",))
+
+    sweeper = ext["expiry_sweeper"]
+    REGISTRY.gauge("accessuti_expiry_revoked", "Revocaciones automáticas aplicadas.",
+                   lambda: [((k,), v) for k, v in sweeper.stats["processed_by_type"].items()], labels=("tipo",))
+    REGISTRY.gauge("accessuti_expiry_lag_seconds", "Atraso del vencimiento más antiguo revocado en el último barrido.",
+                   lambda: sweeper.stats["last_lag_seconds"] or 0.0)
@@ -1,51 +1,208 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, Response
+import hashlib
+from datetime import date
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, jsonify
 from ..core.decorators import login_required
 from ..core.auth import current_user
-
-import io
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from ..core.response_cache import cached_response
+from ..services.charts import CHARTS, MIMETYPES, chart_data, data_etag
+from ..services.bulk_import import iter_import_file
+from ..services.export import ALERT_COLUMNS, USER_COLUMNS, iter_export, MIMETYPES as EXPORT_MIMETYPES
+from ..services.user_service import BULK_ACTIONS
 
 users_bp = Blueprint("users", __name__)
 
 # ---------------- DASHBOARD ----------------
+FILTER_ARGS = ("nombre", "sede", "dependencia", "subdependencia")
+PAGE_SIZE = 100
+
+def _filters():
+    return {k: request.args.get(k, "").strip() for k in FILTER_ARGS}
+
+def _filter_args(filters):
+    # solo los filtros con valor, para armar URLs cortas
+    return {k: v for k, v in filters.items() if v}
+
+# la página base solo trae el formulario; cada sección se pide aparte
+# (fragments/*) y se paga solo cuando se muestra
 @users_bp.get("/")
 @login_required
+@cached_response(per_user=True)
 def dashboard():
+    filters = _filters()
+    return render_template(
+        "dashboard.html",
+        user=current_user(),
+        q=request.args.get("q", "").strip(),
+        filters=filters,
+        filter_args=_filter_args(filters),
+    )
+
+# ---------------- FRAGMENTOS ----------------
+def _today():
+    return date.today().isoformat()
+
+def _audit_version():
     from flask import current_app
-    svc = current_app.extensions["user_service"]
+    return current_app.extensions["user_service"].audit.version()
 
+def _fragment(key, render):
+    # ETag por versión de los datos (+ rol y argumentos): si el navegador ya
+    # tiene esta versión se responde 304 sin renderizar
+    u = current_user()
+    raw = repr((request.endpoint, key, u.get("role"), sorted(request.args.items(multi=True))))
+    etag = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    if etag in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        resp = Response(render(), mimetype="text/html")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+@users_bp.get("/fragment/search")
+@login_required
+@cached_response()
+def fragment_search():
+    from flask import current_app
+    svc = current_app.extensions["user_service"]
     q = request.args.get("q", "").strip()
-    nombre = request.args.get("nombre", "").strip()
-    sede = request.args.get("sede", "").strip()
-    dependencia = request.args.get("dependencia", "").strip()
-    subdependencia = request.args.get("subdependencia", "").strip()
-
-    result = svc.get_network_user(q) if q else None
-
-    filtered = svc.filter_users(
-        nombre=nombre,
-        sede=sede,
-        dependencia=dependencia,
-        subdependencia=subdependencia
-    )
 
-    return render_template(
-        "dashboard.html",
+    return _fragment(svc.version_tag(), lambda: render_template(
+        "fragments/search_result.html",
         user=current_user(),
         q=q,
-        result=result,
+        result=svc.get_network_user(q) if q else None,
+    ))
+
+@users_bp.get("/fragment/filtered")
+@login_required
+@cached_response()
+def fragment_filtered():
+    from flask import current_app
+    svc = current_app.extensions["user_service"]
+    filters = _filters()
+    cursor = request.args.get("cursor", "")
+    offset = request.args.get("offset", 0, type=int) or 0
+
+    def render():
+        if filters["nombre"]:
+            # con nombre se mantiene el orden por relevancia: páginas por posición
+            ranked = svc.filter_users(**filters)
+            users = ranked[offset:offset + PAGE_SIZE]
+            count = len(ranked)
+            more = offset + PAGE_SIZE < count
+            next_url = url_for("users.fragment_filtered", offset=offset + PAGE_SIZE, **_filter_args(filters)) if more else None
+        else:
+            # sin nombre: orden por usuario_red y cursor sobre el árbol
+            users, nxt = svc.page_users(after=cursor, limit=PAGE_SIZE, **filters)
+            count = svc.count_users(**filters) if not cursor else None
+            next_url = url_for("users.fragment_filtered", cursor=nxt, **_filter_args(filters)) if nxt else None
+
+        return render_template(
+            "fragments/filtered.html",
+            user=current_user(),
+            users=users,
+            count=count,
+            first_page=not cursor and not offset,
+            next_url=next_url,
+        )
+
+    return _fragment(svc.version_tag(), render)
+
+@users_bp.get("/fragment/kpis")
+@login_required
+@cached_response(extra=_today)
+def fragment_kpis():
+    from flask import current_app
+    svc = current_app.extensions["user_service"]
+
+    return _fragment((svc.version_tag(), date.today().isoformat()), lambda: render_template(
+        "fragments/kpis.html",
         total=svc.total_network_users(),
-        alerts=svc.expiring_alerts(15),
-        audit=svc.audit.to_list()[:10],
+        alerts_count=len(svc.expiring_alerts(15)),
         metrics=svc.bst_metrics(),
-        filtered=filtered,
-        nombre=nombre,
-        sede=sede,
-        dependencia=dependencia,
-        subdependencia=subdependencia
-    )
+    ))
+
+@users_bp.get("/fragment/alerts")
+@login_required
+@cached_response(extra=_today)
+def fragment_alerts():
+    from flask import current_app
+    svc = current_app.extensions["user_service"]
+
+    # "faltan N días" cambia con la fecha aunque los datos no cambien
+    return _fragment((svc.version_tag(), date.today().isoformat()), lambda: render_template(
+        "fragments/alerts.html",
+        user=current_user(),
+        alerts=svc.expiring_alerts(15),
+    ))
+
+@users_bp.get("/fragment/audit")
+@login_required
+@cached_response(extra=_audit_version)
+def fragment_audit():
+    from flask import current_app
+    svc = current_app.extensions["user_service"]
+
+    # mismo permiso que /audit (la clave de la caché incluye el rol)
+    if current_user().get("role") != "ADMIN":
+        return Response("No tienes permisos.", status=403, mimetype="text/plain")
+
+    # la auditoría no depende de la versión de datos: ETag por contenido
+    events = svc.audit.latest(10)
+    return _fragment(tuple(events), lambda: render_template("fragments/audit.html", audit=events))
+
+# ---------------- AUTOCOMPLETADO ----------------
+@users_bp.get("/suggest")
+@login_required
+def suggest_users():
+    from flask import current_app
+    svc = current_app.extensions["user_service"]
+
+    q = request.args.get("q", "").strip()
+    limit = min(request.args.get("limit", 10, type=int) or 10, 50)
+
+    return jsonify([
+        {
+            "usuario_red": u.usuario_red,
+            "nombre": f"{u.nombres} {u.apellidos}".strip(),
+            "sede": u.sede,
+            "status": u.status,
+        }
+        for u in svc.suggest_users(q, limit=limit)
+    ])
+
+# ---------------- AUDITORIA ----------------
+@users_bp.get("/audit")
+@login_required
+def audit_query():
+    from flask import current_app
+    svc = current_app.extensions["user_service"]
+
+    if current_user().get("role") != "ADMIN":
+        return jsonify({"error": "No tienes permisos."}), 403
+
+    actor = request.args.get("actor", "").strip()
+    usuario_red = request.args.get("usuario_red", "").strip()
+    desde = request.args.get("desde", "").strip()
+    hasta = request.args.get("hasta", "").strip()
+    limit = min(request.args.get("limit", 100, type=int) or 100, 1000)
+
+    if usuario_red:
+        events = svc.audit.by_usuario(usuario_red, limit=limit)
+    elif actor:
+        events = svc.audit.by_actor(actor, limit=limit)
+    elif desde or hasta:
+        events = svc.audit.between(desde, hasta or "9999", limit=limit)
+    else:
+        events = svc.audit.latest(limit)
+
+    return jsonify([
+        {"fecha": e.ts, "usuario": e.actor, "accion": e.action, "detalle": e.target}
+        for e in events
+    ])
 
 # ---------------- REGISTRO/UPDATE ----------------
 @users_bp.post("/register")
@@ -65,6 +222,37 @@ def register_network_user():
 
     return redirect(url_for("users.dashboard"))
 
+# ---------------- IMPORTACION MASIVA ----------------
+@users_bp.post("/import")
+@login_required
+def import_users():
+    from flask import current_app
+    svc = current_app.extensions["user_service"]
+
+    u = current_user()
+    if u.get("role") != "ADMIN":
+        flash("No tienes permisos.", "danger")
+        return redirect(url_for("users.dashboard"))
+
+    f = request.files.get("archivo")
+    if not f or not f.filename:
+        flash("Selecciona un archivo .csv o .xlsx.", "warning")
+        return redirect(url_for("users.dashboard"))
+
+    try:
+        res = svc.import_rows(iter_import_file(f.stream, f.filename), actor=u.get("username", "admin"))
+    except Exception as e:
+        flash(str(e), "danger")
+        return redirect(url_for("users.dashboard"))
+
+    flash(f"Importación: {res['importados']} de {res['total']} filas.", "success" if res["importados"] else "warning")
+    for e in res["errores"][:5]:
+        flash(f"Línea {e['linea']} ({e['usuario_red'] or '-'}): {e['error']}", "danger")
+    if len(res["errores"]) > 5:
+        flash(f"... y {len(res['errores']) - 5} filas más con errores.", "danger")
+
+    return redirect(url_for("users.dashboard"))
+
 # ---------------- DESACTIVAR ----------------
 @users_bp.post("/user/deactivate")
 @login_required
@@ -134,60 +322,133 @@ def user_perms_off():
 
     return redirect(url_for("users.dashboard"))
 
-# ---------------- CHART: SEDE ----------------
-@users_bp.get("/chart/sede")
+# ---------------- ACCIONES EN LOTE ----------------
+@users_bp.post("/bulk")
 @login_required
-def chart_users_by_sede():
+def bulk_action():
     from flask import current_app
     svc = current_app.extensions["user_service"]
 
-    data = svc.count_by_sede()
-    if not data:
-        data = {"Sin datos": 1}
+    u = current_user()
+    if u.get("role") != "ADMIN":
+        flash("No tienes permisos.", "danger")
+        return redirect(url_for("users.dashboard"))
 
-    labels = list(data.keys())[:12]
-    values = [data[k] for k in labels]
+    accion = request.form.get("accion", "")
+    if accion not in BULK_ACTIONS:
+        flash("Acción no válida.", "danger")
+        return redirect(url_for("users.dashboard"))
 
-    fig, ax = plt.subplots(figsize=(10, 4))
-    ax.bar(labels, values)
-    ax.set_title("Usuarios activos por sede")
-    ax.set_ylabel("Cantidad")
-    ax.set_xlabel("Sede")
-    plt.xticks(rotation=35, ha="right")
-    plt.tight_layout()
+    usuarios = request.form.get("usuarios", "").replace(",", " ").split() or None
+    filters = {k: request.form.get(k, "").strip() for k in ("sede", "dependencia", "subdependencia", "contrato_fin_lt")}
 
-    img = io.BytesIO()
-    plt.savefig(img, format="png")
-    img.seek(0)
-    plt.close(fig)
+    try:
+        res = getattr(svc, BULK_ACTIONS[accion])(usuarios, actor=u.get("username", "admin"), **filters)
+        flash(f"{len(res['actualizados'])} usuarios actualizados de {res['seleccionados']} seleccionados.", "info")
+        if res["no_existen"]:
+            flash(f"No existen: {', '.join(res['no_existen'][:20])}", "warning")
+    except Exception as e:
+        flash(str(e), "danger")
 
-    return Response(img.getvalue(), mimetype="image/png")
+    return redirect(url_for("users.dashboard"))
 
-# ---------------- CHART: TIPO CONTRATO ----------------
-@users_bp.get("/chart/contrato")
+# ---------------- VENCIMIENTOS AUTOMÁTICOS ----------------
+@users_bp.get("/expiry/status")
 @login_required
-def chart_users_by_contrato():
+def expiry_status():
     from flask import current_app
+    sweeper = current_app.extensions["expiry_sweeper"]
+
+    if current_user().get("role") != "ADMIN":
+        return jsonify({"error": "No tienes permisos."}), 403
+
+    sweeper.seconds_until_next()
+    return jsonify(sweeper.stats)
+
+# ---------------- CACHE ----------------
+@users_bp.get("/cache/stats")
+@login_required
+def cache_stats():
+    from flask import current_app
+    cache = current_app.extensions.get("response_cache")
+
+    if current_user().get("role") != "ADMIN":
+        return jsonify({"error": "No tienes permisos."}), 403
+
+    return jsonify(cache.stats() if cache else {"enabled": False})
+
+# ---------------- EXPORTACIÓN ----------------
+# /export/usuarios.csv|xlsx y /export/alertas.csv|xlsx con los mismos filtros
+# del dashboard; la respuesta se arma en streaming (services/export.py)
+@users_bp.get("/export/<what>.<fmt>")
+@login_required
+def export(what, fmt):
+    from flask import current_app, abort
     svc = current_app.extensions["user_service"]
 
-    data = svc.count_by_contrato()
-    if not data:
-        data = {"Sin datos": 1}
+    if what not in ("usuarios", "alertas") or fmt not in EXPORT_MIMETYPES:
+        abort(404)
+    if current_user().get("role") != "ADMIN":
+        flash("No tienes permisos.", "danger")
+        return redirect(url_for("users.dashboard"))
 
-    labels = list(data.keys())
-    values = list(data.values())
+    filters = _filters()
+    # filter_users solo devuelve referencias; las filas se generan al enviar
+    if what == "usuarios":
+        items, columns = svc.filter_users(**filters), USER_COLUMNS
+    else:
+        items, columns = svc.expiring_alerts(request.args.get("days", 15, type=int) or 15), ALERT_COLUMNS
+        if any(filters.values()):
+            keys = {u.usuario_red for u in svc.filter_users(**filters)}
+            items = [a for a in items if a["u"].usuario_red in keys]
+
+    filename = f"{what}_{date.today().isoformat()}.{fmt}"
+    return Response(
+        iter_export(fmt, items, columns),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
-    fig, ax = plt.subplots(figsize=(10, 4))
-    ax.bar(labels, values)
-    ax.set_title("Usuarios activos por tipo de contrato")
-    ax.set_ylabel("Cantidad")
-    ax.set_xlabel("Tipo")
-    plt.xticks(rotation=0)
-    plt.tight_layout()
+# ---------------- CHARTS ----------------
+def _chart_response(kind):
+    from flask import current_app
+    cache = current_app.extensions["chart_cache"]
 
-    img = io.BytesIO()
-    plt.savefig(img, format="png")
-    img.seek(0)
-    plt.close(fig)
+    fmt = request.args.get("format", "png")
+    if fmt not in MIMETYPES:
+        fmt = "png"
+
+    etag, body = cache.get(kind, fmt)
+    resp = Response(body, mimetype=MIMETYPES[fmt])
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp.make_conditional(request)
+
+@users_bp.get("/chart/sede")
+@login_required
+@cached_response()
+def chart_users_by_sede():
+    return _chart_response("sede")
+
+@users_bp.get("/chart/contrato")
+@login_required
+@cached_response()
+def chart_users_by_contrato():
+    return _chart_response("contrato")
+
+# datos crudos para que el navegador dibuje el gráfico
+@users_bp.get("/chart/<kind>.json")
+@login_required
+@cached_response()
+def chart_data_json(kind):
+    from flask import current_app, abort
+    if kind not in CHARTS:
+        abort(404)
+
+    svc = current_app.extensions["user_service"]
+    data = chart_data(svc, kind)
 
-    return Response(img.getvalue(), mimetype="image/png")
\ No newline at end of file
+    resp = jsonify(data)
+    resp.set_etag(data_etag(kind, data))
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp.make_conditional(request)
@@ -0,0 +1,64 @@
+from collections import Counter
+
+
+def _sede(u):
+    return (u.sede or "SIN SEDE").strip() or "SIN SEDE"
+
+
+def _contrato(u):
+    return (u.tipo_contrato or "SIN TIPO").strip().upper() or "SIN TIPO"
+
+
+def _nivel(u):
+    return (u.acceso_nivel or "NORMAL").strip().upper() or "NORMAL"
+
+
+# dimensión -> etiqueta del usuario; "status" cuenta a todos, el resto solo
+# a los usuarios ACTIVE (igual que las estadísticas del dashboard)
+DIMENSIONS = {
+    "status": lambda u: u.status,
+    "sede": _sede,
+    "contrato": _contrato,
+    "acceso_nivel": _nivel,
+}
+
+
+# Contadores por dimensión mantenidos con deltas: cada alta/cambio resta la
+# versión anterior del usuario y suma la nueva, así leerlos es O(1).
+class Aggregates:
+    def __init__(self):
+        self.counts = {d: Counter() for d in DIMENSIONS}
+
+    def add(self, u, sign=1):
+        for dim, label in DIMENSIONS.items():
+            if dim != "status" and u.status != "ACTIVE":
+                continue
+            c = self.counts[dim]
+            key = label(u)
+            c[key] += sign
+            if not c[key]:
+                del c[key]
+
+    def remove(self, u):
+        self.add(u, -1)
+
+    def get(self, dim, key):
+        return self.counts[dim].get(key, 0)
+
+    def sorted_counts(self, dim):
+        return dict(self.counts[dim].most_common())
+
+    # recalcula desde cero y devuelve las diferencias {dim: {key: (mantenido, real)}}
+    def verify(self, users):
+        fresh = Aggregates()
+        for u in users:
+            fresh.add(u)
+
+        diffs = {}
+        for dim in DIMENSIONS:
+            mine, real = self.counts[dim], fresh.counts[dim]
+            bad = {k: (mine.get(k, 0), real.get(k, 0))
+                   for k in set(mine) | set(real) if mine.get(k, 0) != real.get(k, 0)}
+            if bad:
+                diffs[dim] = bad
+        return diffs
@@ -0,0 +1,171 @@
+import hashlib, hmac, os, threading, time
+from dataclasses import dataclass
+from datetime import datetime
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# cuentas que siempre existieron en código. Si el archivo no las tiene se
+# agregan solo en memoria (arrancar no modifica data/usuarios_sistema.csv) y
+# se escriben recién cuando cambia su contraseña. El hash viene precalculado
+# (admin123 / consulta123): no cuesta dos scrypt
+BUILTIN_ACCOUNTS = (
+    ("admin", "scrypt:32768:8:1$lv75P4YeMtRQg6wo$c3b988ab837312d58eb7a1a02221b27ff219357ea5cca9974c7420c1b69f6edaf0114de723b579ed9934d6b86f447658c0b4837cb5533e1c3b8db4e7e3734934", "ADMIN"),
+    ("consulta", "scrypt:32768:8:1$TD5dsts8lLk5PlRD$e0c6670b2b701bc606c7e39f5fb522fb5634c0ac1e03eda4797e2b8170341611626dfd66417aa08ef45810556c19a798bd9ba25191cc894d71b1fc978c0086a0", "CONSULTA"),
+)
+
+
+@dataclass
+class AppUser:
+    username: str
+    password_hash: str
+    role: str
+    active: bool = True
+
+
+def _method(password_hash):
+    # "scrypt:32768:8:1$salt$hash" -> "scrypt:32768:8:1"
+    return password_hash.split("$", 1)[0]
+
+
+# Login de las cuentas del sistema.
+#
+# - Los hashes vienen precalculados de AppUserStore; hash_method define el
+#   costo para hashes nuevos y los que tengan otro método se rehacen con el
+#   configurado en el siguiente login correcto.
+# - Tras un login correcto se guarda un HMAC(clave del proceso, usuario,
+#   contraseña, hash) por `cache_ttl` segundos: los logins siguientes con la
+#   misma contraseña se verifican sin scrypt. La clave no sale de memoria y
+#   el HMAC incluye el hash, así que un cambio de contraseña lo invalida.
+# - Tras `max_failures` fallos dentro de `failure_window` la cuenta queda
+#   bloqueada `lockout` segundos (el doble en cada bloqueo seguido, hasta
+#   max_lockout) y no se evalúa ningún hash mientras tanto. Es por proceso.
+class AuthService:
+    def __init__(self, store, hash_method="scrypt:32768:8:1", cache_ttl=900,
+                 max_failures=5, failure_window=300, lockout=60, max_lockout=3600,
+                 clock=time.monotonic):
+        self.store = store
+        self.hash_method = hash_method
+        self.cache_ttl = cache_ttl
+        self.max_failures = max_failures
+        self.failure_window = failure_window
+        self.lockout = lockout
+        self.max_lockout = max_lockout
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._key = os.urandom(32)
+        self._verified = {}      # username -> (hmac, expira)
+        self._failures = {}      # username -> [timestamps de fallos recientes]
+        self._locked_until = {}  # username -> (hasta, lockout actual)
+        self.stats = {"ok": 0, "cached": 0, "failed": 0, "blocked": 0, "hashes_checked": 0}
+
+        self._load()
+
+    # ================= CUENTAS =================
+
+    def _load(self):
+        self._generation = self.store.generation()
+        self.users = {
+            r["username"].lower(): AppUser(
+                r["username"].lower(), r["password_hash"], r["rol"].upper(),
+                r["estado"].upper() in ("", "ACTIVO", "ACTIVE"),
+            )
+            for r in self.store.read_all()
+        }
+        # cuentas integradas que no están en el archivo
+        self._builtin = set()
+        for name, password_hash, role in BUILTIN_ACCOUNTS:
+            if name not in self.users:
+                self.users[name] = AppUser(name, password_hash, role)
+                self._builtin.add(name)
+
+    def _refresh(self):
+        # otro worker pudo rehacer un hash o agregar cuentas
+        if self.store.generation() != self._generation:
+            self._load()
+
+    def set_password(self, username, password):
+        u = self.users[username]
+        u.password_hash = generate_password_hash(password, method=self.hash_method)
+        row = {"username": username, "password_hash": u.password_hash}
+        if username in self._builtin:
+            # primera escritura de una cuenta integrada: la fila completa
+            row.update(rol=u.role, estado="ACTIVO", creado_en=datetime.now().strftime("%Y-%m-%d %H:%M"))
+            self._builtin.discard(username)
+        self.store.upsert_many([row])
+        self._generation = self.store.generation()
+        with self._lock:
+            self._verified.pop(username, None)
+
+    # ================= LOGIN =================
+
+    def blocked_for(self, username):
+        # segundos que faltan para desbloquear la cuenta (0 si no está bloqueada)
+        until = self._locked_until.get((username or "").strip().lower())
+        return max(0.0, until[0] - self._clock()) if until else 0.0
+
+    def _digest(self, u, password):
+        msg = "\0".join((u.username, password, u.password_hash)).encode("utf-8")
+        return hmac.new(self._key, msg, hashlib.sha256).digest()
+
+    def validate_login(self, username, password):
+        username = (username or "").strip().lower()
+        password = password or ""
+
+        if self.blocked_for(username):
+            self.stats["blocked"] += 1
+            return None
+
+        self._refresh()
+        u = self.users.get(username)
+        if not u or not u.active:
+            # sin hash que evaluar: no cuesta CPU y no se guarda estado por
+            # nombres inventados
+            self.stats["failed"] += 1
+            return None
+
+        digest = self._digest(u, password)
+        now = self._clock()
+        with self._lock:
+            cached = self._verified.get(username)
+        if cached and cached[1] > now and hmac.compare_digest(cached[0], digest):
+            self.stats["cached"] += 1
+            self._succeed(username)
+            return u
+
+        self.stats["hashes_checked"] += 1
+        if not check_password_hash(u.password_hash, password):
+            self._fail(username)
+            return None
+
+        if _method(u.password_hash) != self.hash_method:
+            self.set_password(username, password)
+            digest = self._digest(u, password)
+
+        with self._lock:
+            self._verified[username] = (digest, now + self.cache_ttl)
+        self._succeed(username)
+        return u
+
+    def _succeed(self, username):
+        self.stats["ok"] += 1
+        with self._lock:
+            self._failures.pop(username, None)
+            self._locked_until.pop(username, None)
+
+    def _fail(self, username):
+        self.stats["failed"] += 1
+        now = self._clock()
+        with self._lock:
+            recent = [t for t in self._failures.get(username, []) if now - t < self.failure_window]
+            recent.append(now)
+            self._failures[username] = recent
+            if len(recent) >= self.max_failures:
+                # si vuelve a fallar poco después de un bloqueo, el siguiente dura el doble
+                prev = self._locked_until.get(username)
+                again = prev and now - prev[0] < prev[1]
+                span = min(self.max_lockout, prev[1] * 2) if again else self.lockout
+                self._locked_until[username] = (now + span, span)
+                self._failures[username] = []
+                # un login con la contraseña correcta tampoco debe saltarse el bloqueo
+                self._verified.pop(username, None)
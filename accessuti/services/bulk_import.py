@@ -0,0 +1,68 @@
+import csv, io, os
+from datetime import date, datetime
+
+from ..storage.migrate import is_legacy_header, legacy_row
+
+# Lectura de archivos para UserService.import_rows: CSV con las columnas de
+# users.csv, CSV con el formato anterior (usuarios_red.csv) o XLSX con
+# cualquiera de los dos encabezados. Produce (n° de línea, fila) en streaming.
+
+
+def _text(v):
+    # openpyxl entrega las celdas con formato de fecha como datetime
+    if isinstance(v, datetime):
+        return v.date().isoformat()
+    if isinstance(v, date):
+        return v.isoformat()
+    return "" if v is None else str(v).strip()
+
+
+def _rows_from_records(header, records, first_line=2):
+    header = [(h or "").strip().lower() for h in header]
+    legacy = is_legacy_header(header)
+    for line, values in enumerate(records, start=first_line):
+        if values is None or not any(v not in (None, "") for v in values):
+            continue
+        data = {h: _text(v) for h, v in zip(header, values)}
+        yield line, (legacy_row(data) if legacy else data)
+
+
+def _iter_csv(stream):
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header:
+        yield from _rows_from_records(header, reader)
+
+
+def _iter_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Para importar .xlsx instala openpyxl (pip install openpyxl).")
+
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header:
+            yield from _rows_from_records(header, rows)
+    finally:
+        wb.close()
+
+
+def iter_import_file(source, filename=None):
+    # source: ruta o stream binario (p. ej. request.files[...].stream)
+    name = (filename or (source if isinstance(source, str) else "")).lower()
+    ext = os.path.splitext(name)[1]
+    if ext not in (".csv", ".xlsx"):
+        raise ValueError("Formato no soportado: usa .csv o .xlsx.")
+
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            yield from iter_import_file(f, name)
+        return
+
+    if ext == ".xlsx":
+        yield from _iter_xlsx(source)
+    else:
+        yield from _iter_csv(io.TextIOWrapper(source, encoding="utf-8-sig", newline=""))
@@ -0,0 +1,135 @@
+import atexit, hashlib, io, json, logging, threading
+
+log = logging.getLogger(__name__)
+
+# tipo de gráfico -> cómo obtener los datos y cómo dibujarlos
+CHARTS = {
+    "sede": {
+        "title": "Usuarios activos por sede",
+        "xlabel": "Sede",
+        "rotation": 35,
+        "limit": 12,
+        "counts": lambda svc: svc.count_by_sede(),
+    },
+    "contrato": {
+        "title": "Usuarios activos por tipo de contrato",
+        "xlabel": "Tipo",
+        "rotation": 0,
+        "limit": None,
+        "counts": lambda svc: svc.count_by_contrato(),
+    },
+}
+
+MIMETYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def chart_data(svc, kind):
+    spec = CHARTS[kind]
+    data = spec["counts"](svc) or {"Sin datos": 1}
+    labels = list(data.keys())[:spec["limit"]]
+    return {"title": spec["title"], "labels": labels, "values": [data[k] for k in labels]}
+
+
+def data_etag(kind, data):
+    # ETag según el contenido (igual en todos los workers con los mismos datos)
+    raw = json.dumps([kind, data["labels"], data["values"]], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def render_chart(kind, data, fmt="png"):
+    # API orientada a objetos de matplotlib: sin estado global de pyplot,
+    # se puede dibujar desde cualquier hilo. Se importa aquí (~0.5 s) para que
+    # create_app, la CLI y la API no lo paguen si nadie pide un gráfico
+    from matplotlib.figure import Figure
+
+    spec = CHARTS[kind]
+    fig = Figure(figsize=(10, 4))
+    ax = fig.subplots()
+    ax.bar(data["labels"], data["values"])
+    ax.set_title(spec["title"])
+    ax.set_ylabel("Cantidad")
+    ax.set_xlabel(spec["xlabel"])
+    for label in ax.get_xticklabels():
+        label.set_rotation(spec["rotation"])
+        if spec["rotation"]:
+            label.set_horizontalalignment("right")
+    fig.tight_layout()
+
+    img = io.BytesIO()
+    fig.savefig(img, format=fmt)
+    return img.getvalue()
+
+
+# Caché de gráficos por versión de datos del UserService. Cuando los datos
+# cambian, un hilo de fondo vuelve a dibujar los gráficos ya pedidos, así la
+# siguiente petición normalmente encuentra la imagen lista.
+class ChartCache:
+    def __init__(self, svc):
+        self.svc = svc
+        self._entries = {}        # (kind, fmt) -> (version, etag, bytes)
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+        self.hits = self.misses = 0
+        svc.on_change(self._on_change)
+
+    def get(self, kind, fmt="png"):
+        # devuelve (etag, bytes); dibuja en el momento solo si no hay nada al día
+        version = self.svc.version
+        entry = self._entries.get((kind, fmt))
+        if entry and entry[0] == version:
+            self.hits += 1
+            return entry[1], entry[2]
+        self.misses += 1
+        return self._render(kind, fmt, version, entry)
+
+    def _render(self, kind, fmt, version, previous=None):
+        data = chart_data(self.svc, kind)
+        etag = f"{data_etag(kind, data)}-{fmt}"
+        if previous and previous[1] == etag:
+            # cambió la versión pero no lo que muestra este gráfico
+            body = previous[2]
+        else:
+            body = render_chart(kind, data, fmt)
+        with self._lock:
+            self._entries[(kind, fmt)] = (version, etag, body)
+        return etag, body
+
+    # ================= RENDER EN SEGUNDO PLANO =================
+
+    def _on_change(self, version):
+        self._dirty.set()
+        if self._stop.is_set() or (self._worker is not None and self._worker.is_alive()):
+            return
+        first = self._worker is None
+        # también tras un fork: el hilo del padre no corre en el hijo
+        self._worker = threading.Thread(target=self._run, name="chart-render", daemon=True)
+        self._worker.start()
+        if first:
+            # un hilo daemon dibujando con matplotlib mientras el intérprete
+            # se cierra puede abortar el proceso: se detiene antes
+            atexit.register(self.stop)
+
+    def _run(self):
+        while True:
+            self._dirty.wait()
+            self._dirty.clear()
+            if self._stop.is_set():
+                return
+            for (kind, fmt), entry in list(self._entries.items()):
+                if self._stop.is_set():
+                    return
+                version = self.svc.version
+                if entry[0] != version:
+                    try:
+                        self._render(kind, fmt, version, entry)
+                    except Exception:
+                        # la próxima petición lo vuelve a intentar en el momento
+                        log.exception("No se pudo redibujar el gráfico %s (%s)", kind, fmt)
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._dirty.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
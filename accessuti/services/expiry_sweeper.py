@@ -0,0 +1,100 @@
+import threading, time
+from datetime import date, datetime
+
+from ..storage.file_lock import FileLock
+
+
+def _due_at(fin_ordinal):
+    # una fecha de fin vence al empezar el día siguiente (hora local)
+    return datetime.fromordinal(fin_ordinal + 1).timestamp()
+
+
+# Revoca VPN y permisos especiales vencidos en segundo plano.
+#
+# No consulta a intervalos fijos: duerme hasta el próximo vencimiento del
+# índice de vencimientos (ordenado por fecha) y se despierta antes si los
+# datos cambian (p. ej. alguien registra una fecha de fin más próxima).
+# Con varios workers, el lock de archivo hace que un solo proceso aplique
+# cada vencimiento; los demás lo ven al refrescar el store.
+class ExpirySweeper:
+    def __init__(self, svc, lock_path, actor="sistema", max_sleep=3600):
+        self.svc = svc
+        self.actor = actor
+        self.max_sleep = max_sleep
+        self._locked = FileLock(lock_path)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {
+            "runs": 0,
+            "processed": 0,            # revocaciones aplicadas en total
+            "processed_by_type": {},
+            "last_run": None,
+            "last_lag_seconds": None,  # atraso del vencimiento más antiguo revocado
+            "next_due": None,
+            "errors": 0,
+            "last_error": None,
+        }
+        svc.on_change(lambda version: self._wake.set())
+
+    # ================= BARRIDO =================
+
+    def sweep(self, now=None):
+        now = now or time.time()
+        with self._locked():
+            # otro proceso pudo haber revocado ya: se parte del estado en disco
+            self.svc.refresh()
+            result = self.svc.revoke_expired(date.fromtimestamp(now), actor=self.actor)
+
+        lag = None
+        for tipo, (n, oldest) in result.items():
+            if n:
+                self.stats["processed"] += n
+                by_type = self.stats["processed_by_type"]
+                by_type[tipo] = by_type.get(tipo, 0) + n
+                lag = max(lag or 0.0, now - _due_at(oldest))
+        self.stats["runs"] += 1
+        self.stats["last_run"] = datetime.fromtimestamp(now).isoformat(timespec="seconds")
+        if lag is not None:
+            self.stats["last_lag_seconds"] = round(lag, 3)
+        return result
+
+    def seconds_until_next(self, now=None):
+        nxt = self.svc.next_revocation()
+        self.stats["next_due"] = date.fromordinal(nxt + 1).isoformat() if nxt else None
+        if nxt is None:
+            return self.max_sleep
+        return min(self.max_sleep, max(0.0, _due_at(nxt) - (now or time.time())))
+
+    # ================= HILO =================
+
+    def run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.sweep()
+                wait = self.seconds_until_next()
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.stats["last_error"] = repr(e)
+                wait = 60
+            # max_sleep acota la espera: cubre cambios de hora y escrituras de
+            # otros procesos que este no ve hasta refrescar
+            self._wake.wait(wait)
+
+    def start(self):
+        # tras un fork el hilo del padre figura pero no corre en el hijo
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self.run, name="expiry-sweeper", daemon=True)
+            self._thread.start()
+        return self
+
+    def serve(self):
+        # proceso dedicado: arranca el hilo (si EXPIRY_SWEEPER no lo hizo) y espera
+        thread = self.start()._thread
+        while thread.is_alive():
+            thread.join(1)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
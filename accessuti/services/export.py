@@ -0,0 +1,213 @@
+import csv, io, re, zipfile
+from xml.sax.saxutils import escape
+
+# Exportación en streaming (CSV / XLSX) para respuestas de Flask: cada
+# función es un generador de bloques de bytes, así la primera parte sale
+# enseguida y un export grande nunca está completo en memoria.
+#
+# El XLSX sigue el formato de data/Organizacion INIA.xlsx (hoja "Hoja1",
+# columnas SEDE / DIRECCION / SUBDIRECCION primero, encabezado en negrita y
+# centrado) y se arma a mano con zipfile: openpyxl necesita el libro entero
+# en memoria antes de guardarlo.
+
+_CHUNK_ROWS = 1000
+
+
+def _sub(u):
+    return u.subdependencia or "-"
+
+
+# un texto que empieza con = + - @ (o tab / retorno) Excel y LibreOffice lo
+# pueden tomar como fórmula: se antepone ' para que quede como texto. El "-"
+# solo (subdirección vacía) no es fórmula y se deja igual
+_FORMULA_START = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _safe(value):
+    if value.__class__ is str and value.startswith(_FORMULA_START) and value != "-":
+        return "'" + value
+    return value
+
+
+# (encabezado, ancho de columna en el XLSX, valor)
+USER_COLUMNS = [
+    ("SEDE", 27, lambda u: u.sede),
+    ("DIRECCION", 40, lambda u: u.dependencia),
+    ("SUBDIRECCION", 50, _sub),
+    ("USUARIO_RED", 18, lambda u: u.usuario_red),
+    ("NOMBRES", 24, lambda u: u.nombres),
+    ("APELLIDOS", 28, lambda u: u.apellidos),
+    ("DNI", 12, lambda u: u.dni),
+    ("TIPO_CONTRATO", 14, lambda u: u.tipo_contrato),
+    ("CONTRATO_INICIO", 16, lambda u: u.contrato_inicio),
+    ("CONTRATO_FIN", 14, lambda u: u.contrato_fin),
+    ("ACCESO_NIVEL", 13, lambda u: u.acceso_nivel),
+    ("REDES_SOCIALES", 15, lambda u: u.acceso_redes_sociales),
+    ("VPN_ACTIVO", 11, lambda u: u.vpn_activo),
+    ("VPN_FIN", 12, lambda u: u.vpn_fin),
+    ("PERMISOS_ACTIVOS", 17, lambda u: u.permisos_activos),
+    ("PERMISO_FIN", 12, lambda u: u.permiso_fin),
+    ("ESTADO", 10, lambda u: u.status),
+]
+
+# filas de expiring_alerts: {"tipo", "u", "dias", "vence"}
+ALERT_COLUMNS = [
+    ("SEDE", 27, lambda a: a["u"].sede),
+    ("DIRECCION", 40, lambda a: a["u"].dependencia),
+    ("SUBDIRECCION", 50, lambda a: _sub(a["u"])),
+    ("TIPO", 11, lambda a: a["tipo"]),
+    ("VENCE", 12, lambda a: a["vence"]),
+    ("DIAS", 6, lambda a: a["dias"]),
+    ("USUARIO_RED", 18, lambda a: a["u"].usuario_red),
+    ("NOMBRES", 24, lambda a: a["u"].nombres),
+    ("APELLIDOS", 28, lambda a: a["u"].apellidos),
+    ("CONTRATO_FIN", 14, lambda a: a["u"].contrato_fin),
+]
+
+MIMETYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+# ================= CSV =================
+
+def iter_csv(items, columns):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    # BOM: Excel abre el archivo como UTF-8 (tildes, ñ)
+    buf.write("\ufeff")
+    w.writerow([h for h, _, _ in columns])
+    getters = [get for _, _, get in columns]
+    for i, item in enumerate(items, 1):
+        w.writerow([_safe(get(item)) for get in getters])
+        if i % _CHUNK_ROWS == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+# ================= XLSX =================
+
+_NS = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+_NS_R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_NS_PKG = 'xmlns="http://schemas.openxmlformats.org/package/2006/relationships"'
+_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_CONTENT_TYPES = _XML + (
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = _XML + (
+    f'<Relationships {_NS_PKG}>'
+    f'<Relationship Id="rId1" Type="{_REL}/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK_RELS = _XML + (
+    f'<Relationships {_NS_PKG}>'
+    f'<Relationship Id="rId1" Type="{_REL}/worksheet" Target="worksheets/sheet1.xml"/>'
+    f'<Relationship Id="rId2" Type="{_REL}/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+# estilo 0: normal; estilo 1: encabezado en negrita y centrado
+_STYLES = _XML + (
+    f'<styleSheet {_NS}>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1">'
+    '<alignment horizontal="center"/></xf></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+# caracteres que XML 1.0 no admite (Excel rechaza el archivo si aparecen)
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_SPECIAL = re.compile("[&<>\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+# celdas y filas sin referencia (r="B7"): son opcionales y se ubican en orden.
+# La gran mayoría de los textos no tiene nada que escapar
+def _cell(value, style=""):
+    if value.__class__ is int:
+        return f"<c{style}><v>{value}</v></c>"
+    text = "" if value is None else _safe(str(value))
+    if _SPECIAL.search(text):
+        text = escape(_INVALID_XML.sub("", text))
+    return f'<c{style} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(values, style=""):
+    return "<row>" + "".join([_cell(v, style) for v in values]) + "</row>"
+
+
+class _Sink:
+    # destino del ZipFile sin seek: acumula lo escrito hasta el próximo drain()
+    def __init__(self):
+        self._parts = []
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        out, self._parts = b"".join(self._parts), []
+        return out
+
+
+def iter_xlsx(items, columns, sheet="Hoja1"):
+    sink = _Sink()
+    # nivel 1: el XML repetitivo comprime bien igual y es varias veces más rápido
+    zf = zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, compresslevel=1)
+    zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+    zf.writestr("_rels/.rels", _ROOT_RELS)
+    zf.writestr("xl/workbook.xml", _XML + (
+        f'<workbook {_NS} {_NS_R}><sheets>'
+        f'<sheet name="{escape(sheet)}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ))
+    zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+    zf.writestr("xl/styles.xml", _STYLES)
+
+    getters = [get for _, _, get in columns]
+    cols = "".join(
+        f'<col min="{i}" max="{i}" width="{width}" customWidth="1"/>'
+        for i, (_, width, _) in enumerate(columns, 1)
+    )
+
+    with zf.open("xl/worksheets/sheet1.xml", "w") as f:
+        f.write((
+            _XML + f'<worksheet {_NS}><cols>{cols}</cols><sheetData>'
+            + _row([h for h, _, _ in columns], ' s="1"')
+        ).encode("utf-8"))
+        parts = []
+        for item in items:
+            parts.append(_row([get(item) for get in getters]))
+            if len(parts) == _CHUNK_ROWS:
+                f.write("".join(parts).encode("utf-8"))
+                parts = []
+                yield sink.drain()
+        parts.append("</sheetData></worksheet>")
+        f.write("".join(parts).encode("utf-8"))
+
+    zf.close()
+    yield sink.drain()
+
+
+def iter_export(fmt, items, columns):
+    if fmt == "xlsx":
+        return iter_xlsx(items, columns)
+    return iter_csv(items, columns)
@@ -1,301 +1,869 @@
-from dataclasses import dataclass
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, date
-
-from ..ds.bst import BST
-from ..ds.linked_list import LinkedList
+import gc, os, sys
+import heapq
+from contextlib import contextmanager
+from bisect import bisect_right
+from itertools import islice
+from functools import lru_cache
+import threading
+from datetime import date, datetime
+
+from ..ds.avl import AVLTree
+from ..ds.inverted_index import InvertedIndex, intersect
+from ..ds.name_index import NameIndex
+from ..ds.expiry_index import ExpiryIndex
 from ..ds.stack import Stack, audit_event
+from ..storage.base import FIELDS, DATE_FIELDS, split_filters
+from ..storage.snapshot import read_snapshot, snapshot_generation, write_snapshot
+from .aggregates import Aggregates
+from ..core.metrics import SERVICE_SECONDS, SERVICE_ROWS
 
 def _parse_date(s: str):
     s = (s or "").strip()
     if not s:
         return None
+    if len(s) == 10 and s[4] == "-" and s[7] == "-":
+        try:
+            # caso normal: bastante más rápido que strptime
+            return date.fromisoformat(s)
+        except ValueError:
+            return None
     try:
+        # lo que strptime("%Y-%m-%d") acepta y fromisoformat no (p. ej. "2026-3-5")
         return datetime.strptime(s, "%Y-%m-%d").date()
-    except:
+    except ValueError:
         return None
 
 
-def _days_left(d):
-    if not d:
-        return None
-    return (d - date.today()).days
+# =========================
+# NORMALIZACIÓN
+# =========================
+
+def normalize_network_user(data: dict, status="ACTIVE"):
+    # fila lista para guardar a partir de un formulario o una fila importada;
+    # status=None respeta la columna status de `data` (ACTIVE por defecto)
+    usuario_red = (data.get("usuario_red") or "").strip().lower()
+    if not usuario_red:
+        raise ValueError("usuario_red es obligatorio.")
+
+    def norm(v): return (v or "").strip()
+
+    row = {
+        "usuario_red": usuario_red,
+        "nombres": norm(data.get("nombres")),
+        "apellidos": norm(data.get("apellidos")),
+        "dni": norm(data.get("dni")),
+        "tipo_contrato": norm(data.get("tipo_contrato")).upper(),
+        "contrato_inicio": norm(data.get("contrato_inicio")),
+        "contrato_fin": norm(data.get("contrato_fin")),
+        "sede": norm(data.get("sede")),
+        "dependencia": norm(data.get("dependencia")),
+        "subdependencia": norm(data.get("subdependencia")),
+
+        "acceso_nivel": (norm(data.get("acceso_nivel")) or "NORMAL").upper(),
+        "acceso_redes_sociales": (norm(data.get("acceso_redes_sociales")) or "NO").upper(),
+        "permiso_inicio": norm(data.get("permiso_inicio")),
+        "permiso_fin": norm(data.get("permiso_fin")),
+
+        "vpn_activo": (norm(data.get("vpn_activo")) or "NO").upper(),
+        "vpn_inicio": norm(data.get("vpn_inicio")),
+        "vpn_fin": norm(data.get("vpn_fin")),
+
+        "permisos_activos": (norm(data.get("permisos_activos")) or "SI").upper(),
+        "status": status or (norm(data.get("status")) or "ACTIVE").upper(),
+    }
+
+    for f in DATE_FIELDS:
+        if row[f]:
+            d = _parse_date(row[f])
+            if not d:
+                raise ValueError(f"Fecha inválida en {f}: {row[f]!r} (formato AAAA-MM-DD).")
+            # se guarda siempre AAAA-MM-DD: los stores comparan las fechas como texto
+            row[f] = d.isoformat()
+    if row["status"] not in ("ACTIVE", "INACTIVE"):
+        raise ValueError(f"status inválido: {row['status']!r}.")
+
+    return row
+
+
+def _in_ranges(u, ranges):
+    # ranges: [(campo, op, ordinal)] ya convertidos; sin fecha no cumple
+    for field, op, value in ranges:
+        d = u.date_ordinal(field)
+        if d is None:
+            return False
+        if (op == "lte" and d > value) or (op == "gte" and d < value) \
+                or (op == "lt" and d >= value) or (op == "gt" and d <= value):
+            return False
+    return True
 
 
 # =========================
 # MODELOS
 # =========================
 
-@dataclass
-class AppUser:
-    username: str
-    password_hash: str
-    role: str
+# columnas con índice secundario (valor -> usuarios)
+INDEXED_FIELDS = ("sede", "dependencia", "subdependencia", "status")
+
+# tipo de alerta -> columna con la fecha de vencimiento
+EXPIRY_FIELDS = {
+    "CONTRATO": "contrato_fin",
+    "PERMISOS": "permiso_fin",
+    "VPN": "vpn_fin",
+}
+
+# campos que alimentan el índice de nombres
+_NAME_FIELDS = {"usuario_red", "nombres", "apellidos"}
+
+# vencimientos que se revocan solos cuando pasa la fecha (ver ExpirySweeper)
+REVOCATIONS = {
+    "VPN": {"vpn_activo": "NO"},
+    "PERMISOS": {"permisos_activos": "NO", "acceso_redes_sociales": "NO"},
+}
+
+# acciones en lote disponibles desde la CLI y la ruta /app/bulk
+BULK_ACTIONS = {
+    "deactivate": "deactivate_users",
+    "activate": "activate_users",
+    "perms_off": "deactivate_special_permissions_many",
+}
+
+
+# columnas tipo enum (sede, SI/NO, ACTIVE...): se internan para que todos los
+# usuarios compartan el mismo objeto str por valor
+INTERNED_FIELDS = (
+    "tipo_contrato", "sede", "dependencia", "subdependencia",
+    "acceso_nivel", "acceso_redes_sociales", "vpn_activo",
+    "permisos_activos", "status",
+)
+
+_INTERNED_SET = frozenset(INTERNED_FIELDS)
+_DATE_SET = frozenset(DATE_FIELDS)
+
+NETWORK_USER_DEFAULTS = {
+    "acceso_nivel": "NORMAL",
+    "acceso_redes_sociales": "NO",
+    "vpn_activo": "NO",
+    "permisos_activos": "SI",
+    "status": "ACTIVE",
+}
+
+
+@lru_cache(maxsize=8192)
+def _to_ordinal(s):
+    # "" -> 0, fecha ISO -> ordinal; un texto que no es fecha se guarda tal cual
+    if not s:
+        return 0
+    d = _parse_date(s)
+    return d.toordinal() if d else s
+
 
+def _date_property(field):
+    slot = "_" + field
 
-@dataclass
+    def get(self):
+        v = getattr(self, slot)
+        if v.__class__ is int:
+            return date.fromordinal(v).isoformat() if v else ""
+        return v
+
+    def set(self, value):
+        setattr(self, slot, _to_ordinal(value))
+
+    return property(get, set)
+
+
+# Registro compacto: __slots__ (sin __dict__ por usuario), columnas tipo enum
+# internadas y fechas guardadas como ordinales; las fechas se siguen leyendo y
+# escribiendo como texto ISO ("2026-03-31").
 class NetworkUser:
-    usuario_red: str = ""
-    nombres: str = ""
-    apellidos: str = ""
-    dni: str = ""
-    tipo_contrato: str = ""
-    contrato_inicio: str = ""
-    contrato_fin: str = ""
-    sede: str = ""
-    dependencia: str = ""
-    subdependencia: str = ""
-
-    acceso_nivel: str = "NORMAL"
-    acceso_redes_sociales: str = "NO"
-    permiso_inicio: str = ""
-    permiso_fin: str = ""
-
-    vpn_activo: str = "NO"
-    vpn_inicio: str = ""
-    vpn_fin: str = ""
-
-    permisos_activos: str = "SI"
-    status: str = "ACTIVE"
+    __slots__ = tuple("_" + f if f in DATE_FIELDS else f for f in FIELDS)
+
+    def __init__(self, **values):
+        get = values.get
+        for f in FIELDS:
+            v = get(f)
+            if v is None:
+                v = NETWORK_USER_DEFAULTS.get(f, "")
+            if f in _DATE_SET:
+                setattr(self, "_" + f, _to_ordinal(v))
+            elif f in _INTERNED_SET:
+                setattr(self, f, sys.intern(v))
+            else:
+                setattr(self, f, v)
+
+    def update(self, **changes):
+        for f, v in changes.items():
+            if f in INTERNED_FIELDS:
+                v = sys.intern(v)
+            setattr(self, f, v)
+
+    def date_ordinal(self, field):
+        v = getattr(self, "_" + field)
+        return v if v.__class__ is int and v else None
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in FIELDS}
+
+    def __eq__(self, other):
+        if not isinstance(other, NetworkUser):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    def __repr__(self):
+        return f"NetworkUser(usuario_red={self.usuario_red!r}, status={self.status!r})"
+
+
+for _f in DATE_FIELDS:
+    setattr(NetworkUser, _f, _date_property(_f))
+
+
+@contextmanager
+def _gc_paused():
+    # la carga crea cientos de miles de objetos que viven todo el proceso: sin
+    # esto el GC los recorre una y otra vez mientras se crean
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
 
 
 class UserService:
 
-    def __init__(self, store):
+    def __init__(self, store, audit=None, snapshot_path=None):
         self.store = store
-        self.audit = Stack()
-        self._bst = BST()
-        self._list = LinkedList()
+        self.audit = audit if audit is not None else Stack()
+        # snapshot binario de registros + índices (ver storage/snapshot.py)
+        self.snapshot_path = snapshot_path
+        self._lock = threading.RLock()
+        self._generation = None
+        # versión de los datos en memoria: sube con cada cambio (cachés, ETags)
+        self.version = 0
+        # distingue esta instancia (worker) en ETags construidos con version
+        self.instance_id = os.urandom(4).hex()
+        self._listeners = []
+        self._tree = AVLTree()
+        self._by_key = {}
+        self._by_field = {}
+        self._names = None        # NameIndex, se construye al primer uso
+        self._names_lock = threading.Lock()
+        self._names_dirty = None  # claves cambiadas mientras se construye
+        self._names_epoch = 0     # sube con cada recarga completa
+        self._expiry = {t: ExpiryIndex() for t in EXPIRY_FIELDS}
+        self._agg = Aggregates()
 
         self._load_network_users()
 
     
-        self.app_users = {
-            "admin": AppUser("admin", generate_password_hash("admin123"), "ADMIN"),
-            "consulta": AppUser("consulta", generate_password_hash("consulta123"), "CONSULTA"),
-        }
-
-
-    def validate_login(self, username, password):
-        username = (username or "").strip().lower()
-        u = self.app_users.get(username)
-        if not u:
-            return None
-        if not check_password_hash(u.password_hash, password):
-            return None
-        return u
-
     # ================= LOAD =================
 
+    @SERVICE_SECONDS.time(op="load")
     def _load_network_users(self):
-        self._bst = BST()
-        self._list = LinkedList()
+        loaded = None
+        with _gc_paused():
+            if self.snapshot_path:
+                loaded = self._load_snapshot()
+                if loaded:
+                    return
+
+            # la firma se toma antes de leer: lo que llegue durante la lectura se
+            # vuelve a aplicar en el próximo refresh (aplicar una fila es idempotente)
+            self._generation = self.store.generation()
+            by_key = {}
+
+            for r in self.store.iter_rows():
+                u = NetworkUser(**r)
+
+                if not u.usuario_red:
+                    continue
 
-        for r in self.store.read_all():
-            u = NetworkUser(**r)
+                key = u.usuario_red.strip().lower()
+                u.usuario_red = key
 
-            if not u.usuario_red:
-                continue
+                by_key[key] = u
+
+            self._build_indexes(by_key)
+
+        if self.snapshot_path:
+            # un snapshot ilegible puede conservar la cabecera (y la generación)
+            # intacta: se reescribe siempre para no repetir la carga completa
+            self.save_snapshot(force=loaded is None)
 
-            key = u.usuario_red.strip().lower()
-            u.usuario_red = key
+    # ================= SNAPSHOT =================
 
-            self._bst.insert(key, u)
-            self._list.append(u)
+    def _snapshot_source(self):
+        # un snapshot solo vale para el mismo store (tipo + archivo)
+        return (type(self.store).__name__, os.path.abspath(self.store.path))
 
-   
+    def _load_snapshot(self):
+        # True si cargó; False si es válido pero quedó viejo; None si falta o
+        # no se puede leer
+        snap = read_snapshot(self.snapshot_path, self._snapshot_source())
+        if snap is None:
+            return None
+        gen, (users, by_field, expiry, agg) = snap
+
+        # lo escrito en el store después del snapshot se aplica encima; si el
+        # store cambió por completo (p. ej. compactación) el snapshot no sirve
+        changes = self.store.changes_since(gen)
+        if changes is None:
+            return False
+
+        # users viene ordenado por usuario_red
+        self._tree = AVLTree.from_sorted([(u.usuario_red, u) for u in users])
+        self._by_key = {u.usuario_red: u for u in users}
+        self._by_field, self._expiry, self._agg = by_field, expiry, agg
+        self._reset_names()
+        rows, self._generation = changes
+        self._apply_rows(rows)
+        self._changed()
+        return True
+
+    @SERVICE_SECONDS.time(op="save_snapshot")
+    def save_snapshot(self, force=False):
+        # escribe el snapshot del estado actual si el que hay en disco es de
+        # otra generación (otro worker ya pudo escribir el mismo)
+        source = self._snapshot_source()
+        with self._lock:
+            gen = self._generation
+            if not force and snapshot_generation(self.snapshot_path, source) == gen:
+                return False
+            users = self._tree.values()
+            # sin el índice de nombres: construirlo al primer uso es más barato
+            # que deserializarlo en cada arranque
+            state = (users, self._by_field, self._expiry, self._agg)
+            write_snapshot(self.snapshot_path, source, gen, state, len(users))
+        return True
+
+    @SERVICE_SECONDS.time(op="index_rebuild")
+    def _build_indexes(self, by_key):
+        # un solo sort + construcción O(n) en vez de un insert por fila
+        self._tree = AVLTree.from_sorted(sorted(by_key.items()))
+        self._by_key = by_key
+
+        self._by_field = {f: InvertedIndex() for f in INDEXED_FIELDS}
+        self._agg = Aggregates()
+        for u in by_key.values():
+            self._index_user(u, bulk=True)
+
+        self._reset_names()
+        self._build_expiry()
+        self._changed()
+
+    # ================= ÍNDICE DE NOMBRES (DIFERIDO) =================
+
+    def _reset_names(self):
+        self._names = None
+        self._names_dirty = None
+        self._names_epoch += 1
+
+    # el índice de nombres es lo más caro de la carga (~40%): se construye la
+    # primera vez que se busca por nombre, o antes con warm_up(). La
+    # construcción corre fuera de self._lock (las escrituras y las demás
+    # consultas siguen); lo que cambió mientras tanto se aplica al final.
+    # Orden de locks: _names_lock -> _lock. No llamar con self._lock tomado:
+    # quien lo necesite resuelve el índice antes de entrar
+    def _name_index(self):
+        names = self._names
+        if names is not None:
+            return names
+        with self._names_lock:
+            if self._names is not None:
+                return self._names
+            with self._lock:
+                epoch = self._names_epoch
+                docs = [(k, f"{u.nombres} {u.apellidos}") for k, u in self._by_key.items()]
+                self._names_dirty = set()
+
+            with _gc_paused():
+                names = NameIndex.build((k, name, k) for k, name in docs)
+
+            with self._lock:
+                if epoch != self._names_epoch:
+                    # hubo una recarga completa: el índice ya no corresponde
+                    return names
+                for k in self._names_dirty:
+                    u = self._by_key.get(k)
+                    if u:
+                        names.add(k, f"{u.nombres} {u.apellidos}", k)
+                    else:
+                        names.remove(k)
+                self._names_dirty = None
+                self._names = names
+            return names
+
+    def warm_up(self):
+        # construye en un hilo lo diferido, para que la primera búsqueda no lo pague
+        threading.Thread(target=self._name_index, name="name-index", daemon=True).start()
+
+    # recarga solo si otro proceso escribió en el store desde la última lectura
+    @SERVICE_SECONDS.time(op="refresh")
+    def refresh(self):
+        with self._lock:
+            gen = self.store.generation()
+            if gen is None or gen == self._generation:
+                return False
+
+            changes = self.store.changes_since(self._generation)
+            if changes is None:
+                self._load_network_users()
+                return True
+
+            rows, self._generation = changes
+            self._apply_rows(rows)
+            self._changed()
+            return True
+
+    def _apply_rows(self, rows):
+        SERVICE_ROWS.inc(len(rows), op="refresh")
+        for r in rows:
+            if r.get("usuario_red"):
+                self._apply_row(r)
+
+    # ================= VERSIÓN / SUSCRIPTORES =================
+
+    def on_change(self, fn):
+        # fn(version) se llama tras cada cambio de datos (con el lock tomado)
+        self._listeners.append(fn)
+
+    def version_tag(self):
+        return f"{self.instance_id}.{self.version}"
+
+    def _changed(self):
+        self.version += 1
+        for fn in self._listeners:
+            fn(self.version)
+
+    # ================= ÍNDICES SECUNDARIOS =================
+
+    # names=False: el nombre no cambia y se deja el índice de nombres como está
+    # (es el más caro de mantener fila a fila)
+    def _index_user(self, u, bulk=False, names=True):
+        for f, idx in self._by_field.items():
+            idx.add(getattr(u, f), u.usuario_red)
+        self._agg.add(u)
+        if bulk:
+            # en la carga inicial nombres y vencimientos se construyen en bloque
+            return
+        if names:
+            self._name_changed(u.usuario_red, f"{u.nombres} {u.apellidos}")
+        for tipo, d in self._expiry_dates(u):
+            self._expiry[tipo].add(u.usuario_red, d)
+
+    def _unindex_user(self, u, bulk=False, names=True):
+        for f, idx in self._by_field.items():
+            idx.remove(getattr(u, f), u.usuario_red)
+        self._agg.remove(u)
+        if bulk:
+            return
+        if names:
+            self._name_changed(u.usuario_red, None)
+        for idx in self._expiry.values():
+            idx.remove(u.usuario_red)
+
+    def _name_changed(self, key, name):
+        # name=None: baja del índice (la fila se vuelve a indexar enseguida)
+        if self._names is not None:
+            if name is None:
+                self._names.remove(key)
+            else:
+                self._names.add(key, name, key)
+        elif self._names_dirty is not None:
+            self._names_dirty.add(key)
+
+    def _build_expiry(self):
+        expiring = {t: [] for t in EXPIRY_FIELDS}
+        for u in self._by_key.values():
+            for tipo, d in self._expiry_dates(u):
+                expiring[tipo].append((u.usuario_red, d))
+        self._expiry = {t: ExpiryIndex.build(pairs) for t, pairs in expiring.items()}
+
+    def _expiry_dates(self, u):
+        # (tipo, ordinal) de los vencimientos a vigilar para u. El contrato solo
+        # si está activo; VPN y permisos mientras sigan otorgados aunque el
+        # usuario esté inactivo, porque revoke_expired los tiene que apagar igual
+        for tipo, field in EXPIRY_FIELDS.items():
+            if tipo == "CONTRATO" and u.status != "ACTIVE":
+                continue
+            if tipo == "PERMISOS" and u.permisos_activos != "SI":
+                continue
+            if tipo == "VPN" and u.vpn_activo != "SI":
+                continue
+            d = u.date_ordinal(field)
+            if d:
+                yield tipo, d
 
     def bst_metrics(self):
-        return {"comparisons": getattr(self._bst, "last_comparisons", 0)}
+        return {
+            "comparisons": self._tree.last_comparisons,
+            "height": self._tree.height(),
+            "size": len(self._tree),
+        }
 
   
 
-    def _upsert_row(self, usuario_red: str, new_row: dict):
-        rows = self.store.read_all()
-        found = False
-        for row in rows:
-            if (row.get("usuario_red") or "").strip().lower() == usuario_red:
-                row.update(new_row)
-                found = True
-                break
-        if not found:
-            rows.append(new_row)
-        self.store.write_all(rows)
-        self._load_network_users()
+    # ================= PERSISTENCIA =================
+
+    def _persist(self, u):
+        self.store.upsert(u.to_dict())
+        self._changed()
+
+    @contextmanager
+    def _writing(self):
+        # los cambios parciales se persisten como fila completa: con el lock
+        # del store tomado se trae primero lo que escribieron otros workers,
+        # si no se guardaría encima una copia vieja del registro.
+        # Orden: self._lock -> lock del store (refresh() también lo sigue)
+        with self._lock, self.store.write_lock():
+            self.refresh()
+            yield
+            # con el lock del store tomado nadie más escribió: lo que hay en
+            # disco es lo ya aplicado más lo propio, y el próximo refresh no
+            # vuelve a aplicar (ni a contar como cambio) las escrituras propias
+            self._generation = self.store.generation()
+
+    def _update_user(self, usuario_red, **changes):
+        with self._writing():
+            u = self._tree.search((usuario_red or "").strip().lower())
+            if not u:
+                raise ValueError("Usuario no existe.")
+            names = not _NAME_FIELDS.isdisjoint(changes)
+            self._unindex_user(u, names=names)
+            u.update(**changes)
+            self._index_user(u, names=names)
+            self._persist(u)
+            return u
+
+    def _apply_row(self, row):
+        # alta o actualización en memoria (árbol + índices) de una fila del store
+        usuario_red = row["usuario_red"].strip().lower()
+        u = self._tree.search(usuario_red)
+        if u:
+            self._unindex_user(u)
+            u.update(**row)
+            u.usuario_red = usuario_red
+        else:
+            u = NetworkUser(**row)
+            u.usuario_red = usuario_red
+            self._tree.insert(usuario_red, u)
+            self._by_key[usuario_red] = u
+        self._index_user(u)
+        return u
 
     # ================= CRUD =================
 
     def register_network_user(self, data: dict, actor="admin"):
-        usuario_red = (data.get("usuario_red") or "").strip().lower()
-        if not usuario_red:
-            raise ValueError("usuario_red es obligatorio.")
-
-        def norm(v): return (v or "").strip()
-
-        new_row = {
-            "usuario_red": usuario_red,
-            "nombres": norm(data.get("nombres")),
-            "apellidos": norm(data.get("apellidos")),
-            "dni": norm(data.get("dni")),
-            "tipo_contrato": norm(data.get("tipo_contrato")).upper(),
-            "contrato_inicio": norm(data.get("contrato_inicio")),
-            "contrato_fin": norm(data.get("contrato_fin")),
-            "sede": norm(data.get("sede")),
-            "dependencia": norm(data.get("dependencia")),
-            "subdependencia": norm(data.get("subdependencia")),
-
-            "acceso_nivel": (norm(data.get("acceso_nivel")) or "NORMAL").upper(),
-            "acceso_redes_sociales": (norm(data.get("acceso_redes_sociales")) or "NO").upper(),
-            "permiso_inicio": norm(data.get("permiso_inicio")),
-            "permiso_fin": norm(data.get("permiso_fin")),
-
-            "vpn_activo": (norm(data.get("vpn_activo")) or "NO").upper(),
-            "vpn_inicio": norm(data.get("vpn_inicio")),
-            "vpn_fin": norm(data.get("vpn_fin")),
-
-            "permisos_activos": (norm(data.get("permisos_activos")) or "SI").upper(),
-            "status": "ACTIVE",
-        }
-
-        self._upsert_row(usuario_red, new_row)
-        self.audit.push(audit_event(f"Registrado/actualizado {usuario_red}", actor))
+        new_row = normalize_network_user(data)
+        usuario_red = new_row["usuario_red"]
+
+        with self._writing():
+            u = self._apply_row(new_row)
+            self._persist(u)
+        self.audit.push(audit_event(f"Registrado/actualizado {usuario_red}", actor, usuario_red))
+
+    # ================= IMPORTACIÓN MASIVA =================
+
+    @SERVICE_SECONDS.time(op="import_rows")
+    def import_rows(self, rows, actor="admin"):
+        # rows: iterable de (n° de línea, dict). Valida y normaliza cada fila
+        # como register_network_user, y aplica el lote con una sola escritura.
+        valid, errors, total = {}, [], 0
+        for line, data in rows:
+            total += 1
+            try:
+                row = normalize_network_user(data, status=None)
+            except ValueError as e:
+                errors.append({"linea": line, "usuario_red": (data.get("usuario_red") or "").strip(), "error": str(e)})
+                continue
+            valid[row["usuario_red"]] = row
+
+        if valid:
+            with self._writing():
+                self.store.upsert_many(valid.values())
+
+                # lotes grandes: reconstruir índices en bloque (O(n)) es más
+                # barato que mantenerlos fila por fila
+                if len(valid) > max(1000, len(self._by_key) // 10):
+                    by_key = self._by_key
+                    for key, row in valid.items():
+                        u = by_key.get(key)
+                        if u:
+                            u.update(**row)
+                        else:
+                            by_key[key] = NetworkUser(**row)
+                    self._build_indexes(by_key)
+                else:
+                    for row in valid.values():
+                        self._apply_row(row)
+                    self._changed()
+
+            self.audit.push(audit_event(f"Importación masiva: {len(valid)} usuarios", actor))
+
+        return {"total": total, "importados": len(valid), "errores": errors}
+
+    # ================= ACCIONES EN LOTE =================
+
+    def select_users(self, usuarios=None, **filters):
+        # claves que cumplen la lista y/o los filtros (igualdad por columna y
+        # rangos de fecha: contrato_fin_lt="2026-01-01")
+        equals, ranges = split_filters(filters)
+        if usuarios is None and not equals and not ranges:
+            raise ValueError("Indica usuarios o al menos un filtro.")
+
+        parsed = [(f, op, _parse_date(v)) for f, op, v in ranges]
+        if any(d is None for _, _, d in parsed):
+            raise ValueError("Fecha inválida en el filtro (formato AAAA-MM-DD).")
+
+        with self._lock:
+            postings = [self._by_field[f].get(v) for f, v in equals.items() if f in self._by_field]
+            if usuarios is not None:
+                postings.append({(k or "").strip().lower() for k in usuarios} & self._by_key.keys())
+            if parsed and self.store.pushdown:
+                # los rangos de fecha no tienen índice en memoria: el store los
+                # resuelve con los suyos (SQL) en vez de recorrer los candidatos.
+                # Lo que devuelve se vuelve a comprobar abajo contra memoria
+                found = self.store.find(**{f"{f}_{op}": d.isoformat() for f, op, d in parsed})
+                postings.append({r["usuario_red"] for r in found} & self._by_key.keys())
+            keys = intersect(postings) if postings else self._by_key.keys()
+
+            others = [(f, v) for f, v in equals.items() if f not in self._by_field]
+            ranges = [(f, op, d.toordinal()) for f, op, d in parsed]
+
+            out = []
+            for k in keys:
+                u = self._by_key[k]
+                if others and any(getattr(u, f) != v for f, v in others):
+                    continue
+                if ranges and not _in_ranges(u, ranges):
+                    continue
+                out.append(k)
+            return sorted(out)
+
+    @SERVICE_SECONDS.time(op="batch_update")
+    def _update_many(self, keys, **changes):
+        # un solo upsert_many (una transacción / un append al journal) y una
+        # sola notificación de cambio para todo el lote
+        names = not _NAME_FIELDS.isdisjoint(changes)
+        with self._writing():
+            # lotes grandes: los vencimientos se reconstruyen en bloque al final
+            bulk = not names and len(keys) > max(1000, len(self._by_key) // 20)
+            updated = []
+            for k in keys:
+                u = self._by_key.get(k)
+                if u is None or all(getattr(u, f) == v for f, v in changes.items()):
+                    continue
+                self._unindex_user(u, bulk=bulk, names=names)
+                u.update(**changes)
+                self._index_user(u, bulk=bulk, names=names)
+                updated.append(u)
+
+            if bulk:
+                self._build_expiry()
+            if updated:
+                self.store.upsert_many([u.to_dict() for u in updated])
+                self._changed()
+            return updated
+
+    def _bulk(self, label, changes, usuarios, filters, actor):
+        with self._writing():
+            keys = self.select_users(usuarios, **filters)
+            updated = self._update_many(keys, **changes)
+
+        if updated:
+            criteria = ", ".join(f"{k}={v}" for k, v in filters.items() if v)
+            if usuarios is not None:
+                criteria = ", ".join(filter(None, [f"{len(usuarios)} indicados", criteria]))
+            self.audit.push(audit_event(f"{label} en lote: {len(updated)} usuarios ({criteria})", actor))
+
+        missing = []
+        if usuarios is not None:
+            missing = sorted({(k or "").strip().lower() for k in usuarios} - self._by_key.keys())
+        return {"seleccionados": len(keys), "actualizados": [u.usuario_red for u in updated], "no_existen": missing}
+
+    def deactivate_users(self, usuarios=None, actor="admin", **filters):
+        return self._bulk("Desactivados", {"status": "INACTIVE"}, usuarios, filters, actor)
+
+    def activate_users(self, usuarios=None, actor="admin", **filters):
+        return self._bulk("Reactivados", {"status": "ACTIVE"}, usuarios, filters, actor)
+
+    def deactivate_special_permissions_many(self, usuarios=None, actor="admin", **filters):
+        changes = {"permisos_activos": "NO", "vpn_activo": "NO", "acceso_redes_sociales": "NO"}
+        return self._bulk("Permisos especiales apagados", changes, usuarios, filters, actor)
 
     def deactivate_user(self, usuario_red, actor="admin"):
-        usuario_red = (usuario_red or "").strip().lower()
-        rows = self.store.read_all()
-        ok = False
-        for row in rows:
-            if (row.get("usuario_red") or "").strip().lower() == usuario_red:
-                row["status"] = "INACTIVE"
-                ok = True
-                break
-        if not ok:
-            raise ValueError("Usuario no existe.")
-        self.store.write_all(rows)
-        self._load_network_users()
-        self.audit.push(audit_event(f"Desactivado usuario {usuario_red}", actor))
+        u = self._update_user(usuario_red, status="INACTIVE")
+        self.audit.push(audit_event(f"Desactivado usuario {u.usuario_red}", actor, u.usuario_red))
 
     def activate_user(self, usuario_red, actor="admin"):
-        usuario_red = (usuario_red or "").strip().lower()
-        rows = self.store.read_all()
-        ok = False
-        for row in rows:
-            if (row.get("usuario_red") or "").strip().lower() == usuario_red:
-                row["status"] = "ACTIVE"
-                ok = True
-                break
-        if not ok:
-            raise ValueError("Usuario no existe.")
-        self.store.write_all(rows)
-        self._load_network_users()
-        self.audit.push(audit_event(f"Reactivado usuario {usuario_red}", actor))
+        u = self._update_user(usuario_red, status="ACTIVE")
+        self.audit.push(audit_event(f"Reactivado usuario {u.usuario_red}", actor, u.usuario_red))
 
     def deactivate_special_permissions(self, usuario_red, actor="admin"):
-        usuario_red = (usuario_red or "").strip().lower()
-        rows = self.store.read_all()
-        ok = False
-
-        for row in rows:
-            if (row.get("usuario_red") or "").strip().lower() == usuario_red:
-                row["permisos_activos"] = "NO"
-                row["vpn_activo"] = "NO"
-                row["acceso_redes_sociales"] = "NO"
-                ok = True
-                break
-
-        if not ok:
-            raise ValueError("Usuario no existe.")
-
-        self.store.write_all(rows)
-        self._load_network_users()
-        self.audit.push(audit_event(f"Permisos especiales apagados {usuario_red}", actor))
+        u = self._update_user(
+            usuario_red,
+            permisos_activos="NO",
+            vpn_activo="NO",
+            acceso_redes_sociales="NO",
+        )
+        self.audit.push(audit_event(f"Permisos especiales apagados {u.usuario_red}", actor, u.usuario_red))
 
 
 
     def get_network_user(self, usuario_red):
-        return self._bst.search((usuario_red or "").strip().lower())
+        return self._tree.search((usuario_red or "").strip().lower())
 
     def total_network_users(self):
-        return sum(1 for u in self._list.to_list() if u.status == "ACTIVE")
+        return self._agg.get("status", "ACTIVE")
 
     # ================= FILTROS =================
 
-    def filter_users(self, nombre=None, sede=None, dependencia=None, subdependencia=None):
-        results = []
-
-        nombre = (nombre or "").strip().lower()
-        sede = (sede or "").strip()
-        dependencia = (dependencia or "").strip()
-        subdependencia = (subdependencia or "").strip()
+    def _postings(self, status="ACTIVE", **equals):
+        # posting sets de los filtros por igualdad (vacíos se ignoran)
+        postings = [self._by_field["status"].get(status)] if status else []
+        for f, v in equals.items():
+            v = (v or "").strip()
+            if v:
+                postings.append(self._by_field[f].get(v))
+        return postings
 
-        for u in self._list.to_list():
-            if u.status != "ACTIVE":
-                continue
+    @SERVICE_SECONDS.time(op="filter_users")
+    def filter_users(self, nombre=None, sede=None, dependencia=None, subdependencia=None):
+        nombre = (nombre or "").strip()
+        names = self._name_index() if nombre else None
+        with self._lock:
+            postings = self._postings(sede=sede, dependencia=dependencia, subdependencia=subdependencia)
+            SERVICE_ROWS.inc(min(map(len, postings)), op="filter_users")
 
             if nombre:
-                full = f"{u.nombres} {u.apellidos}".lower()
-                if nombre not in full and nombre not in (u.usuario_red or ""):
-                    continue
+                # el índice de nombres ya devuelve las claves ordenadas por relevancia
+                ranked = names.search(nombre)
+                postings.append(set(ranked))
+                keys = intersect(postings)
+                return [self._by_key[k] for k in ranked if k in keys]
+
+            return [self._by_key[k] for k in sorted(intersect(postings))]
+
+    @SERVICE_SECONDS.time(op="page_users")
+    def page_users(self, after=None, limit=100, status="ACTIVE", nombre=None,
+                   sede=None, dependencia=None, subdependencia=None, keys=None):
+        # paginación por clave (keyset): hasta `limit` usuarios con usuario_red
+        # > after, en orden. Devuelve (usuarios, cursor de la página siguiente o None).
+        # keys: restringe a esas claves (p. ej. el resultado de select_users)
+        after = (after or "").strip().lower()
+        lo = after + "\0" if after else None
+        nombre = (nombre or "").strip()
+        names = self._name_index() if nombre else None
+
+        with self._lock:
+            postings = self._postings(status, sede=sede, dependencia=dependencia, subdependencia=subdependencia)
+            if nombre:
+                # `names` se resolvió fuera del lock: si justo hubo una recarga
+                # completa puede traer claves que ya no existen
+                postings.append(set(names.search(nombre)) & self._by_key.keys())
+            if keys is not None:
+                postings.append(keys)
+
+            if not postings:
+                it = (u for _, u in self._tree.items(lo))
+            else:
+                # un solo filtro: se usa el posting set tal cual, sin copiarlo
+                keys = postings[0] if len(postings) == 1 else intersect(postings)
+                if len(keys) * 8 < len(self._by_key):
+                    # pocos candidatos: ordenarlos es más barato que recorrer el árbol
+                    ordered = sorted(keys)
+                    start = bisect_right(ordered, after) if after else 0
+                    it = (self._by_key[k] for k in ordered[start:])
+                else:
+                    it = (u for k, u in self._tree.items(lo) if k in keys)
+            page = list(islice(it, limit + 1))
+
+        if len(page) > limit:
+            return page[:limit], page[limit - 1].usuario_red
+        return page, None
+
+    def count_users(self, status="ACTIVE", nombre=None, sede=None, dependencia=None, subdependencia=None):
+        nombre = (nombre or "").strip()
+        names = self._name_index() if nombre else None
+        with self._lock:
+            postings = self._postings(status, sede=sede, dependencia=dependencia, subdependencia=subdependencia)
+            if nombre:
+                # `names` se resolvió fuera del lock: si justo hubo una recarga
+                # completa puede traer claves que ya no existen
+                postings.append(set(names.search(nombre)) & self._by_key.keys())
+            if not postings:
+                return len(self._by_key)
+            return len(postings[0]) if len(postings) == 1 else len(intersect(postings))
+
+    @SERVICE_SECONDS.time(op="suggest_users")
+    def suggest_users(self, q, limit=10):
+        # autocompletado: mejores coincidencias por nombre o usuario_red
+        names = self._name_index()
+        with self._lock:
+            return [self._by_key[k] for k in names.search(q, limit=limit) if k in self._by_key]
 
-            if sede and u.sede != sede:
-                continue
-            if dependencia and u.dependencia != dependencia:
-                continue
-            if subdependencia and u.subdependencia != subdependencia:
-                continue
+    # ================= ALERTAS =================
 
-            results.append(u)
+    @SERVICE_SECONDS.time(op="expiring_alerts")
+    def expiring_alerts(self, days=15):
+        today = date.today().toordinal()
+
+        def alerts_for(tipo):
+            field = EXPIRY_FIELDS[tipo]
+            for d, key in self._expiry[tipo].upto(today + days):
+                u = self._by_key[key]
+                # las alertas son solo de usuarios activos
+                if u.status != "ACTIVE":
+                    continue
+                yield {"tipo": tipo, "u": u, "dias": d - today, "vence": getattr(u, field)}
 
-        return results
+        # cada índice ya viene ordenado por fecha: basta con mezclarlos
+        alerts = list(heapq.merge(*(alerts_for(t) for t in EXPIRY_FIELDS), key=lambda a: a["dias"]))
+        SERVICE_ROWS.inc(len(alerts), op="expiring_alerts")
+        return alerts
 
-    # ================= ALERTAS =================
 
-    def expiring_alerts(self, days=15):
-        alerts = []
 
-        for u in self._list.to_list():
-            if u.status != "ACTIVE":
-                continue
+    # ================= REVOCACIÓN AUTOMÁTICA =================
 
-            # contrato
-            cfin = _parse_date(u.contrato_fin)
-            left = _days_left(cfin)
-            if left is not None and left <= days:
-                alerts.append({"tipo": "CONTRATO", "u": u, "dias": left, "vence": u.contrato_fin})
-
-            # permisos
-            if u.permisos_activos == "SI":
-                pfin = _parse_date(u.permiso_fin)
-                leftp = _days_left(pfin)
-                if leftp is not None and leftp <= days:
-                    alerts.append({"tipo": "PERMISOS", "u": u, "dias": leftp, "vence": u.permiso_fin})
-
-            # vpn
-            if u.vpn_activo == "SI":
-                vfin = _parse_date(u.vpn_fin)
-                leftv = _days_left(vfin)
-                if leftv is not None and leftv <= days:
-                    alerts.append({"tipo": "VPN", "u": u, "dias": leftv, "vence": u.vpn_fin})
-
-        alerts.sort(key=lambda x: x["dias"])  # menor días primero
-        return alerts
+    def next_revocation(self):
+        # ordinal de la fecha de fin más próxima entre VPN y permisos activos
+        firsts = [self._expiry[t].first() for t in REVOCATIONS]
+        firsts = [f[0] for f in firsts if f]
+        return min(firsts) if firsts else None
 
+    def revoke_expired(self, today=None, actor="sistema"):
+        # apaga VPN / permisos cuya fecha de fin ya pasó (vence el día siguiente
+        # a la fecha de fin). Devuelve {tipo: (revocados, fecha de fin más antigua)}
+        today = (today or date.today()).toordinal()
+        out = {}
+        for tipo, changes in REVOCATIONS.items():
+            with self._writing():
+                due = self._expiry[tipo].upto(today - 1)
+                updated = self._update_many([k for _, k in due], **changes)
+            if updated:
+                self.audit.push(audit_event(
+                    f"Vencimiento {tipo}: revocado automáticamente a {len(updated)} usuarios", actor
+                ))
+            out[tipo] = (len(updated), due[0][0] if due else None)
+        return out
 
+    # ================= ESTADÍSTICAS =================
 
     def count_by_sede(self):
-        counts = {}
-        for u in self._list.to_list():
-            if u.status != "ACTIVE":
-                continue
-            s = (u.sede or "SIN SEDE").strip() or "SIN SEDE"
-            counts[s] = counts.get(s, 0) + 1
-        return dict(sorted(counts.items(), key=lambda kv: kv[1], reverse=True))
+        return self._agg.sorted_counts("sede")
 
     def count_by_contrato(self):
-        counts = {}
-        for u in self._list.to_list():
-            if u.status != "ACTIVE":
-                continue
-            t = (u.tipo_contrato or "SIN TIPO").strip().upper() or "SIN TIPO"
-            counts[t] = counts.get(t, 0) + 1
-        return dict(sorted(counts.items(), key=lambda kv: kv[1], reverse=True))
\ No newline at end of file
+        return self._agg.sorted_counts("contrato")
+
+    def count_by_status(self):
+        return self._agg.sorted_counts("status")
+
+    def count_by_acceso_nivel(self):
+        return self._agg.sorted_counts("acceso_nivel")
+
+    def check_aggregates(self):
+        # {} si los contadores incrementales coinciden con un recálculo completo
+        with self._lock:
+            return self._agg.verify(self._by_key.values())
@@ -0,0 +1,37 @@
+import csv, os
+
+from .csv_store import file_signature, write_csv_atomic
+from .file_lock import FileLock
+
+APP_USER_FIELDS = ["username", "password_hash", "rol", "estado", "creado_en"]
+
+
+# Cuentas del sistema (data/usuarios_sistema.csv) con el hash ya calculado.
+# Es un archivo chico: cada cambio lo reescribe completo (temp + rename).
+class AppUserStore:
+    def __init__(self, path):
+        self.path = path
+        self._locked = FileLock(path + ".lock")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def read_all(self):
+        with self._locked(shared=True):
+            if not os.path.exists(self.path):
+                return []
+            with open(self.path, "r", newline="", encoding="utf-8") as f:
+                return [
+                    {k: (row.get(k) or "").strip() for k in APP_USER_FIELDS}
+                    for row in csv.DictReader(f)
+                    if (row.get("username") or "").strip()
+                ]
+
+    def upsert_many(self, rows):
+        # rows: dicts con APP_USER_FIELDS; username es la clave
+        with self._locked():
+            by_name = {r["username"]: r for r in self.read_all()}
+            for r in rows:
+                by_name[r["username"]] = {**by_name.get(r["username"], {}), **r}
+            write_csv_atomic(self.path, APP_USER_FIELDS, by_name.values())
+
+    def generation(self):
+        return file_signature(self.path)
@@ -0,0 +1,252 @@
+import atexit, csv, io, logging, os, threading
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+
+from ..ds.stack import AuditEvent
+from .file_lock import FileLock
+
+log = logging.getLogger(__name__)
+
+AUDIT_FIELDS = ["fecha", "usuario", "accion", "detalle"]
+
+
+def _clean(v):
+    # un evento = una línea: así cada offset apunta a un registro completo
+    return (v or "").replace("\r", " ").replace("\n", " ")
+
+
+def _target(detalle):
+    # filas antiguas: "mgonzales->INACTIVO"; nuevas: solo el usuario_red
+    return (detalle or "").split("->", 1)[0].strip().lower()
+
+
+def _event(row):
+    return AuditEvent(ts=row[0], actor=row[1], action=row[2], target=_target(row[3]))
+
+
+def _lines(f, offset):
+    # (inicio, fin, fila o None) de cada línea completa desde `offset`; una
+    # línea a medio escribir (otro worker) se deja para la próxima vez
+    f.seek(offset)
+    for raw in f:
+        if not raw.endswith(b"\n"):
+            return
+        row = next(csv.reader([raw.decode("utf-8", "replace")]), None)
+        if not row or row == AUDIT_FIELDS or len(row) < 4:
+            row = None
+        yield offset, offset + len(raw), row
+        offset += len(raw)
+
+
+# Auditoría persistente en data/auditoria.csv (append-only).
+#
+# - push() deja el evento en un buffer; un hilo de fondo lo escribe en lotes
+#   con un solo fsync cada `flush_interval` segundos (o al llegar a `batch`).
+# - latest(n) sale de un ring buffer en memoria con los últimos eventos.
+# - by_actor / by_usuario / between usan índices de offsets en el archivo:
+#   solo se leen del disco las líneas que coinciden.
+#
+# Los índices están acotados aunque el archivo crezca sin límite: por actor y
+# por usuario se guardan los últimos `key_limit` offsets (by_actor/by_usuario
+# devuelven como mucho eso; la ruta de consulta ya limita a 1000), y por fecha
+# los `time_limit` eventos más recientes. Un between() que llega a fechas que
+# ya salieron del índice recorre el archivo.
+class AuditLog:
+    def __init__(self, path, ring_size=200, batch=50, flush_interval=1.0,
+                 key_limit=1000, time_limit=200_000):
+        self.path = path
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.key_limit = key_limit
+        self.time_limit = time_limit
+        self._locked = FileLock(path + ".lock")
+        self._buffer = []
+        self._buf_lock = threading.Lock()
+        self._idx_lock = threading.RLock()
+        self._wake = threading.Event()
+
+        self._ring = deque(maxlen=ring_size)
+        self._by_actor = {}       # actor -> [offset]
+        self._by_target = {}      # usuario_red -> [offset]
+        self._by_time = []        # [(fecha, offset)] ordenado
+        self._time_floor = None   # mayor (fecha, offset) que salió de _by_time
+        self._indexed_upto = 0
+        self._version = 0         # sube con cada evento nuevo (propio o de otro worker)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._locked():
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                with open(path, "w", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerow(AUDIT_FIELDS)
+
+        self._thread = None
+        atexit.register(self.flush)
+
+    def start(self):
+        # arranca el hilo de escritura en este proceso (ver create_app). El
+        # archivo existente se indexa en ese hilo (~1 s por cada 200k eventos)
+        # y no en el arranque; una consulta que llegue antes espera a que
+        # termine (_catch_up toma _idx_lock). Sin hilo, push() queda en el
+        # buffer hasta el flush de salida
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._flusher, name="audit-flusher", daemon=True)
+            self._thread.start()
+        return self
+
+    # ================= ESCRITURA =================
+
+    def push(self, event):
+        with self._buf_lock:
+            self._buffer.append(event)
+            self._version += 1
+            full = len(self._buffer) >= self.batch
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        with self._buf_lock:
+            pending, self._buffer = self._buffer, []
+        if not pending:
+            return
+
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        for e in pending:
+            w.writerow([_clean(e.ts), _clean(e.actor), _clean(e.action), _clean(e.target)])
+
+        try:
+            with self._locked():
+                with open(self.path, "a", newline="", encoding="utf-8") as f:
+                    f.write(buf.getvalue())
+                    f.flush()
+                    os.fsync(f.fileno())
+        except BaseException:
+            # vuelven al buffer para el próximo intento
+            with self._buf_lock:
+                self._buffer[:0] = pending
+            raise
+        self._catch_up()
+
+    def _flusher(self):
+        # ningún error (disco lleno, permisos, un archivo dañado...) puede
+        # terminar el hilo: se registra y se reintenta en la siguiente vuelta
+        try:
+            self._catch_up()
+        except Exception:
+            log.exception("No se pudo indexar la auditoría %s", self.path)
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("No se pudo escribir la auditoría %s", self.path)
+
+    # ================= ÍNDICE =================
+
+    # indexa lo que se agregó al archivo desde la última vez (propio o de otros
+    # workers); solo guarda offsets y los últimos eventos del ring
+    def _catch_up(self):
+        with self._idx_lock:
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                return
+            if size <= self._indexed_upto:
+                return
+
+            with self._locked(shared=True), open(self.path, "rb") as f:
+                for start, end, row in _lines(f, self._indexed_upto):
+                    if row:
+                        self._index_row(row, start)
+                    self._indexed_upto = end
+
+    def _index_row(self, row, offset):
+        e = _event(row)
+        self._add_offset(self._by_actor, e.actor, offset)
+        if e.target:
+            self._add_offset(self._by_target, e.target, offset)
+        insort(self._by_time, (e.ts, offset))
+        # se recorta en tandas para no pagar un del por cada evento
+        if len(self._by_time) > self.time_limit + self.time_limit // 4:
+            cut = len(self._by_time) - self.time_limit
+            floor = self._by_time[cut - 1]
+            self._time_floor = max(self._time_floor or floor, floor)
+            del self._by_time[:cut]
+        self._ring.append(e)
+        self._version += 1
+
+    def _add_offset(self, index, key, offset):
+        offsets = index.setdefault(key, [])
+        offsets.append(offset)
+        if len(offsets) > 2 * self.key_limit:
+            del offsets[:-self.key_limit]
+
+    def _read_at(self, offsets):
+        out = []
+        with open(self.path, "rb") as f:
+            for off in offsets:
+                f.seek(off)
+                row = next(csv.reader([f.readline().decode("utf-8")]))
+                out.append(_event(row))
+        return out
+
+    # ================= CONSULTAS =================
+
+    def version(self):
+        # para cachés: cambia si hay eventos nuevos en el buffer o en el archivo
+        self._catch_up()
+        return self._version
+
+    def latest(self, n=10):
+        # incluye lo que aún está en el buffer (sin escribir) de este proceso
+        self._catch_up()
+        with self._buf_lock:
+            out = self._buffer[::-1][:n]
+        with self._idx_lock:
+            k = min(n - len(out), len(self._ring))
+            out.extend(self._ring[-i] for i in range(1, k + 1))
+        return out
+
+    def to_list(self):
+        return self.latest(len(self._ring))
+
+    def by_actor(self, actor, limit=100):
+        self._catch_up()
+        with self._idx_lock:
+            offsets = self._by_actor.get(actor, [])[-limit:]
+        return self._read_at(reversed(offsets))
+
+    def by_usuario(self, usuario_red, limit=100):
+        self._catch_up()
+        with self._idx_lock:
+            offsets = self._by_target.get((usuario_red or "").strip().lower(), [])[-limit:]
+        return self._read_at(reversed(offsets))
+
+    def between(self, start, end, limit=1000):
+        # fechas como texto "YYYY-MM-DD[ HH:MM[:SS]]"; end inclusivo por prefijo
+        self._catch_up()
+        lo_key, hi_key = (start,), (end + "\U0010ffff",)
+        with self._idx_lock:
+            if self._time_floor is None or lo_key > self._time_floor:
+                lo = bisect_left(self._by_time, lo_key)
+                hi = bisect_right(self._by_time, hi_key)
+                entries = self._by_time[lo:hi][-limit:]
+            else:
+                entries, upto = None, self._indexed_upto
+        if entries is None:
+            # el rango llega a eventos que ya salieron del índice
+            entries = self._scan_time(lo_key, hi_key, upto)[-limit:]
+        return self._read_at(off for _, off in reversed(entries))
+
+    def _scan_time(self, lo_key, hi_key, upto):
+        # [(fecha, offset)] ordenado con lo_key <= (fecha, offset) <= hi_key
+        found = []
+        with self._locked(shared=True), open(self.path, "rb") as f:
+            for start, end, row in _lines(f, 0):
+                if end > upto:
+                    break
+                if row and lo_key <= (row[0], start) <= hi_key:
+                    found.append((row[0], start))
+        found.sort()
+        return found
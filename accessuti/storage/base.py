@@ -0,0 +1,121 @@
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+
+FIELDS = [
+    "usuario_red",
+    "nombres",
+    "apellidos",
+    "dni",
+    "tipo_contrato",
+    "contrato_inicio",
+    "contrato_fin",
+    "sede",
+    "dependencia",
+    "subdependencia",
+
+    # Permisos especiales
+    "acceso_nivel",            # LIBRE | COMUN | NORMAL
+    "acceso_redes_sociales",   # SI | NO
+    "permiso_inicio",
+    "permiso_fin",
+
+    # VPN
+    "vpn_activo",              # SI | NO
+    "vpn_inicio",
+    "vpn_fin",
+
+    # Estados
+    "permisos_activos",        # SI | NO
+    "status"                   # ACTIVE | INACTIVE
+]
+
+# columnas de fecha que aceptan filtros "<campo>_lte" / "_gte" / "_lt" / "_gt" en find()
+DATE_FIELDS = (
+    "contrato_inicio", "contrato_fin",
+    "permiso_inicio", "permiso_fin",
+    "vpn_inicio", "vpn_fin",
+)
+
+
+RANGE_OPS = {"lte": "<=", "gte": ">=", "lt": "<", "gt": ">"}
+
+
+def split_filters(filters):
+    # {"sede": "X", "contrato_fin_lte": "2026-01-01"} -> (iguales, [(campo, op, valor)])
+    equals, ranges = {}, []
+    for name, value in filters.items():
+        if value is None or value == "":
+            continue
+        if name in FIELDS:
+            equals[name] = value
+            continue
+        field, _, op = name.rpartition("_")
+        if field in DATE_FIELDS and op in RANGE_OPS:
+            ranges.append((field, op, value))
+            continue
+        raise ValueError(f"Filtro no soportado: {name}")
+    return equals, ranges
+
+
+def row_matches(row, equals, ranges):
+    for k, v in equals.items():
+        if row.get(k, "") != v:
+            return False
+    for field, op, value in ranges:
+        d = row.get(field, "")
+        if not d:
+            return False
+        if op == "lte" and d > value:
+            return False
+        if op == "gte" and d < value:
+            return False
+        if op == "lt" and d >= value:
+            return False
+        if op == "gt" and d <= value:
+            return False
+    return True
+
+
+# Interfaz de almacenamiento que usa UserService. Las filas son dicts con
+# las columnas de FIELDS; usuario_red es la clave.
+class UserStore(ABC):
+    # True si find() resuelve los filtros con índices propios (SQL) y conviene
+    # más que recorrer los registros en memoria
+    pushdown = False
+
+    def iter_rows(self):
+        yield from self.read_all()
+
+    @abstractmethod
+    def read_all(self):
+        ...
+
+    @abstractmethod
+    def write_all(self, rows):
+        ...
+
+    @abstractmethod
+    def upsert(self, row):
+        ...
+
+    def upsert_many(self, rows):
+        for row in rows:
+            self.upsert(row)
+
+    # firma del estado persistido; None = el backend no detecta cambios
+    def generation(self):
+        return None
+
+    # (filas cambiadas desde `gen`, nueva firma) o None para recargar todo
+    def changes_since(self, gen):
+        return None
+
+    # lock de escritura entre procesos: quien lee, modifica y reescribe filas
+    # lo toma alrededor de la lectura y el upsert
+    def write_lock(self):
+        return nullcontext()
+
+    def find(self, **filters):
+        # igualdad por columna y rangos de fecha ISO (contrato_fin_lte=...)
+        equals, ranges = split_filters(filters)
+        return [r for r in self.iter_rows() if row_matches(r, equals, ranges)]
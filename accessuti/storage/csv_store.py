@@ -1,62 +1,310 @@
-import csv, os
-
-FIELDS = [
-    "usuario_red",
-    "nombres",
-    "apellidos",
-    "dni",
-    "tipo_contrato",
-    "contrato_inicio",
-    "contrato_fin",
-    "sede",
-    "dependencia",
-    "subdependencia",
-
-    # Permisos especiales
-    "acceso_nivel",            # LIBRE | COMUN | NORMAL
-    "acceso_redes_sociales",   # SI | NO
-    "permiso_inicio",
-    "permiso_fin",
-
-    # VPN
-    "vpn_activo",              # SI | NO
-    "vpn_inicio",
-    "vpn_fin",
-
-    # Estados
-    "permisos_activos",        # SI | NO
-    "status"                   # ACTIVE | INACTIVE
-]
-
-class CSVStore:
-    def __init__(self, path):
+import csv, io, json, os, tempfile, threading
+
+from .base import FIELDS, UserStore
+from .file_lock import FileLock
+from ..core.metrics import STORE_SECONDS, STORE_ROWS
+
+
+def _fix_row(row):
+    fixed = {k: (row.get(k, "") or "") for k in FIELDS}
+
+    if not fixed["usuario_red"] and row.get("username"):
+        fixed["usuario_red"] = (row.get("username") or "").strip().lower()
+    return fixed
+
+
+def _row_key(row):
+    return (row.get("usuario_red") or "").strip().lower()
+
+
+def file_signature(path):
+    # (inodo, mtime, tamaño) o None si no existe: cambia con cada escritura
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def write_csv_temp(path, fieldnames, rows):
+    # escribe las filas (con fsync) en un temporal junto a `path` y devuelve su ruta
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=fieldnames)
+            w.writeheader()
+            for row in rows:
+                w.writerow({k: row.get(k, "") for k in fieldnames})
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return tmp
+
+
+def write_csv_atomic(path, fieldnames, rows):
+    # temporal en el mismo directorio + fsync + rename: quien lea ve el
+    # archivo anterior o el nuevo completo, nunca uno a medias
+    tmp = write_csv_temp(path, fieldnames, rows)
+    try:
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+# users.csv + un journal append-only (users.csv.journal).
+# Cada mutación agrega una sola fila al journal; read_all() aplica el journal
+# sobre el archivo base (la última fila de cada usuario_red gana). Cuando el
+# journal supera `compact_bytes` se compacta en un hilo de fondo.
+#
+# Varios procesos (workers de gunicorn) pueden compartir los archivos: las
+# escrituras toman un flock exclusivo sobre users.csv.lock, las lecturas uno
+# compartido, y el archivo base se reemplaza de forma atómica (temp + rename).
+class CSVStore(UserStore):
+
+    def __init__(self, path, compact_bytes=256 * 1024):
         self.path = path
+        self.journal_path = path + ".journal"
+        # journal ya compactado y qué archivo base lo reemplazó (ver compact)
+        self.prev_journal_path = path + ".prev.journal"
+        self.compaction_path = path + ".compaction"
+        self.lock_path = path + ".lock"
+        self.compact_bytes = compact_bytes
+        self._locked = FileLock(self.lock_path)
+        self._compacting = False
         os.makedirs(os.path.dirname(path), exist_ok=True)
 
-        if not os.path.exists(path):
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                csv.DictWriter(f, fieldnames=FIELDS).writeheader()
+        with self._locked():
+            if not os.path.exists(path):
+                self._write_base([])
+
+    # ================= ARCHIVO BASE =================
+
+    def _write_base(self, rows):
+        write_csv_atomic(self.path, FIELDS, rows)
+
+    def _read_journal(self):
+        if not os.path.exists(self.journal_path):
+            return []
+        with open(self.journal_path, "r", newline="", encoding="utf-8") as f:
+            return [_fix_row(row) for row in csv.DictReader(f)]
+
+    def _journal_latest(self):
+        # última versión de cada usuario_red en el journal (acotado por compact_bytes)
+        latest = {}
+        for row in self._read_journal():
+            latest[_row_key(row)] = row
+        return latest
+
+    def _merged_rows(self, f, latest):
+        for row in csv.DictReader(f):
+            row = _fix_row(row)
+            yield latest.pop(_row_key(row), row) if latest else row
+        yield from latest.values()
 
+    # filas una a una (archivo base + journal) sin materializar el archivo:
+    # el journal se lee bajo el lock y el base se recorre desde un fd abierto,
+    # que sigue apuntando al mismo archivo aunque otro proceso lo reemplace
+    def iter_rows(self):
+        with self._locked(shared=True):
+            if not os.path.exists(self.path):
+                return
+            latest = self._journal_latest()
+            f = open(self.path, "r", newline="", encoding="utf-8")
+
+        n = 0
+        try:
+            with f:
+                for row in self._merged_rows(f, latest):
+                    n += 1
+                    yield row
+        finally:
+            STORE_ROWS.inc(n, backend="csv", op="read")
+
+    @STORE_SECONDS.time(backend="csv", op="read_all")
     def read_all(self):
-        if not os.path.exists(self.path):
-            with open(self.path, "w", newline="", encoding="utf-8") as f:
-                csv.DictWriter(f, fieldnames=FIELDS).writeheader()
-
-        with open(self.path, "r", newline="", encoding="utf-8") as f:
-            r = csv.DictReader(f)
-            out = []
-            for row in r:
-                
-                fixed = {k: (row.get(k, "") or "") for k in FIELDS}
-               
-                if not fixed["usuario_red"] and row.get("username"):
-                    fixed["usuario_red"] = (row.get("username") or "").strip().lower()
-                out.append(fixed)
-            return out
+        return list(self.iter_rows())
+
+    def _drop_journals(self):
+        # tras reescribir el base a mano nadie puede seguir por deltas
+        for p in (self.journal_path, self.prev_journal_path, self.compaction_path):
+            if os.path.exists(p):
+                os.remove(p)
 
+    @STORE_SECONDS.time(backend="csv", op="write_all")
     def write_all(self, rows):
-        with open(self.path, "w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=FIELDS)
-            w.writeheader()
-            for row in rows:
-                w.writerow({k: row.get(k, "") for k in FIELDS})
\ No newline at end of file
+        with self._locked():
+            self._write_base(rows)
+            self._drop_journals()
+
+    # reescritura en streaming: fn(row) devuelve la fila (modificada) o None
+    # para eliminarla; se escribe fila a fila en un temporal que reemplaza al base
+    @STORE_SECONDS.time(backend="csv", op="rewrite")
+    def rewrite(self, fn):
+        with self._locked():
+            latest = self._journal_latest()
+            with open(self.path, "r", newline="", encoding="utf-8") as f:
+                self._write_base(
+                    out for out in map(fn, self._merged_rows(f, latest)) if out is not None
+                )
+            self._drop_journals()
+
+    def write_lock(self):
+        return self._locked()
+
+    # ================= JOURNAL =================
+
+    # persiste una sola fila (alta o actualización) sin reescribir el archivo
+    def upsert(self, row):
+        self.upsert_many([row])
+
+    @STORE_SECONDS.time(backend="csv", op="upsert_many")
+    def upsert_many(self, rows):
+        buf = io.StringIO()
+        w = csv.DictWriter(buf, fieldnames=FIELDS)
+        n = 0
+        for row in rows:
+            w.writerow({k: row.get(k, "") for k in FIELDS})
+            n += 1
+        STORE_ROWS.inc(n, backend="csv", op="write")
+
+        with self._locked():
+            new_file = not os.path.exists(self.journal_path)
+            with open(self.journal_path, "a", newline="", encoding="utf-8") as f:
+                if new_file:
+                    csv.DictWriter(f, fieldnames=FIELDS).writeheader()
+                f.write(buf.getvalue())
+                size = f.tell()
+
+            if size >= self.compact_bytes and not self._compacting:
+                self._compacting = True
+                threading.Thread(target=self.compact, daemon=True).start()
+
+    # aplica el journal sobre el archivo base, sin frenar a los que escriben ni
+    # obligar a nadie a recargar:
+    # - el base nuevo se arma con el lock compartido (solo para tomar el largo
+    #   del journal); el exclusivo se toma al final, para cambiar los archivos
+    # - el journal no se borra: pasa a users.csv.prev.journal, lo que llegó
+    #   mientras tanto (la cola) se copia a un journal nuevo, y
+    #   users.csv.compaction anota [base anterior, base nuevo, dónde empiezan
+    #   en el journal nuevo las escrituras posteriores]. changes_since sigue
+    #   así por deltas para quien estaba al día con el base anterior
+    @STORE_SECONDS.time(backend="csv", op="compact")
+    def compact(self):
+        try:
+            with self._locked(shared=True):
+                before = file_signature(self.path)
+                journal = file_signature(self.journal_path)
+                if journal is None:
+                    return
+                upto = journal[2]
+                latest = self._journal_latest()
+                f = open(self.path, "r", newline="", encoding="utf-8")
+            with f:
+                tmp = write_csv_temp(self.path, FIELDS, self._merged_rows(f, latest))
+
+            try:
+                with self._locked():
+                    now = file_signature(self.journal_path)
+                    if file_signature(self.path) != before or now is None or now[0] != journal[0]:
+                        # otro proceso compactó o reescribió mientras tanto
+                        return
+                    with open(self.journal_path, "rb") as jf:
+                        jf.seek(upto)
+                        tail = jf.read()
+                    os.replace(tmp, self.path)
+                    tmp = None
+                    os.replace(self.journal_path, self.prev_journal_path)
+                    start = 0
+                    if tail:
+                        with open(self.journal_path, "w", newline="", encoding="utf-8") as jf:
+                            csv.DictWriter(jf, fieldnames=FIELDS).writeheader()
+                            jf.flush()
+                            jf.buffer.write(tail)
+                            start = jf.tell()
+
+                    fd, meta = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+                    with os.fdopen(fd, "w", encoding="utf-8") as mf:
+                        json.dump([before, file_signature(self.path), start], mf)
+                    os.replace(meta, self.compaction_path)
+            finally:
+                if tmp is not None:
+                    os.remove(tmp)
+        finally:
+            self._compacting = False
+
+    # ================= DETECCIÓN DE CAMBIOS =================
+
+    # firma barata (dos stat) del estado en disco; cambia con cualquier escritura
+    def generation(self):
+        return (file_signature(self.path), file_signature(self.journal_path))
+
+    # filas agregadas al journal desde `gen`, o None si hace falta recargar todo
+    # (el archivo base cambió por write_all / rewrite, o más de una compactación)
+    @STORE_SECONDS.time(backend="csv", op="changes_since")
+    def changes_since(self, gen):
+        old_base, old_journal = gen
+        chunks = []   # (offset, bytes) en orden
+        with self._locked(shared=True):
+            base, journal = self.generation()
+            offset = None
+            if base != old_base:
+                # hubo una compactación desde `gen`: lo que faltaba leer está al
+                # final del journal anterior, y del actual solo lo posterior
+                offset = self._compacted(old_base, base)
+                if offset is None:
+                    return None
+                chunk = self._read_from(self.prev_journal_path, old_journal)
+                if chunk is None:
+                    return None
+                chunks.append(chunk)
+            elif old_journal is not None:
+                if journal is None or old_journal[0] != journal[0] or old_journal[2] > journal[2]:
+                    return None
+                offset = old_journal[2]
+
+            new_journal = None
+            if journal is not None:
+                offset = offset or 0
+                with open(self.journal_path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+                chunks.append((offset, data))
+                new_journal = (journal[0], journal[1], offset + len(data))
+
+        rows = []
+        for offset, data in chunks:
+            text = io.StringIO(data.decode("utf-8"), newline="")
+            # desde 0 el bloque trae el encabezado
+            reader = csv.DictReader(text) if offset == 0 else csv.DictReader(text, fieldnames=FIELDS)
+            rows.extend(_fix_row(r) for r in reader)
+        return rows, (base, new_journal)
+
+    def _compacted(self, old_base, base):
+        # offset del journal actual desde el que leer si la última compactación
+        # pasó del base `old_base` al actual, o None
+        try:
+            with open(self.compaction_path, encoding="utf-8") as f:
+                before, after, start = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if json.loads(json.dumps([old_base, base])) != [before, after]:
+            return None
+        return start
+
+    def _read_from(self, path, old_sig):
+        # (offset, bytes) de `path` desde lo ya leído según `old_sig`, o None
+        # si ese journal ya no es el mismo archivo
+        sig = file_signature(path)
+        if sig is None:
+            return None
+        offset = 0
+        if old_sig is not None:
+            if old_sig[0] != sig[0] or old_sig[2] > sig[2]:
+                return None
+            offset = old_sig[2]
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return offset, f.read()
@@ -0,0 +1,36 @@
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo queda el lock entre hilos
+    fcntl = None
+
+
+# flock sobre un archivo .lock + RLock entre hilos. Reentrante: el flock solo
+# se toma en el nivel más externo (un segundo flock del mismo proceso sobre
+# otro descriptor se bloquearía).
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    @contextmanager
+    def __call__(self, shared=False):
+        with self._lock:
+            if fcntl is None or self._depth:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+            with open(self.path, "a") as lf:
+                fcntl.flock(lf, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                    fcntl.flock(lf, fcntl.LOCK_UN)
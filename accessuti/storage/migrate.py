@@ -0,0 +1,68 @@
+import csv, os
+
+from .base import FIELDS
+from .csv_store import CSVStore
+
+# columnas de usuarios_red.csv (formato anterior) -> columnas de users.csv
+LEGACY_COLUMNS = {
+    "usuario_red": "usuario_red",
+    "nombres": "nombres",
+    "tipo_contrato": "tipo_contrato",
+    "sede": "sede",
+    "dependencia": "dependencia",
+    "subdependencia": "subdependencia",
+    "fecha_inicio": "contrato_inicio",
+    "fecha_fin": "contrato_fin",
+    "nivel_red": "acceso_nivel",
+    "red_inicio": "permiso_inicio",
+    "red_fin": "permiso_fin",
+    "tiene_vpn": "vpn_activo",
+    "vpn_inicio": "vpn_inicio",
+    "vpn_fin": "vpn_fin",
+}
+
+LEGACY_STATUS = {"ACTIVO": "ACTIVE", "INACTIVO": "INACTIVE"}
+
+
+def is_legacy_header(header):
+    return "estado" in header and "status" not in header
+
+
+def legacy_row(row):
+    out = {k: "" for k in FIELDS}
+    for old, new in LEGACY_COLUMNS.items():
+        out[new] = (row.get(old) or "").strip()
+
+    out["usuario_red"] = out["usuario_red"].lower()
+    out["tipo_contrato"] = out["tipo_contrato"].upper()
+    out["acceso_nivel"] = (out["acceso_nivel"] or "NORMAL").upper()
+    out["vpn_activo"] = (out["vpn_activo"] or "NO").upper()
+    out["acceso_redes_sociales"] = "NO"
+    out["permisos_activos"] = "SI"
+    estado = (row.get("estado") or "").strip().upper()
+    out["status"] = LEGACY_STATUS.get(estado, estado or "ACTIVE")
+    return out
+
+
+def read_legacy_csv(path):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return [legacy_row(r) for r in csv.DictReader(f)]
+
+
+# importa data/usuarios_red.csv y data/users.csv (en ese orden: ante el mismo
+# usuario_red gana users.csv) a cualquier UserStore en una sola escritura
+def migrate(target, users_csv, legacy_csv=None):
+    rows = {}
+    if legacy_csv and os.path.exists(legacy_csv):
+        for r in read_legacy_csv(legacy_csv):
+            if r["usuario_red"]:
+                rows[r["usuario_red"]] = r
+
+    if os.path.exists(users_csv):
+        for r in CSVStore(users_csv).iter_rows():
+            key = (r.get("usuario_red") or "").strip().lower()
+            if key:
+                rows[key] = r
+
+    target.upsert_many(rows.values())
+    return len(rows)
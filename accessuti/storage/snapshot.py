@@ -0,0 +1,106 @@
+import hashlib, mmap, os, pickle, struct, tempfile
+
+from .base import FIELDS
+
+# Snapshot binario del estado en memoria de UserService (registros ya
+# parseados + índices), para que un worker arranque sin volver a leer y
+# normalizar todo el CSV.
+#
+#   cabecera  MAGIC | versión | largo meta | largo payload | sha256(meta + payload)
+#   meta      pickle: origen, generación del store, columnas, filas
+#   payload   pickle del estado
+#
+# El archivo se lee con mmap: el checksum y pickle.loads trabajan sobre las
+# páginas del archivo (compartidas entre workers vía page cache) sin copiarlo
+# a un bytes intermedio. Solo se confía en snapshots escritos por la propia
+# app en su directorio de datos, igual que con users.csv.
+MAGIC = b"ACUSNAP\0"
+# subir si cambia NetworkUser o la estructura de algún índice
+VERSION = 3
+_HEADER = struct.Struct("<8sHIQ32s")
+
+
+def write_snapshot(path, source, generation, state, rows):
+    meta = pickle.dumps(
+        {"source": source, "generation": generation, "fields": tuple(FIELDS), "rows": rows},
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    digest = hashlib.sha256(meta)
+    digest.update(payload)
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(meta), len(payload), digest.digest()))
+            f.write(meta)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _open(path):
+    try:
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):   # ValueError: archivo vacío
+        return None
+
+
+def _parse(mm, source):
+    # (meta, vista del payload) o None si no es un snapshot válido de `source`
+    if len(mm) < _HEADER.size:
+        return None
+    magic, version, meta_len, payload_len, digest = _HEADER.unpack_from(mm)
+    if magic != MAGIC or version != VERSION or len(mm) != _HEADER.size + meta_len + payload_len:
+        return None
+    view = memoryview(mm)[_HEADER.size:]
+    try:
+        meta = pickle.loads(view[:meta_len])
+    except Exception:
+        return None
+    if meta.get("source") != source or meta.get("fields") != tuple(FIELDS):
+        return None
+    return meta, view, digest
+
+
+# generación guardada en el snapshot (solo la cabecera), o None
+def snapshot_generation(path, source):
+    mm = _open(path)
+    if mm is None:
+        return None
+    with mm:
+        parsed = _parse(mm, source)
+        if parsed is None:
+            return None
+        meta, view, _ = parsed
+        view.release()
+        return meta["generation"]
+
+
+# (generación, estado) o None si falta, es de otra versión / origen o está dañado
+def read_snapshot(path, source):
+    mm = _open(path)
+    if mm is None:
+        return None
+    with mm:
+        parsed = _parse(mm, source)
+        if parsed is None:
+            return None
+        meta, view, digest = parsed
+        try:
+            if hashlib.sha256(view).digest() != digest:
+                return None
+            meta_len = _HEADER.unpack_from(mm)[2]
+            try:
+                state = pickle.loads(view[meta_len:])
+            except Exception:
+                return None
+        finally:
+            view.release()
+    return meta["generation"], state
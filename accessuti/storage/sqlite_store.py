@@ -0,0 +1,168 @@
+import os, sqlite3, threading
+
+from .base import FIELDS, RANGE_OPS, UserStore, split_filters
+from .file_lock import FileLock
+from ..core.metrics import STORE_SECONDS, STORE_ROWS
+
+_COLUMNS = ", ".join(FIELDS)
+_PLACEHOLDERS = ", ".join("?" for _ in FIELDS)
+_UPDATES = ", ".join(f"{k} = excluded.{k}" for k in FIELDS if k != "usuario_red")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS users (
+    {", ".join(f"{k} TEXT NOT NULL DEFAULT ''" for k in FIELDS)},
+    PRIMARY KEY (usuario_red)
+);
+CREATE INDEX IF NOT EXISTS ix_users_sede ON users (sede);
+CREATE INDEX IF NOT EXISTS ix_users_status ON users (status);
+CREATE INDEX IF NOT EXISTS ix_users_contrato_fin ON users (contrato_fin);
+CREATE INDEX IF NOT EXISTS ix_users_permiso_fin ON users (permiso_fin);
+CREATE INDEX IF NOT EXISTS ix_users_vpn_fin ON users (vpn_fin);
+
+-- detección de cambios entre procesos: epoch cambia con write_all, y cada
+-- upsert deja su usuario_red en changes (se conservan los últimos KEEP_CHANGES)
+CREATE TABLE IF NOT EXISTS meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    epoch INTEGER NOT NULL,
+    trimmed_upto INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta VALUES (1, 0, 0);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario_red TEXT NOT NULL
+);
+"""
+
+KEEP_CHANGES = 10_000
+
+
+def _values(row):
+    values = [(row.get(k, "") or "") for k in FIELDS]
+    values[0] = values[0].strip().lower()
+    return values
+
+
+# Backend SQLite embebido (modo WAL). Una conexión por hilo; upserts de una
+# sola fila y filtros resueltos por SQL con los índices de la tabla.
+class SQLiteStore(UserStore):
+    pushdown = True
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        # las transacciones de SQLite no cubren lectura en memoria + upsert
+        self._locked = FileLock(path + ".lock")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def iter_rows(self):
+        n = 0
+        try:
+            for r in self._conn().execute(f"SELECT {_COLUMNS} FROM users ORDER BY rowid"):
+                n += 1
+                yield dict(r)
+        finally:
+            STORE_ROWS.inc(n, backend="sqlite", op="read")
+
+    @STORE_SECONDS.time(backend="sqlite", op="read_all")
+    def read_all(self):
+        return list(self.iter_rows())
+
+    @STORE_SECONDS.time(backend="sqlite", op="write_all")
+    def write_all(self, rows):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM users")
+            conn.execute("DELETE FROM changes")
+            conn.execute("UPDATE meta SET epoch = epoch + 1, trimmed_upto = 0")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO users ({_COLUMNS}) VALUES ({_PLACEHOLDERS})",
+                (_values(r) for r in rows),
+            )
+
+    def write_lock(self):
+        return self._locked()
+
+    def upsert(self, row):
+        self.upsert_many([row])
+
+    @STORE_SECONDS.time(backend="sqlite", op="upsert_many")
+    def upsert_many(self, rows):
+        values = [_values(r) for r in rows]
+        STORE_ROWS.inc(len(values), backend="sqlite", op="write")
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                f"INSERT INTO users ({_COLUMNS}) VALUES ({_PLACEHOLDERS}) "
+                f"ON CONFLICT (usuario_red) DO UPDATE SET {_UPDATES}",
+                values,
+            )
+            conn.executemany(
+                "INSERT INTO changes (usuario_red) VALUES (?)",
+                ((v[0],) for v in values),
+            )
+
+            last = conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0]
+            if last > KEEP_CHANGES:
+                cut = last - KEEP_CHANGES
+                conn.execute("DELETE FROM changes WHERE seq <= ?", (cut,))
+                conn.execute("UPDATE meta SET trimmed_upto = MAX(trimmed_upto, ?)", (cut,))
+
+    # ================= DETECCIÓN DE CAMBIOS =================
+
+    def generation(self):
+        return tuple(self._conn().execute(
+            "SELECT epoch, (SELECT COALESCE(MAX(seq), 0) FROM changes) FROM meta"
+        ).fetchone())
+
+    @STORE_SECONDS.time(backend="sqlite", op="changes_since")
+    def changes_since(self, gen):
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            epoch, trimmed = conn.execute("SELECT epoch, trimmed_upto FROM meta").fetchone()
+            old_epoch, old_seq = gen
+            if epoch != old_epoch or old_seq < trimmed:
+                return None
+
+            last = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+            cur = conn.execute(
+                f"SELECT {_COLUMNS} FROM users WHERE usuario_red IN "
+                "(SELECT usuario_red FROM changes WHERE seq > ? AND seq <= ?)",
+                (old_seq, last),
+            )
+            return [dict(r) for r in cur], (epoch, last)
+        finally:
+            conn.execute("COMMIT")
+
+    @STORE_SECONDS.time(backend="sqlite", op="find")
+    def find(self, **filters):
+        equals, ranges = split_filters(filters)
+
+        where, params = [], []
+        for k, v in equals.items():
+            where.append(f"{k} = ?")
+            params.append(v)
+        for field, op, value in ranges:
+            where.append(f"{field} != '' AND {field} {RANGE_OPS[op]} ?")
+            params.append(value)
+
+        sql = f"SELECT {_COLUMNS} FROM users"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        cur = self._conn().execute(sql + " ORDER BY usuario_red", params)
+        rows = [dict(r) for r in cur]
+        STORE_ROWS.inc(len(rows), backend="sqlite", op="read")
+        return rows
@@ -0,0 +1,101 @@
+import os, random, sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from accessuti.bench.synthetic import generate_directory
+from accessuti.storage.csv_store import CSVStore
+
+
+@pytest.fixture
+def csv_store(tmp_path):
+    store = CSVStore(str(tmp_path / "users.csv"))
+    store.write_all(generate_directory(2000, seed=1))
+    return store
+
+
+@pytest.fixture
+def app(tmp_path, csv_store):
+    from accessuti.app import create_app
+    from accessuti.config import Config
+
+    data = str(tmp_path)
+
+    class TestConfig(Config):
+        TESTING = True
+        STORAGE_BACKEND = "csv"
+        USERS_CSV = csv_store.path
+        AUDIT_CSV = os.path.join(data, "auditoria.csv")
+        SYSTEM_USERS_CSV = os.path.join(data, "usuarios_sistema.csv")
+        EXPIRY_LOCK = os.path.join(data, "expiry.lock")
+        SNAPSHOT_PATH = ""
+        EXPIRY_SWEEPER = "off"
+
+    return create_app(TestConfig)
+
+
+@pytest.fixture
+def login(app):
+    # login("consulta") -> cliente con la sesión de esa cuenta integrada
+    def login(username):
+        c = app.test_client()
+        c.post("/app/login", data={"username": username, "password": f"{username}123"})
+        return c
+    return login
+
+
+def _mutate(svc, seed=0, steps=200):
+    # secuencia aleatoria de escrituras por los caminos públicos del servicio,
+    # para comparar después los índices incrementales con un recorrido completo
+    rnd = random.Random(seed)
+    today = date.today()
+    keys = sorted(svc._by_key)
+    sedes = sorted({u.sede for u in svc._by_key.values()})
+
+    def day(lo, hi):
+        return (today + timedelta(days=rnd.randint(lo, hi))).isoformat()
+
+    def edited(key):
+        row = svc._by_key[key].to_dict()
+        row.update(rnd.choice([
+            {"sede": rnd.choice(sedes)},
+            {"tipo_contrato": rnd.choice(("CAS", "CAP", "TERCERO"))},
+            {"acceso_nivel": rnd.choice(("NORMAL", "COMUN", "LIBRE"))},
+            {"contrato_fin": day(-30, 60)},
+            {"vpn_activo": "SI", "vpn_inicio": day(-60, -1), "vpn_fin": day(-10, 30)},
+            {"permisos_activos": "SI", "permiso_inicio": day(-60, -1), "permiso_fin": day(-10, 30)},
+        ]))
+        return row
+
+    for step in range(steps):
+        key = rnd.choice(keys)
+        op = rnd.randrange(8)
+        if op == 0:
+            svc.deactivate_user(key)
+        elif op == 1:
+            svc.activate_user(key)
+        elif op == 2:
+            svc.deactivate_special_permissions(key)
+        elif op == 3:
+            svc.register_network_user(edited(key))
+        elif op == 4:
+            new = f"nuevo{step:04d}"
+            row = edited(key)
+            row["usuario_red"] = new
+            svc.register_network_user(row)
+            keys.append(new)
+        elif op == 5:
+            svc.import_rows(enumerate(edited(rnd.choice(keys)) for _ in range(rnd.randint(1, 20))))
+        elif op == 6:
+            svc.deactivate_users(usuarios=rnd.sample(keys, 5), sede=rnd.choice(sedes))
+        else:
+            svc.revoke_expired()
+    # un lote grande: reconstruye los índices en bloque
+    svc.import_rows(enumerate(edited(k) for k in rnd.sample(keys, 1001)))
+
+
+@pytest.fixture
+def mutate():
+    return _mutate
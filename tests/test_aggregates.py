@@ -0,0 +1,51 @@
+from collections import Counter
+
+from accessuti.services.user_service import UserService
+from accessuti.storage.csv_store import CSVStore
+
+
+def _recount(svc):
+    # conteos del dashboard recalculados a mano sobre todos los registros
+    active = [u for u in svc._by_key.values() if u.status == "ACTIVE"]
+    return {
+        "status": Counter(u.status for u in svc._by_key.values()),
+        "sede": Counter(u.sede.strip() or "SIN SEDE" for u in active),
+        "contrato": Counter(u.tipo_contrato.strip().upper() or "SIN TIPO" for u in active),
+        "acceso_nivel": Counter(u.acceso_nivel.strip().upper() or "NORMAL" for u in active),
+    }
+
+
+def _counts(svc):
+    return {
+        "status": Counter(svc.count_by_status()),
+        "sede": Counter(svc.count_by_sede()),
+        "contrato": Counter(svc.count_by_contrato()),
+        "acceso_nivel": Counter(svc.count_by_acceso_nivel()),
+    }
+
+
+def test_counters_after_writes_match_recount(csv_store, mutate):
+    svc = UserService(csv_store)
+    assert _counts(svc) == _recount(svc)
+    mutate(svc, seed=12)
+    assert _counts(svc) == _recount(svc)
+    assert svc.check_aggregates() == {}
+    # ordenados de mayor a menor, como los pinta el dashboard
+    values = list(svc.count_by_sede().values())
+    assert values == sorted(values, reverse=True)
+
+
+def test_counters_follow_other_workers(csv_store, mutate):
+    svc = UserService(csv_store)
+    other = UserService(CSVStore(csv_store.path))
+    mutate(other, seed=13, steps=60)
+    svc.refresh()
+    assert _counts(svc) == _counts(other) == _recount(svc)
+
+
+def test_check_aggregates_reports_drift(csv_store):
+    svc = UserService(csv_store)
+    sede = next(iter(svc.count_by_sede()))
+    svc._agg.counts["sede"][sede] += 1
+    real = _recount(svc)["sede"][sede]
+    assert svc.check_aggregates() == {"sede": {sede: (real + 1, real)}}
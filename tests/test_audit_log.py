@@ -0,0 +1,76 @@
+import logging, time
+
+from accessuti.ds.stack import AuditEvent
+from accessuti.storage.audit_log import AuditLog
+
+
+def _events(n):
+    # fechas crecientes, dos actores y diez usuarios objetivo
+    return [
+        AuditEvent(ts=f"2026-01-{1 + i // 100:02d} 10:{i % 100 // 60:02d}:{i % 100 % 60:02d}",
+                   actor=f"admin{i % 2}", action=f"accion {i}", target=f"user{i % 10}")
+        for i in range(n)
+    ]
+
+
+def _wait(cond, timeout=10):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.02)
+    return cond()
+
+
+def test_flusher_survives_errors(tmp_path, caplog):
+    audit = AuditLog(str(tmp_path / "auditoria.csv"), flush_interval=0.01)
+    lock = audit._locked
+    fails = []
+
+    def flaky(shared=False):
+        # la primera escritura falla con algo que no es OSError
+        if not shared and not fails:
+            fails.append(1)
+            raise RuntimeError("disco")
+        return lock(shared=shared)
+
+    audit._locked = flaky
+    with caplog.at_level(logging.ERROR, logger="accessuti.storage.audit_log"):
+        audit.start()
+        audit.push(AuditEvent(ts="2026-01-01 10:00:00", actor="admin", action="uno", target="user1"))
+        assert _wait(lambda: audit.by_usuario("user1"))
+        audit.push(AuditEvent(ts="2026-01-01 10:00:01", actor="admin", action="dos", target="user1"))
+        assert _wait(lambda: len(audit.by_usuario("user1")) == 2)
+
+    assert fails and audit._thread.is_alive()
+    assert "No se pudo escribir la auditoría" in caplog.text
+    # el lote que falló se reintentó sin perderse ni duplicarse
+    assert [e.action for e in audit.by_usuario("user1")] == ["dos", "uno"]
+
+
+def test_indexes_are_bounded(tmp_path):
+    path = str(tmp_path / "auditoria.csv")
+    audit = AuditLog(path, key_limit=5, time_limit=40)
+    events = _events(500)
+    for e in events:
+        audit.push(e)
+    audit.flush()
+
+    assert all(len(v) <= 10 for v in audit._by_actor.values())
+    assert all(len(v) <= 10 for v in audit._by_target.values())
+    assert len(audit._by_time) <= 50
+
+    newest = [e for e in reversed(events) if e.actor == "admin1"]
+    assert audit.by_actor("admin1", limit=5) == newest[:5]
+    assert audit.by_usuario("user3", limit=3) == [e for e in reversed(events) if e.target == "user3"][:3]
+
+    def brute(start, end, limit):
+        return [e for e in reversed(events) if start <= e.ts <= end + "\U0010ffff"][:limit]
+
+    # rango reciente: sale del índice; rango antiguo: se recorre el archivo
+    for start, end in [("2026-01-05 10:01", "2026-01-05"), ("2026-01-01", "2026-01-02"),
+                       ("2026-01-02 10:00:30", "2026-01-03 10:00:10"), ("2025", "2026")]:
+        assert audit.between(start, end, limit=30) == brute(start, end, 30)
+
+    # otro proceso que indexa el mismo archivo desde cero llega al mismo estado
+    other = AuditLog(path, key_limit=5, time_limit=40)
+    assert other.between("2026-01-01", "2026-01-02", limit=1000) == brute("2026-01-01", "2026-01-02", 1000)
+    assert other.latest(3) == list(reversed(events))[:3]
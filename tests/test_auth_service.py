@@ -0,0 +1,19 @@
+import os
+
+from accessuti.services.auth_service import AuthService
+from accessuti.storage.app_user_store import AppUserStore
+
+
+def test_builtin_accounts_are_not_written_on_start(tmp_path):
+    path = str(tmp_path / "usuarios_sistema.csv")
+    auth = AuthService(AppUserStore(path))
+
+    assert not os.path.exists(path)
+    assert auth.validate_login("admin", "admin123").role == "ADMIN"
+    assert not os.path.exists(path)
+
+    # al cambiar la contraseña se guarda la fila completa
+    auth.set_password("consulta", "otra-clave")
+    row = AppUserStore(path).read_all()[0]
+    assert (row["username"], row["rol"], row["estado"]) == ("consulta", "CONSULTA", "ACTIVO")
+    assert AuthService(AppUserStore(path)).validate_login("consulta", "otra-clave")
@@ -0,0 +1,12 @@
+from accessuti.ds.avl import AVLTree
+
+
+def test_scans_keep_last_comparisons():
+    tree = AVLTree.from_sorted((f"u{i:05d}", i) for i in range(1000))
+    assert tree.search("u00500") == 500
+    comparisons = tree.last_comparisons
+    assert 0 < comparisons <= tree.height()
+
+    assert [k for k, _ in tree.items("u00990")] == [f"u{i:05d}" for i in range(990, 1000)]
+    assert len(tree.values()) == 1000
+    assert tree.last_comparisons == comparisons
@@ -0,0 +1,105 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from accessuti.services.user_service import UserService
+from accessuti.storage.base import DATE_FIELDS, RANGE_OPS
+from accessuti.storage.csv_store import CSVStore
+
+CMP = {"lte": "__le__", "gte": "__ge__", "lt": "__lt__", "gt": "__gt__"}
+
+
+def _brute(svc, usuarios=None, **filters):
+    # select_users recalculado recorriendo todos los registros
+    out = []
+    for k, u in svc._by_key.items():
+        if usuarios is not None and k not in {x.strip().lower() for x in usuarios}:
+            continue
+        ok = True
+        for name, value in filters.items():
+            field, _, op = name.rpartition("_")
+            if name in u.to_dict():
+                ok = getattr(u, name) == value
+            else:
+                d = getattr(u, field)
+                ok = bool(d) and getattr(date.fromisoformat(d), CMP[op])(date.fromisoformat(value))
+            if not ok:
+                break
+        if ok:
+            out.append(k)
+    return sorted(out)
+
+
+def _random_filters(svc, rnd):
+    users = list(svc._by_key.values())
+    filters = {}
+    for _ in range(rnd.randint(1, 3)):
+        kind = rnd.randrange(3)
+        sample = rnd.choice(users)
+        if kind == 0:
+            # columnas con índice en memoria
+            f = rnd.choice(("sede", "dependencia", "status"))
+            filters[f] = getattr(sample, f)
+        elif kind == 1:
+            # columnas sin índice: se comprueban fila a fila
+            f = rnd.choice(("tipo_contrato", "acceso_nivel", "vpn_activo", "permisos_activos"))
+            filters[f] = getattr(sample, f)
+        else:
+            d = date.today() + timedelta(days=rnd.randint(-90, 300))
+            filters[f"{rnd.choice(DATE_FIELDS)}_{rnd.choice(list(RANGE_OPS))}"] = d.isoformat()
+    return filters
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_select_users_matches_brute_force(csv_store, seed):
+    svc = UserService(csv_store)
+    rnd = random.Random(seed)
+    keys = sorted(svc._by_key)
+    nonempty = 0
+    for _ in range(40):
+        filters = _random_filters(svc, rnd)
+        usuarios = None
+        if rnd.random() < 0.3:
+            usuarios = [k.upper() for k in rnd.sample(keys, 50)] + ["no.existe"]
+        got = svc.select_users(usuarios, **filters)
+        assert got == _brute(svc, usuarios, **filters), filters
+        nonempty += bool(got)
+    assert nonempty > 10
+
+
+def test_bulk_updates_exactly_the_selection(csv_store, mutate):
+    svc = UserService(csv_store)
+    mutate(svc, seed=15, steps=50)
+    cut = (date.today() + timedelta(days=30)).isoformat()
+    filters = {"status": "ACTIVE", "contrato_fin_lte": cut}
+    expected = _brute(svc, **filters)
+    assert expected
+    before = {k: u.to_dict() for k, u in svc._by_key.items()}
+
+    res = svc.deactivate_users(**filters)
+    assert res["seleccionados"] == len(expected)
+    assert sorted(res["actualizados"]) == expected
+    for k, row in before.items():
+        after = svc._by_key[k].to_dict()
+        if k in expected:
+            assert after == dict(row, status="INACTIVE")
+        else:
+            assert after == row
+    # persistido: una carga completa ve lo mismo
+    fresh = UserService(CSVStore(csv_store.path))
+    assert {k: u.to_dict() for k, u in fresh._by_key.items()} == \
+        {k: u.to_dict() for k, u in svc._by_key.items()}
+    # repetirlo no cambia nada
+    assert svc.deactivate_users(**filters)["actualizados"] == []
+
+
+def test_bulk_permissions_by_list(csv_store):
+    svc = UserService(csv_store)
+    granted = sorted(k for k, u in svc._by_key.items() if u.vpn_activo == "SI")[:30]
+    res = svc.deactivate_special_permissions_many(usuarios=granted + ["no.existe"], sede="Sede Central")
+    expected = _brute(svc, granted, sede="Sede Central")
+    assert expected
+    assert res["seleccionados"] == len(expected) and res["no_existen"] == ["no.existe"]
+    assert all(svc._by_key[k].vpn_activo == "NO" for k in expected)
+    assert all(svc._by_key[k].vpn_activo == "SI" for k in set(granted) - set(expected))
@@ -0,0 +1,27 @@
+from datetime import date, datetime
+
+import pytest
+
+from accessuti.services.bulk_import import iter_import_file
+from accessuti.services.user_service import UserService
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def test_xlsx_date_cells(csv_store, tmp_path):
+    path = str(tmp_path / "alta.xlsx")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["usuario_red", "nombres", "apellidos", "contrato_inicio", "contrato_fin", "vpn_activo", "vpn_fin"])
+    ws.append(["xlsx.fechas", "Ana", "Díaz", date(2026, 1, 5), datetime(2026, 12, 31), "SI", "2026-06-30"])
+    wb.save(path)
+
+    rows = list(iter_import_file(path))
+    assert rows[0][1]["contrato_inicio"] == "2026-01-05"
+    assert rows[0][1]["contrato_fin"] == "2026-12-31"
+
+    svc = UserService(csv_store)
+    res = svc.import_rows(rows)
+    assert (res["importados"], res["errores"]) == (1, [])
+    u = svc._by_key["xlsx.fechas"]
+    assert (u.contrato_inicio, u.contrato_fin, u.vpn_fin) == ("2026-01-05", "2026-12-31", "2026-06-30")
@@ -0,0 +1,95 @@
+from accessuti.ds.lru_cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_hits_and_misses():
+    cache = LRUCache(max_entries=4)
+    assert cache.get("a") is None and cache.get("a", "x") == "x"
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.stats()["hit_ratio"] == round(1 / 3, 4)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=3)
+    for k in "abc":
+        cache.set(k, k)
+    cache.get("a")              # "b" pasa a ser la menos usada
+    cache.set("d", "d")
+    assert [k for k in "abcd" if cache.get(k) is not None] == ["a", "c", "d"]
+    assert cache.evictions == 1 and len(cache) == 3
+
+
+def test_lru_byte_limit():
+    cache = LRUCache(max_entries=100, max_bytes=100)
+    cache.set("a", "a", size=40)
+    cache.set("b", "b", size=40)
+    cache.set("c", "c", size=40)   # 120 bytes: sale "a"
+    assert cache.get("a") is None and cache.stats()["bytes"] == 80
+    # reemplazar una clave descuenta el tamaño anterior
+    cache.set("b", "b2", size=10)
+    assert cache.stats()["bytes"] == 50 and cache.get("b") == "b2"
+    # una entrada más grande que todo el límite no se guarda ni expulsa nada
+    assert cache.set("z", "z", size=101) is False
+    assert len(cache) == 2
+    cache.clear()
+    assert cache.stats()["bytes"] == 0 and len(cache) == 0
+
+
+def test_lru_ttl():
+    clock = FakeClock()
+    cache = LRUCache(ttl=10, clock=clock)
+    cache.set("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.expired == 1 and len(cache) == 0
+
+
+def test_cached_response_hits_and_version_bump(login, app):
+    cache = app.extensions["response_cache"]
+    svc = app.extensions["user_service"]
+    c = login("admin")
+
+    first = c.get("/app/chart/sede.json")
+    assert first.status_code == 200
+    hits = cache.hits
+    again = c.get("/app/chart/sede.json")
+    assert cache.hits == hits + 1
+    assert again.get_data() == first.get_data() and again.headers["ETag"] == first.headers["ETag"]
+
+    # una escritura sube svc.version: la clave vieja ya no se usa
+    key = next(k for k, u in sorted(svc._by_key.items())
+               if u.status == "ACTIVE" and u.sede == "Sede Central")
+    version = svc.version
+    svc.deactivate_user(key)
+    assert svc.version > version
+    after = c.get("/app/chart/sede.json")
+    assert cache.hits == hits + 1
+    data = dict(zip(after.get_json()["labels"], after.get_json()["values"]))
+    before = dict(zip(first.get_json()["labels"], first.get_json()["values"]))
+    assert data["Sede Central"] == before["Sede Central"] - 1
+
+
+def test_cached_response_keyed_by_role(login, app):
+    cache = app.extensions["response_cache"]
+    admin, consulta = login("admin"), login("consulta")
+    admin.get("/app/chart/sede.json")
+    hits = cache.hits
+    # otro rol no reutiliza la respuesta del admin
+    consulta.get("/app/chart/sede.json")
+    assert cache.hits == hits
+    consulta.get("/app/chart/sede.json")
+    assert cache.hits == hits + 1
+    # otros argumentos, otra entrada
+    consulta.get("/app/chart/sede.json?x=1")
+    assert cache.hits == hits + 1
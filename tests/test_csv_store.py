@@ -0,0 +1,112 @@
+import os
+
+from accessuti.services.user_service import UserService
+from accessuti.storage.csv_store import CSVStore
+from accessuti.storage.sqlite_store import SQLiteStore
+
+
+def test_mutation_appends_one_journal_row(csv_store):
+    svc = UserService(csv_store)
+    key = next(k for k, u in svc._by_key.items() if u.status == "ACTIVE")
+    base = os.path.getsize(csv_store.path)
+
+    svc.deactivate_user(key)
+
+    # el archivo base no se reescribe: solo el journal (encabezado + una fila)
+    assert os.path.getsize(csv_store.path) == base
+    with open(csv_store.journal_path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+    rows = {r["usuario_red"]: r for r in CSVStore(csv_store.path).read_all()}
+    assert len(rows) == 2000 and rows[key]["status"] == "INACTIVE"
+
+
+def test_compaction_keeps_latest_rows(csv_store):
+    svc = UserService(csv_store)
+    keys = sorted(svc._by_key)[:50]
+    svc.deactivate_users(keys)
+    before = CSVStore(csv_store.path).read_all()
+
+    csv_store.compact()
+    assert not os.path.exists(csv_store.journal_path)
+    assert CSVStore(csv_store.path).read_all() == before
+
+
+def test_changes_since_returns_only_new_rows(csv_store, tmp_path):
+    for store in (csv_store, SQLiteStore(str(tmp_path / "users.db"))):
+        if isinstance(store, SQLiteStore):
+            store.write_all(csv_store.read_all())
+        gen = store.generation()
+        row = dict(store.read_all()[0], sede="OTRA")
+        store.upsert(row)
+
+        rows, new_gen = store.changes_since(gen)
+        assert [(r["usuario_red"], r["sede"]) for r in rows] == [(row["usuario_red"], "OTRA")]
+        assert store.changes_since(new_gen)[0] == []
+
+
+def test_own_writes_are_not_reapplied(csv_store):
+    svc = UserService(csv_store)
+    key = next(k for k, u in svc._by_key.items() if u.status == "ACTIVE")
+    svc.deactivate_user(key)
+    version = svc.version
+
+    assert svc.refresh() is False
+    assert svc.version == version
+
+
+def test_compaction_keeps_workers_on_deltas(csv_store, monkeypatch):
+    a = UserService(csv_store)
+    b = UserService(CSVStore(csv_store.path))
+    keys = sorted(a._by_key)
+
+    def no_reload():
+        raise AssertionError("recarga completa")
+
+    a.deactivate_users(keys[:10])
+    b.refresh()
+    a.deactivate_users(keys[10:20])
+    # b no vio este lote antes de la compactación
+    csv_store.compact()
+    a.deactivate_users(keys[20:30])
+
+    for svc in (a, b):
+        monkeypatch.setattr(svc, "_load_network_users", no_reload)
+        svc.refresh()
+        assert all(svc._by_key[k].status == "INACTIVE" for k in keys[:30])
+        assert svc.count_users(status="INACTIVE") == UserService(CSVStore(csv_store.path)).count_users(status="INACTIVE")
+
+
+def test_two_compactions_behind_reloads(csv_store):
+    gen = csv_store.generation()
+    rows = csv_store.read_all()
+    for i in range(2):
+        csv_store.upsert(dict(rows[i], sede="OTRA"))
+        csv_store.compact()
+    assert csv_store.changes_since(gen) is None
+
+
+def test_writes_during_compaction_are_kept(csv_store, monkeypatch):
+    from accessuti.storage import csv_store as module
+
+    svc = UserService(csv_store)
+    reader = UserService(CSVStore(csv_store.path))
+    keys = sorted(svc._by_key)
+    svc.deactivate_users(keys[:5])
+    write_temp = module.write_csv_temp
+
+    def slow_write(*args):
+        # otro worker escribe mientras se arma el base nuevo
+        tmp = write_temp(*args)
+        UserService(CSVStore(csv_store.path)).deactivate_users(keys[5:10])
+        return tmp
+
+    monkeypatch.setattr(module, "write_csv_temp", slow_write)
+    csv_store.compact()
+    svc.deactivate_users(keys[10:15])
+
+    assert os.path.exists(csv_store.journal_path)
+    fresh = UserService(CSVStore(csv_store.path))
+    monkeypatch.setattr(reader, "_load_network_users", None)
+    reader.refresh()
+    for u in (fresh, reader):
+        assert all(u._by_key[k].status == "INACTIVE" for k in keys[:15])
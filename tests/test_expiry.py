@@ -0,0 +1,131 @@
+import random, time
+from datetime import date, timedelta
+
+from accessuti.ds.expiry_index import ExpiryIndex
+from accessuti.services.expiry_sweeper import ExpirySweeper
+from accessuti.services.user_service import UserService
+from accessuti.storage.csv_store import CSVStore
+
+
+def _day(days):
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+def _grant(svc, usuario_red, fin):
+    svc.register_network_user({
+        "usuario_red": usuario_red, "nombres": "Prueba", "apellidos": "Vencida",
+        "contrato_fin": _day(300),
+        "vpn_activo": "SI", "vpn_fin": fin,
+        "permisos_activos": "SI", "acceso_redes_sociales": "SI", "permiso_fin": fin,
+    })
+
+
+def test_revoke_expired_includes_inactive_users(csv_store):
+    svc = UserService(csv_store)
+    _grant(svc, "vencido.activo", _day(-1))
+    _grant(svc, "vencido.inactivo", _day(-3))
+    _grant(svc, "vigente.inactivo", _day(5))
+    svc.deactivate_user("vencido.inactivo")
+    svc.deactivate_user("vigente.inactivo")
+
+    svc.revoke_expired()
+
+    for key in ("vencido.activo", "vencido.inactivo"):
+        u = svc._by_key[key]
+        assert (u.vpn_activo, u.permisos_activos, u.acceso_redes_sociales) == ("NO", "NO", "NO")
+    assert svc._by_key["vigente.inactivo"].vpn_activo == "SI"
+    # y queda persistido
+    assert UserService(csv_store)._by_key["vencido.inactivo"].vpn_activo == "NO"
+    # lo que revocó el barrido coincide con un recorrido completo
+    today = date.today()
+    assert not [
+        u.usuario_red for u in UserService(csv_store)._by_key.values()
+        if (u.vpn_activo == "SI" and u.vpn_fin and date.fromisoformat(u.vpn_fin) < today)
+        or (u.permisos_activos == "SI" and u.permiso_fin and date.fromisoformat(u.permiso_fin) < today)
+    ]
+
+
+def test_alerts_skip_inactive_users(csv_store):
+    svc = UserService(csv_store)
+    _grant(svc, "alerta.inactivo", _day(3))
+    svc.deactivate_user("alerta.inactivo")
+    assert "alerta.inactivo" not in {a["u"].usuario_red for a in svc.expiring_alerts(15)}
+
+
+def test_sweeper_revokes_and_schedules_next(csv_store, tmp_path):
+    svc = UserService(csv_store)
+    _grant(svc, "barrido.inactivo", _day(-2))
+    svc.deactivate_user("barrido.inactivo")
+    sweeper = ExpirySweeper(svc, str(tmp_path / "expiry.lock"))
+
+    result = sweeper.sweep()
+    assert result["VPN"][0] >= 1 and result["PERMISOS"][0] >= 1
+    assert svc._by_key["barrido.inactivo"].vpn_activo == "NO"
+    assert sweeper.stats["processed"] == sum(n for n, _ in result.values())
+    # nada más vencido: la próxima revocación es futura
+    assert sweeper.sweep() == {"VPN": (0, None), "PERMISOS": (0, None)}
+    assert 0 < sweeper.seconds_until_next() <= sweeper.max_sleep
+
+
+def test_sweeper_thread_stops(csv_store, tmp_path):
+    svc = UserService(csv_store)
+    _grant(svc, "hilo.inactivo", _day(-1))
+    svc.deactivate_user("hilo.inactivo")
+    sweeper = ExpirySweeper(svc, str(tmp_path / "expiry.lock")).start()
+    deadline = time.time() + 10
+    while svc._by_key["hilo.inactivo"].vpn_activo == "SI" and time.time() < deadline:
+        time.sleep(0.05)
+    sweeper.stop()
+    sweeper._thread.join(5)
+    assert svc._by_key["hilo.inactivo"].vpn_activo == "NO"
+    assert not sweeper._thread.is_alive()
+
+
+def test_expiry_index_matches_brute_force():
+    rnd = random.Random(3)
+    ref = {f"u{i:03d}": rnd.randint(0, 50) for i in range(200)}
+    idx = ExpiryIndex.build(ref.items())
+    for _ in range(2000):
+        key = f"u{rnd.randrange(300):03d}"
+        if rnd.random() < 0.3:
+            idx.remove(key)
+            ref.pop(key, None)
+        else:
+            ref[key] = rnd.randint(0, 50)
+            idx.add(key, ref[key])
+        cut = rnd.randint(-1, 51)
+        assert idx.upto(cut) == sorted((d, k) for k, d in ref.items() if d <= cut)
+    assert len(idx) == len(ref)
+    assert idx.first() == min((d, k) for k, d in ref.items())
+
+
+def _expected_expiry(svc):
+    # lo que deberían tener los índices, recalculado desde los registros
+    out = {"CONTRATO": [], "VPN": [], "PERMISOS": []}
+    for k, u in svc._by_key.items():
+        if u.status == "ACTIVE" and u.contrato_fin:
+            out["CONTRATO"].append((date.fromisoformat(u.contrato_fin).toordinal(), k))
+        if u.vpn_activo == "SI" and u.vpn_fin:
+            out["VPN"].append((date.fromisoformat(u.vpn_fin).toordinal(), k))
+        if u.permisos_activos == "SI" and u.permiso_fin:
+            out["PERMISOS"].append((date.fromisoformat(u.permiso_fin).toordinal(), k))
+    return {t: sorted(v) for t, v in out.items()}
+
+
+def test_expiry_indexes_after_writes_match_brute_force(csv_store, mutate):
+    svc = UserService(csv_store)
+    mutate(svc, seed=6)
+    expected = _expected_expiry(svc)
+    far = date.max.toordinal()
+    assert {t: idx.upto(far) for t, idx in svc._expiry.items()} == expected
+
+    today = date.today().toordinal()
+    alerts = [(a["tipo"], a["u"].usuario_red, a["dias"]) for a in svc.expiring_alerts(30)]
+    assert sorted(alerts) == sorted(
+        (t, k, d - today) for t, pairs in expected.items() for d, k in pairs
+        if d <= today + 30 and svc._by_key[k].status == "ACTIVE"
+    )
+    assert [a[2] for a in alerts] == sorted(a[2] for a in alerts)
+    # y lo mismo que una carga completa del archivo
+    fresh = UserService(CSVStore(csv_store.path))
+    assert {t: idx.upto(far) for t, idx in fresh._expiry.items()} == expected
@@ -0,0 +1,32 @@
+import csv, io
+
+import pytest
+
+from accessuti.services.export import USER_COLUMNS, iter_csv, iter_xlsx
+from accessuti.services.user_service import NetworkUser
+
+EVIL = NetworkUser(
+    usuario_red="evil", nombres='=HYPERLINK("http://x","clic")', apellidos="@SUM(A1)",
+    dni="+51999", sede="-2+3", subdependencia="",
+)
+
+
+def _by_header(rows):
+    return dict(zip(rows[0], rows[1]))
+
+
+def test_csv_cells_cannot_start_a_formula():
+    text = b"".join(iter_csv([EVIL], USER_COLUMNS)).decode("utf-8-sig")
+    row = _by_header(list(csv.reader(io.StringIO(text))))
+    assert row["NOMBRES"] == '\'=HYPERLINK("http://x","clic")'
+    assert (row["APELLIDOS"], row["DNI"], row["SEDE"]) == ("'@SUM(A1)", "'+51999", "'-2+3")
+    assert row["SUBDIRECCION"] == "-"
+
+
+def test_xlsx_cells_cannot_start_a_formula():
+    openpyxl = pytest.importorskip("openpyxl")
+    wb = openpyxl.load_workbook(io.BytesIO(b"".join(iter_xlsx([EVIL], USER_COLUMNS))))
+    row = _by_header([[c.value for c in r] for r in wb.active.iter_rows()])
+    assert row["NOMBRES"] == '\'=HYPERLINK("http://x","clic")'
+    assert (row["APELLIDOS"], row["DNI"], row["SEDE"]) == ("'@SUM(A1)", "'+51999", "'-2+3")
+    assert row["SUBDIRECCION"] == "-"
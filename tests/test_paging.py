@@ -0,0 +1,100 @@
+import pytest
+
+from accessuti.services.user_service import UserService
+
+
+def _expected(svc, status="ACTIVE", **equals):
+    return sorted(
+        k for k, u in svc._by_key.items()
+        if (status is None or u.status == status)
+        and all(getattr(u, f) == v for f, v in equals.items())
+    )
+
+
+def _walk(svc, limit, **filters):
+    got, cursor, pages = [], None, 0
+    while True:
+        page, cursor = svc.page_users(after=cursor, limit=limit, **filters)
+        assert len(page) <= limit
+        got += [u.usuario_red for u in page]
+        pages += 1
+        if cursor is None:
+            return got, pages
+        # el cursor es la última clave de la página
+        assert cursor == page[-1].usuario_red and len(page) == limit
+
+
+@pytest.fixture
+def svc(csv_store):
+    return UserService(csv_store)
+
+
+@pytest.mark.parametrize("filters", [
+    {},                                                  # sin filtros: recorre el árbol
+    {"status": None},
+    {"status": "INACTIVE"},                              # pocos candidatos: ordena el posting set
+    {"sede": "Sede Central"},                            # muchos candidatos: árbol + posting set
+    {"sede": "Sede Central", "status": "INACTIVE"},
+])
+def test_walk_matches_full_scan(svc, filters):
+    expected = _expected(svc, **filters)
+    assert expected
+    for limit in (1, 7, 100, len(expected), len(expected) + 1):
+        got, pages = _walk(svc, limit, **filters)
+        assert got == expected
+        assert pages == max(1, -(-len(expected) // limit))
+
+
+def test_page_boundaries(svc):
+    keys = _expected(svc)
+    # quedan exactamente dos páginas llenas: la primera trae cursor, la segunda no
+    limit = 50
+    first, cursor = svc.page_users(after=keys[-2 * limit - 1], limit=limit)
+    assert [u.usuario_red for u in first] == keys[-2 * limit:-limit]
+    assert cursor == keys[-limit - 1]
+    second, cursor = svc.page_users(after=cursor, limit=limit)
+    assert [u.usuario_red for u in second] == keys[-limit:]
+    assert cursor is None
+
+    # el cursor excluye su propia clave y da igual mayúsculas / espacios
+    page, _ = svc.page_users(after=f"  {keys[9].upper()} ", limit=5)
+    assert [u.usuario_red for u in page] == keys[10:15]
+    # después de la última clave no queda nada
+    assert svc.page_users(after=keys[-1], limit=5) == ([], None)
+
+
+def test_cursor_of_unknown_key(svc):
+    keys = _expected(svc)
+    # un cursor que no es un usuario (borrado, inventado) sigue posicionando
+    # por orden de clave, también con el posting set ordenado
+    gap = keys[20] + "0"
+    assert gap not in svc._by_key
+    page, _ = svc.page_users(after=gap, limit=3)
+    assert [u.usuario_red for u in page] == keys[21:24]
+    inactive = _expected(svc, status="INACTIVE")
+    page, _ = svc.page_users(after=inactive[2] + "0", limit=2, status="INACTIVE")
+    assert [u.usuario_red for u in page] == inactive[3:5]
+    assert svc.page_users(after="￿", limit=5) == ([], None)
+
+
+def test_api_walk_and_invalid_args(login, app):
+    svc = app.extensions["user_service"]
+    c = login("admin")
+    expected = _expected(svc, sede="Sede Central")
+
+    got, cursor = [], ""
+    while True:
+        res = c.get(f"/api/v1/users?sede=Sede Central&fields=usuario_red&limit=97&cursor={cursor}")
+        assert res.status_code == 200
+        body = res.get_json()
+        got += [u["usuario_red"] for u in body["items"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert got == expected
+
+    # cursor basura: página vacía, no error
+    body = c.get("/api/v1/users?cursor=%EF%BF%BFzzz").get_json()
+    assert body == {"items": [], "next_cursor": None, "limit": 100}
+    for bad in ("limit=0", f"limit={10**6}", "limit=abc", "status=BORRADO", "fields=clave"):
+        assert c.get(f"/api/v1/users?{bad}").status_code == 400
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+
+def test_audit_fragment_is_admin_only(login):
+    consulta = login("consulta")
+    assert consulta.get("/app/fragment/audit").status_code == 403
+    assert b"fragment/audit" not in consulta.get("/app/").data
+
+    admin = login("admin")
+    assert admin.get("/app/fragment/audit").status_code == 200
+    assert b"fragment/audit" in admin.get("/app/").data
+    # con la respuesta del admin ya en caché
+    assert consulta.get("/app/fragment/audit").status_code == 403
+
+
+def _background_alive(app):
+    audit = app.extensions["user_service"].audit
+    return audit._thread is not None and audit._thread.is_alive()
+
+
+def test_background_threads_start_per_process(app, login):
+    # create_app no arranca hilos: con --preload quedarían en el master
+    assert app.extensions["user_service"].audit._thread is None
+    login("consulta").get("/app/")
+    assert _background_alive(app)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requiere fork")
+def test_background_threads_after_preload_fork(app, login):
+    c = login("admin")
+    pid = os.fork()
+    if pid == 0:
+        # worker: la primera petición arranca sus propios hilos
+        ok = False
+        try:
+            ok = c.get("/app/fragment/audit").status_code == 200 and _background_alive(app)
+        finally:
+            os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
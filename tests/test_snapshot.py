@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from accessuti.services.user_service import UserService
+from accessuti.storage import snapshot
+from accessuti.storage.csv_store import CSVStore
+
+
+def _state(svc):
+    return (
+        [u.to_dict() for u in svc._tree.values()],
+        {f: {v: sorted(idx.get(v)) for v in idx.values()} for f, idx in svc._by_field.items()},
+        [(a["tipo"], a["u"].usuario_red, a["dias"]) for a in svc.expiring_alerts(60)],
+        svc.count_by_sede(), svc.count_by_status(),
+        svc.next_revocation(),
+    )
+
+
+@pytest.fixture
+def snap_path(tmp_path):
+    return str(tmp_path / "users.snap")
+
+
+@pytest.fixture
+def full_loads(csv_store, monkeypatch):
+    # cuenta las lecturas completas del store (las que el snapshot evita)
+    calls = []
+    iter_rows = csv_store.iter_rows
+    monkeypatch.setattr(csv_store, "iter_rows", lambda: calls.append(1) or iter_rows())
+    return calls
+
+
+def test_round_trip(csv_store, snap_path, full_loads):
+    first = UserService(csv_store, snapshot_path=snap_path)
+    assert os.path.exists(snap_path) and len(full_loads) == 1
+
+    second = UserService(csv_store, snapshot_path=snap_path)
+    assert len(full_loads) == 1
+    assert _state(second) == _state(first)
+    assert second.check_aggregates() == {}
+    # el índice de nombres no va en el snapshot: se construye al usarlo
+    assert second.filter_users(nombre="rojas") == first.filter_users(nombre="rojas")
+
+
+def test_writes_after_snapshot_are_applied(csv_store, snap_path, full_loads):
+    UserService(csv_store, snapshot_path=snap_path)
+    other = UserService(CSVStore(csv_store.path))
+    key = sorted(other._by_key)[0]
+    other.deactivate_user(key)
+    other.register_network_user({"usuario_red": "nuevo.tras.snapshot", "nombres": "Nuevo",
+                                 "apellidos": "Usuario", "sede": "Sede Central"})
+
+    loaded = UserService(csv_store, snapshot_path=snap_path)
+    assert len(full_loads) == 1
+    assert loaded._by_key[key].status == "INACTIVE"
+    assert _state(loaded) == _state(UserService(CSVStore(csv_store.path)))
+    assert loaded.check_aggregates() == {}
+
+
+def test_stale_snapshot_falls_back_to_full_load(csv_store, snap_path, full_loads):
+    UserService(csv_store, snapshot_path=snap_path)
+    # reescritura completa del store: ya no hay deltas que aplicar encima
+    rows = csv_store.read_all()[:-10]
+    csv_store.write_all(rows)
+    del full_loads[:]
+
+    loaded = UserService(csv_store, snapshot_path=snap_path)
+    assert len(full_loads) == 1
+    assert len(loaded._by_key) == len(rows)
+    assert _state(loaded) == _state(UserService(CSVStore(csv_store.path)))
+    # y deja escrito un snapshot de la generación nueva
+    assert snapshot.snapshot_generation(snap_path, loaded._snapshot_source()) == loaded._generation
+
+
+def test_snapshot_of_other_store_is_ignored(csv_store, snap_path, full_loads, tmp_path):
+    other = CSVStore(str(tmp_path / "otro.csv"))
+    other.write_all(csv_store.read_all()[:5])
+    UserService(other, snapshot_path=snap_path)
+    del full_loads[:]
+
+    loaded = UserService(csv_store, snapshot_path=snap_path)
+    assert len(full_loads) == 1
+    assert loaded.total_network_users() == UserService(CSVStore(csv_store.path)).total_network_users()
+
+
+@pytest.mark.parametrize("damage", ["flip", "truncate", "version", "empty"])
+def test_corrupt_snapshot_falls_back_to_full_load(csv_store, snap_path, full_loads, damage):
+    expected = _state(UserService(csv_store, snapshot_path=snap_path))
+    with open(snap_path, "r+b") as f:
+        data = bytearray(f.read())
+        if damage == "flip":
+            data[-20] ^= 0xFF
+        elif damage == "truncate":
+            data = data[: len(data) // 2]
+        elif damage == "version":
+            data[8] += 1
+        else:
+            data = b""
+        f.seek(0)
+        f.truncate()
+        f.write(data)
+
+    loaded = UserService(csv_store, snapshot_path=snap_path)
+    assert len(full_loads) == 2
+    assert _state(loaded) == expected
+    assert snapshot.read_snapshot(snap_path, loaded._snapshot_source()) is not None
@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+import pytest
+
+from accessuti.services.user_service import UserService
+from accessuti.storage.base import UserStore
+from accessuti.storage.sqlite_store import SQLiteStore
+
+def _day(days):
+    # los datos sintéticos se generan alrededor de hoy
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+FILTERS = [
+    {"sede": "Sede Central"},
+    {"status": "ACTIVE", "contrato_fin_lte": _day(90)},
+    {"vpn_fin_gte": _day(0), "vpn_fin_lt": _day(60)},
+    {"permiso_fin_gt": _day(60)},
+]
+
+
+@pytest.fixture
+def sqlite_store(tmp_path, csv_store):
+    store = SQLiteStore(str(tmp_path / "users.db"))
+    store.write_all(csv_store.read_all())
+    return store
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_find_matches_full_scan(sqlite_store, filters):
+    # UserStore.find recorre todas las filas
+    found = sqlite_store.find(**filters)
+    assert found
+    assert found == sorted(
+        UserStore.find(sqlite_store, **filters), key=lambda r: r["usuario_red"]
+    )
+
+
+def test_find_uses_indexes(sqlite_store):
+    plan = sqlite_store._conn().execute(
+        "EXPLAIN QUERY PLAN SELECT usuario_red FROM users WHERE contrato_fin != '' AND contrato_fin <= ?",
+        ("2026-06-30",),
+    ).fetchall()
+    assert "ix_users_contrato_fin" in " ".join(str(tuple(r)) for r in plan)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_select_users_pushdown_matches_memory(sqlite_store, csv_store, filters):
+    keys = UserService(sqlite_store).select_users(**filters)
+    assert keys and keys == UserService(csv_store).select_users(**filters)
+
+
+def test_api_date_range_filter(login, app):
+    svc = app.extensions["user_service"]
+    c = login("admin")
+    expected = svc.select_users(status="ACTIVE", contrato_fin_lte=_day(90))
+    assert len(expected) > 100
+
+    got, cursor = [], ""
+    while True:
+        res = c.get(f"/api/v1/users?contrato_fin_lte={_day(90)}&fields=usuario_red&limit=100&cursor={cursor}").get_json()
+        got += [u["usuario_red"] for u in res["items"]]
+        cursor = res["next_cursor"]
+        if not cursor:
+            break
+    assert got == expected
+    assert c.get("/api/v1/users?contrato_fin_lte=mañana").status_code == 400
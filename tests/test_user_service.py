@@ -0,0 +1,132 @@
+import sys, threading, time
+from datetime import date, timedelta
+
+from accessuti.ds import name_index
+from accessuti.services import user_service
+from accessuti.services.user_service import UserService, _parse_date
+from accessuti.storage.csv_store import CSVStore
+
+
+def _run_with_timeout(fn, timeout=10):
+    out = {}
+    t = threading.Thread(target=lambda: out.setdefault("value", fn()), daemon=True)
+    t.start()
+    t.join(timeout)
+    assert not t.is_alive(), "bloqueado (deadlock)"
+    return out["value"]
+
+
+def test_name_query_during_warm_up_does_not_deadlock(csv_store, monkeypatch):
+    svc = UserService(csv_store)
+    building = threading.Event()
+    build = name_index.NameIndex.build.__func__
+
+    def slow_build(cls, docs):
+        building.set()
+        time.sleep(0.3)
+        return build(cls, docs)
+
+    monkeypatch.setattr(name_index.NameIndex, "build", classmethod(slow_build))
+    svc.warm_up()
+    assert building.wait(5)
+
+    # mientras el hilo de warm_up construye el índice
+    page, _ = _run_with_timeout(lambda: svc.page_users(nombre="ana", limit=10))
+    count = _run_with_timeout(lambda: svc.count_users(nombre="ana"))
+    key = next(iter(svc._by_key))
+    _run_with_timeout(lambda: svc.deactivate_user(key))
+
+    assert page and count >= len(page)
+    assert all("ana" in f"{u.nombres} {u.apellidos}".lower() for u in page)
+    assert count == len(UserService(csv_store).filter_users(nombre="ana"))
+
+
+def test_update_does_not_revert_other_worker_edit(csv_store):
+    # dos workers sobre el mismo archivo; A no se enteró del cambio de B
+    a = UserService(csv_store)
+    b = UserService(CSVStore(csv_store.path))
+    key = next(k for k, u in a._by_key.items() if u.status == "ACTIVE")
+
+    row = b._by_key[key].to_dict()
+    b.register_network_user({**row, "sede": "SEDE NUEVA"})
+    a.deactivate_user(key)
+    u = UserService(CSVStore(csv_store.path))._by_key[key]
+    assert (u.sede, u.status) == ("SEDE NUEVA", "INACTIVE")
+
+    # lo mismo con una acción en lote
+    b.register_network_user({**row, "sede": "OTRA SEDE", "vpn_activo": "SI"})
+    a.deactivate_special_permissions_many([key])
+    u = UserService(CSVStore(csv_store.path))._by_key[key]
+    assert (u.sede, u.vpn_activo) == ("OTRA SEDE", "NO")
+    assert a._by_key[key].sede == "OTRA SEDE"
+
+
+def test_name_search_while_renaming(csv_store):
+    svc = UserService(csv_store)
+    svc._name_index()
+    rows = [u.to_dict() for u in list(svc._by_key.values())[:200]]
+    stop, errors = threading.Event(), []
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            row = rows[i % len(rows)]
+            # como refresh(): aplica en memoria filas que escribió otro worker
+            with svc._lock:
+                svc._apply_row({**row, "nombres": f"Renombrado{i} Ana", "apellidos": f"Zeta{i}"})
+            i += 1
+
+    def reader():
+        while not stop.is_set():
+            try:
+                svc.filter_users(nombre="ana")
+                svc.suggest_users("renombrado")
+                svc.suggest_users("zeta1")
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    # cambios de hilo frecuentes: la carrera aparece enseguida
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        for t in threads:
+            t.start()
+        time.sleep(1.5)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(10)
+        sys.setswitchinterval(interval)
+    assert errors == []
+
+
+def test_parse_date_accepts_unpadded():
+    assert _parse_date("2026-03-05") == _parse_date(" 2026-3-5 ") == date(2026, 3, 5)
+    for bad in ("", "2026-02-30", "2026-13-01", "05/03/2026", "2026-3-5x"):
+        assert _parse_date(bad) is None
+
+
+def test_unpadded_dates_in_file_generate_alerts(csv_store, monkeypatch):
+    class Today(date):
+        @classmethod
+        def today(cls):
+            return date(2026, 3, 1)
+
+    monkeypatch.setattr(user_service, "date", Today)
+    rows = csv_store.read_all()
+    row = dict(rows[0], usuario_red="fecha.corta", status="ACTIVE", vpn_activo="SI", vpn_fin="2026-3-5")
+    csv_store.write_all(rows + [row])
+
+    svc = UserService(csv_store)
+    assert svc.get_network_user("fecha.corta").vpn_fin == "2026-03-05"
+    assert {(a["tipo"], a["dias"]) for a in svc.expiring_alerts(15)
+            if a["u"].usuario_red == "fecha.corta"} == {("VPN", 4)}
+    svc.revoke_expired(today=date(2026, 3, 6))
+    assert svc.get_network_user("fecha.corta").vpn_activo == "NO"
+
+    # lo que entra por el formulario o la importación se guarda AAAA-MM-DD
+    svc.register_network_user({"usuario_red": "fecha.form", "nombres": "A", "apellidos": "B",
+                               "contrato_fin": "2026-3-5"})
+    stored = {r["usuario_red"]: r for r in csv_store.read_all()}
+    assert stored["fecha.form"]["contrato_fin"] == "2026-03-05"